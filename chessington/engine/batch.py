@@ -0,0 +1,284 @@
+"""
+Scoring many positions at once with NumPy, for building datasets. Requires the optional numpy dependency
+(`poetry install -E numpy`).
+
+Positions are given either as an (N, 12, 8, 8) array of piece planes or as an (N, 64) array of square codes.
+Both use the layout of `Board.board`, with row 0 on white's side:
+
+- planes[n, plane, row, col] is 1 where there is a piece of the plane's kind: planes 0-5 hold white's pawns,
+  knights, bishops, rooks, queens and king, and planes 6-11 black's, in the same order.
+- squares[n, row * 8 + col] is 0 for an empty square, 1-6 for a white piece in the same order as the planes,
+  and minus that for a black piece.
+
+Scores are in centipawns from white's point of view, unless told whose turn it is.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from chessington.engine.board import Board, BOARD_SIZE
+from chessington.engine.data import Player
+from chessington.engine.evaluation import PIECE_VALUES, PIECE_SQUARE_TABLES, ENDGAME_PIECE_SQUARE_TABLES, \
+    PHASE_WEIGHTS, MAX_PHASE
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+from chessington.engine.tables import ORTHOGONAL_DIRECTIONS, DIAGONAL_DIRECTIONS, KNIGHT_OFFSETS, KING_OFFSETS, \
+    PAWN_ATTACK_OFFSETS
+
+PIECE_TYPES = (Pawn, Knight, Bishop, Rook, Queen, King)
+PLANE_COUNT = 2 * len(PIECE_TYPES)
+SQUARE_COUNT = BOARD_SIZE * BOARD_SIZE
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(len(PIECE_TYPES))
+
+# The square code for each plane
+PLANE_CODES = np.array([code for sign in (1, -1) for code in range(sign, sign * 7, sign)], dtype=np.int8)
+_CODES = {(piece_type, player): sign * code
+          for player, sign in ((Player.WHITE, 1), (Player.BLACK, -1))
+          for code, piece_type in enumerate(PIECE_TYPES, 1)}
+_PIECES_BY_CODE = {code: piece for piece, code in _CODES.items()}
+
+PLANE_VALUES = np.array([PIECE_VALUES[piece_type] for piece_type in PIECE_TYPES] * 2, dtype=np.int32)
+PLANE_PHASE_WEIGHTS = np.array([PHASE_WEIGHTS[piece_type] for piece_type in PIECE_TYPES] * 2, dtype=np.int32)
+
+
+def _plane_square_tables(piece_square_tables):
+    """The piece-square bonus for each plane, as a (12, 8, 8) array indexed the same way as the planes."""
+    tables = np.zeros((PLANE_COUNT, BOARD_SIZE, BOARD_SIZE), dtype=np.int32)
+    for index, piece_type in enumerate(PIECE_TYPES):
+        # The tables are written with the 8th rank first, as white sees it
+        table = np.array(piece_square_tables[piece_type], dtype=np.int32)
+        tables[index] = table[::-1]
+        tables[len(PIECE_TYPES) + index] = table
+    return tables
+
+
+PLANE_SQUARE_TABLES = _plane_square_tables(PIECE_SQUARE_TABLES)
+ENDGAME_PLANE_SQUARE_TABLES = _plane_square_tables(ENDGAME_PIECE_SQUARE_TABLES)
+
+
+@dataclass
+class BatchFeatures:
+    """
+    Features of N positions, each an array of length N. Pairs are given as (N, 2) arrays, white's first.
+    """
+    material: np.ndarray
+    piece_square: np.ndarray
+    endgame_piece_square: np.ndarray
+    phase: np.ndarray
+    mobility: np.ndarray
+    attacks: np.ndarray
+
+    @property
+    def scores(self):
+        """Each position's score as `evaluation.evaluate` gives it, but from white's point of view."""
+        return _tapered(self.material + self.piece_square, self.material + self.endgame_piece_square, self.phase)
+
+
+def boards_to_squares(boards):
+    """
+    The (N, 64) array of square codes for a sequence of boards.
+    """
+    boards = list(boards)
+    squares = np.zeros((len(boards), SQUARE_COUNT), dtype=np.int8)
+    for index, board in enumerate(boards):
+        squares[index] = [_CODES[type(piece), piece.player] if piece is not None else 0
+                          for pieces in board.board for piece in pieces]
+    return squares
+
+
+def boards_to_planes(boards):
+    """
+    The (N, 12, 8, 8) array of piece planes for a sequence of boards.
+    """
+    return squares_to_planes(boards_to_squares(boards))
+
+
+def white_to_move(boards):
+    """
+    A boolean array saying whether it is white's turn on each of a sequence of boards.
+    """
+    return np.array([board.current_player == Player.WHITE for board in boards], dtype=bool)
+
+
+def squares_to_planes(squares):
+    squares = np.asarray(squares)
+    planes = squares[:, None, :] == PLANE_CODES[None, :, None]
+    return planes.reshape(len(squares), PLANE_COUNT, BOARD_SIZE, BOARD_SIZE).astype(np.uint8)
+
+
+def planes_to_squares(planes):
+    planes = np.asarray(planes).reshape(len(planes), PLANE_COUNT, SQUARE_COUNT).astype(np.int8)
+    return np.einsum('nps,p->ns', planes, PLANE_CODES).astype(np.int8)
+
+
+def squares_to_boards(squares, white_to_move=None):
+    """
+    Builds a Board for each row of square codes, made of shared pieces (see `Piece.shared`). It is white's turn
+    on every board unless `white_to_move` says otherwise.
+    """
+    squares = np.asarray(squares)
+    boards = []
+    for index, codes in enumerate(squares.tolist()):
+        board_state = [[None] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+        for square, code in enumerate(codes):
+            if code:
+                piece_type, player = _PIECES_BY_CODE[code]
+                board_state[square // BOARD_SIZE][square % BOARD_SIZE] = piece_type.shared(player)
+        player = Player.WHITE if white_to_move is None or white_to_move[index] else Player.BLACK
+        boards.append(Board(player, board_state))
+    return boards
+
+
+def planes_to_boards(planes, white_to_move=None):
+    """
+    Builds a Board for each set of piece planes, as `squares_to_boards`.
+    """
+    return squares_to_boards(planes_to_squares(planes), white_to_move)
+
+
+def _as_planes(positions):
+    positions = np.asarray(positions)
+    if positions.ndim == 2 and positions.shape[1] == SQUARE_COUNT:
+        return squares_to_planes(positions)
+    if positions.ndim == 4 and positions.shape[1:] == (PLANE_COUNT, BOARD_SIZE, BOARD_SIZE):
+        return positions
+    raise ValueError(f'Expected an (N, {PLANE_COUNT}, 8, 8) or (N, {SQUARE_COUNT}) array, got {positions.shape}')
+
+
+def _shift(planes, row_step, col_step):
+    """Moves everything in the last two dimensions by the given steps, dropping whatever falls off the board."""
+    shifted = np.zeros_like(planes)
+    rows_to = slice(max(row_step, 0), BOARD_SIZE + min(row_step, 0))
+    rows_from = slice(max(-row_step, 0), BOARD_SIZE + min(-row_step, 0))
+    cols_to = slice(max(col_step, 0), BOARD_SIZE + min(col_step, 0))
+    cols_from = slice(max(-col_step, 0), BOARD_SIZE + min(-col_step, 0))
+    shifted[..., rows_to, cols_to] = planes[..., rows_from, cols_from]
+    return shifted
+
+
+def _piece_attacks(planes, colour, empty):
+    """How many of one side's pieces other than pawns attack each square, as an (N, 8, 8) array."""
+    pieces = planes[:, colour * len(PIECE_TYPES):(colour + 1) * len(PIECE_TYPES)].astype(np.int32)
+    attacks = np.zeros(pieces[:, 0].shape, dtype=np.int32)
+    for plane, offsets in ((KNIGHT, KNIGHT_OFFSETS), (KING, KING_OFFSETS)):
+        for row_step, col_step in offsets:
+            attacks += _shift(pieces[:, plane], row_step, col_step)
+
+    # Each ray is followed one step at a time, until it reaches an occupied square
+    for directions, sliders in ((ORTHOGONAL_DIRECTIONS, (ROOK, QUEEN)), (DIAGONAL_DIRECTIONS, (BISHOP, QUEEN))):
+        origins = pieces[:, sliders[0]] + pieces[:, sliders[1]]
+        for row_step, col_step in directions:
+            ray = _shift(origins, row_step, col_step)
+            while ray.any():
+                attacks += ray
+                ray = _shift(ray * empty, row_step, col_step)
+    return attacks
+
+
+def _pawn_attacks(planes, colour, player):
+    pawns = planes[:, colour * len(PIECE_TYPES) + PAWN].astype(np.int32)
+    return [_shift(pawns, row_step, col_step) for row_step, col_step in PAWN_ATTACK_OFFSETS[player]]
+
+
+def attack_maps(positions):
+    """
+    How many pieces of each side attack each square, as an (N, 2, 8, 8) array. Sliding pieces are blocked by
+    the first piece in their way, whichever side it belongs to.
+    """
+    planes = _as_planes(positions)
+    empty = (planes.sum(axis=1) == 0).astype(np.int32)
+    maps = np.zeros((len(planes), 2, BOARD_SIZE, BOARD_SIZE), dtype=np.int32)
+    for colour, player in ((WHITE, Player.WHITE), (BLACK, Player.BLACK)):
+        maps[:, colour] = _piece_attacks(planes, colour, empty) + sum(_pawn_attacks(planes, colour, player))
+    return maps
+
+
+def material(positions):
+    """
+    The material balance of each position.
+    """
+    planes = _as_planes(positions)
+    counts = planes.reshape(len(planes), PLANE_COUNT, SQUARE_COUNT).sum(axis=2, dtype=np.int32)
+    half = len(PIECE_TYPES)
+    return counts[:, :half] @ PLANE_VALUES[:half] - counts[:, half:] @ PLANE_VALUES[half:]
+
+
+def piece_square_scores(positions, endgame=False):
+    """
+    The piece-square table score of each position, using the middlegame tables or the endgame ones.
+    """
+    planes = _as_planes(positions).astype(np.int32)
+    half = len(PIECE_TYPES)
+    tables = ENDGAME_PLANE_SQUARE_TABLES if endgame else PLANE_SQUARE_TABLES
+    scores = np.einsum('npij,pij->np', planes, tables)
+    return scores[:, :half].sum(axis=1) - scores[:, half:].sum(axis=1)
+
+
+def phase(positions):
+    """
+    The game phase of each position, as `evaluation.PHASE_WEIGHTS` counts it.
+    """
+    planes = _as_planes(positions)
+    counts = planes.reshape(len(planes), PLANE_COUNT, SQUARE_COUNT).sum(axis=2, dtype=np.int32)
+    return counts @ PLANE_PHASE_WEIGHTS
+
+
+def _tapered(middlegame, endgame, phases):
+    phases = np.minimum(phases, MAX_PHASE)
+    return (middlegame * phases + endgame * (MAX_PHASE - phases)) // MAX_PHASE
+
+
+def features(positions):
+    """
+    Material, piece-square scores, phase, mobility and attack count of every position, in one pass.
+
+    Mobility estimates each side's number of moves: captures and moves to empty squares, plus pawn pushes and
+    captures, ignoring checks, pins, castling, en passant and the choice of promotion piece. The attack count is
+    the number of (piece, square) attacks each side makes.
+    """
+    planes = _as_planes(positions)
+    count = len(planes)
+    half = len(PIECE_TYPES)
+    white = planes[:, :half].sum(axis=1, dtype=np.int32)
+    black = planes[:, half:].sum(axis=1, dtype=np.int32)
+    empty = (white + black == 0).astype(np.int32)
+
+    mobility = np.zeros((count, 2), dtype=np.int32)
+    attacks = np.zeros((count, 2), dtype=np.int32)
+    for colour, player, own, enemy, forward, start_row in ((WHITE, Player.WHITE, white, black, 1, 1),
+                                                          (BLACK, Player.BLACK, black, white, -1, BOARD_SIZE - 2)):
+        piece_attacks = _piece_attacks(planes, colour, empty)
+        pawn_attacks = _pawn_attacks(planes, colour, player)
+        attacks[:, colour] = piece_attacks.sum(axis=(1, 2)) + sum(pawn_attacks).sum(axis=(1, 2))
+
+        pawns = planes[:, colour * half + PAWN].astype(np.int32)
+        single_pushes = _shift(pawns, forward, 0) * empty
+        double_pushes = _shift(single_pushes * _row_mask(start_row + forward), forward, 0) * empty
+        mobility[:, colour] = (piece_attacks * (1 - own)).sum(axis=(1, 2)) \
+            + single_pushes.sum(axis=(1, 2)) + double_pushes.sum(axis=(1, 2)) \
+            + sum(captures * enemy for captures in pawn_attacks).sum(axis=(1, 2))
+
+    return BatchFeatures(material(planes), piece_square_scores(planes), piece_square_scores(planes, endgame=True),
+                         phase(planes), mobility, attacks)
+
+
+def _row_mask(row):
+    mask = np.zeros((BOARD_SIZE, BOARD_SIZE), dtype=np.int32)
+    mask[row] = 1
+    return mask
+
+
+def evaluate(positions, white_to_move=None):
+    """
+    Scores each position as `evaluation.evaluate` would: from the point of view of the side to move if
+    `white_to_move` is given, otherwise from white's.
+    """
+    planes = _as_planes(positions)
+    balance = material(planes)
+    scores = _tapered(balance + piece_square_scores(planes), balance + piece_square_scores(planes, endgame=True),
+                      phase(planes))
+    if white_to_move is not None:
+        scores = np.where(np.asarray(white_to_move, dtype=bool), scores, -scores)
+    return scores
@@ -0,0 +1,263 @@
+"""
+An alternative representation of a chess position as a set of 64-bit integers ("bitboards"), one per piece
+type and colour. Bit n of a bitboard is set if the square at row n // 8, column n % 8 is occupied.
+
+Move generation is done with shifts, masks and precomputed attack tables, which is far faster than walking
+the list-of-lists `Board`. Positions can be converted to and from a `Board` at any time.
+"""
+
+from chessington.engine.board import Board, BOARD_SIZE
+from chessington.engine.data import Player, Square
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+from chessington.engine.tables import KNIGHT_OFFSETS, KING_OFFSETS, PAWN_ATTACK_OFFSETS
+
+PIECE_TYPES = (Pawn, Knight, Bishop, Rook, Queen, King)
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(len(PIECE_TYPES))
+WHITE, BLACK = 0, 1
+
+FULL = (1 << 64) - 1
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_3 = RANK_1 << 16
+RANK_6 = RANK_1 << 40
+RANK_8 = RANK_1 << 56
+
+SQUARES = tuple(Square.at(index // BOARD_SIZE, index % BOARD_SIZE) for index in range(64))
+
+# Directions as (row step, column step). The first four increase the square index, the last four decrease it.
+POSITIVE_DIRECTIONS = ((1, 0), (0, 1), (1, 1), (1, -1))
+NEGATIVE_DIRECTIONS = ((-1, 0), (0, -1), (-1, -1), (-1, 1))
+ORTHOGONAL = ((1, 0), (0, 1), (-1, 0), (0, -1))
+DIAGONAL = ((1, 1), (1, -1), (-1, -1), (-1, 1))
+
+
+def _on_board(row, col):
+    return 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE
+
+
+def _jumps(offsets):
+    table = []
+    for index in range(64):
+        row, col = divmod(index, BOARD_SIZE)
+        mask = 0
+        for row_step, col_step in offsets:
+            if _on_board(row + row_step, col + col_step):
+                mask |= 1 << ((row + row_step) * BOARD_SIZE + col + col_step)
+        table.append(mask)
+    return tuple(table)
+
+
+def _rays(direction):
+    row_step, col_step = direction
+    table = []
+    for index in range(64):
+        row, col = divmod(index, BOARD_SIZE)
+        mask = 0
+        row, col = row + row_step, col + col_step
+        while _on_board(row, col):
+            mask |= 1 << (row * BOARD_SIZE + col)
+            row, col = row + row_step, col + col_step
+        table.append(mask)
+    return tuple(table)
+
+
+KNIGHT_ATTACKS = _jumps(KNIGHT_OFFSETS)
+KING_ATTACKS = _jumps(KING_OFFSETS)
+PAWN_ATTACKS = (_jumps(PAWN_ATTACK_OFFSETS[Player.WHITE]), _jumps(PAWN_ATTACK_OFFSETS[Player.BLACK]))
+RAYS = {direction: _rays(direction) for direction in POSITIVE_DIRECTIONS + NEGATIVE_DIRECTIONS}
+
+# Each ray table paired with whether its direction increases the square index
+_ORTHOGONAL_RAYS = tuple((RAYS[direction], direction in POSITIVE_DIRECTIONS) for direction in ORTHOGONAL)
+_DIAGONAL_RAYS = tuple((RAYS[direction], direction in POSITIVE_DIRECTIONS) for direction in DIAGONAL)
+
+
+def _slide(index, occupied, rays):
+    """All squares reachable from the given square along the given rays, up to and including blockers."""
+    attacks = 0
+    for ray, positive in rays:
+        attacks |= ray[index]
+        blockers = ray[index] & occupied
+        if blockers:
+            # The nearest blocker is the lowest set bit on an increasing ray, and the highest on a decreasing one
+            first = (blockers & -blockers).bit_length() - 1 if positive else blockers.bit_length() - 1
+            attacks ^= ray[first]
+    return attacks
+
+
+def rook_attacks(index, occupied):
+    return _slide(index, occupied, _ORTHOGONAL_RAYS)
+
+
+def bishop_attacks(index, occupied):
+    return _slide(index, occupied, _DIAGONAL_RAYS)
+
+
+def queen_attacks(index, occupied):
+    return _slide(index, occupied, _ORTHOGONAL_RAYS + _DIAGONAL_RAYS)
+
+
+def square_index(square):
+    return square.row * BOARD_SIZE + square.col
+
+
+def iterate_bits(bitboard):
+    """Yields the index of each set bit, lowest first."""
+    while bitboard:
+        lowest = bitboard & -bitboard
+        yield lowest.bit_length() - 1
+        bitboard ^= lowest
+
+
+class BitBoard:
+    """
+    A chess position stored as twelve bitboards, plus the side to move, en-passant target, castling rights and
+    halfmove clock.
+    """
+
+    def __init__(self):
+        self.pieces = [[0] * len(PIECE_TYPES), [0] * len(PIECE_TYPES)]
+        self.occupancy = [0, 0]
+        self.current_player = Player.WHITE
+        self.en_passant = None
+        self.castling_rights = 0
+        self.halfmove_clock = 0
+        self.turn = 1
+
+    @staticmethod
+    def from_board(board):
+        """
+        Builds the bitboard equivalent of the given `Board`.
+        """
+        bitboard = BitBoard()
+        bitboard.current_player = board.current_player
+        bitboard.turn = board.turn
+        bitboard.castling_rights = board.castling_rights
+        bitboard.halfmove_clock = board.halfmove_clock
+        for row in range(BOARD_SIZE):
+            for col in range(BOARD_SIZE):
+                piece = board.board[row][col]
+                if piece is None:
+                    continue
+                colour = WHITE if piece.player == Player.WHITE else BLACK
+                bit = 1 << (row * BOARD_SIZE + col)
+                bitboard.pieces[colour][PIECE_TYPES.index(type(piece))] |= bit
+                bitboard.occupancy[colour] |= bit
+        if board.en_passant_square is not None:
+            bitboard.en_passant = square_index(board.en_passant_square)
+        return bitboard
+
+    def to_board(self):
+        """
+        Builds a `Board` holding the same position as this bitboard.
+        """
+        board = Board.empty()
+        board.current_player = self.current_player
+        board.turn = self.turn
+        board.castling_rights = self.castling_rights
+        board.halfmove_clock = self.halfmove_clock
+        for colour, player in ((WHITE, Player.WHITE), (BLACK, Player.BLACK)):
+            for piece_type, piece_class in enumerate(PIECE_TYPES):
+                for index in iterate_bits(self.pieces[colour][piece_type]):
+                    board.set_piece(SQUARES[index], piece_class.shared(player))
+        if self.en_passant is not None:
+            board.en_passant_square = SQUARES[self.en_passant]
+        return board
+
+    def get_piece_type(self, index):
+        """
+        Returns the (colour, piece type) on the given square index, or None if it is empty.
+        """
+        bit = 1 << index
+        for colour in (WHITE, BLACK):
+            if self.occupancy[colour] & bit:
+                for piece_type, bitboard in enumerate(self.pieces[colour]):
+                    if bitboard & bit:
+                        return colour, piece_type
+        return None
+
+    def attacks_from(self, index):
+        """
+        A bitboard of all squares the piece on the given square index can move to, ignoring checks.
+        """
+        colour, piece_type = self.get_piece_type(index)
+        own = self.occupancy[colour]
+        occupied = own | self.occupancy[1 - colour]
+        if piece_type == PAWN:
+            return self._pawn_moves(index, colour, occupied)
+        if piece_type == KNIGHT:
+            return KNIGHT_ATTACKS[index] & ~own
+        if piece_type == BISHOP:
+            return bishop_attacks(index, occupied) & ~own
+        if piece_type == ROOK:
+            return rook_attacks(index, occupied) & ~own
+        if piece_type == QUEEN:
+            return queen_attacks(index, occupied) & ~own
+        return KING_ATTACKS[index] & ~own
+
+    def _pawn_moves(self, index, colour, occupied):
+        empty = ~occupied & FULL
+        bit = 1 << index
+        if colour == WHITE:
+            single = (bit << 8) & empty
+            double = ((single & RANK_3) << 8) & empty
+        else:
+            single = (bit >> 8) & empty
+            double = ((single & RANK_6) >> 8) & empty
+        targets = self.occupancy[1 - colour]
+        # Only the side to move can capture en passant
+        if self.en_passant is not None and colour == (WHITE if self.current_player == Player.WHITE else BLACK):
+            targets |= 1 << self.en_passant
+        return single | double | (PAWN_ATTACKS[colour][index] & targets)
+
+    def get_available_moves(self, square):
+        """
+        Get all squares that the piece on the given square is allowed to move to.
+        """
+        return [SQUARES[index] for index in iterate_bits(self.attacks_from(square_index(square)))]
+
+    def generate_moves(self):
+        """
+        Yields every (from index, to index) pair available to the current player, ignoring checks.
+        """
+        colour = WHITE if self.current_player == Player.WHITE else BLACK
+        own = self.occupancy[colour]
+        enemy = self.occupancy[1 - colour]
+        occupied = own | enemy
+        empty = ~occupied & FULL
+        pieces = self.pieces[colour]
+
+        # Pawns are generated set-wise with shifts, then split back into individual moves
+        pawns = pieces[PAWN]
+        capture_targets = enemy if self.en_passant is None else enemy | (1 << self.en_passant)
+        if colour == WHITE:
+            single = (pawns << 8) & empty
+            double = ((single & RANK_3) << 8) & empty
+            left = ((pawns & ~FILE_A) << 7) & capture_targets
+            right = ((pawns & ~FILE_H) << 9) & capture_targets
+            shifts = ((single, 8), (double, 16), (left, 7), (right, 9))
+        else:
+            single = (pawns >> 8) & empty
+            double = ((single & RANK_6) >> 8) & empty
+            left = ((pawns & ~FILE_A) >> 9) & capture_targets
+            right = ((pawns & ~FILE_H) >> 7) & capture_targets
+            shifts = ((single, -8), (double, -16), (left, -9), (right, -7))
+        for targets, shift in shifts:
+            for to_index in iterate_bits(targets):
+                yield to_index - shift, to_index
+
+        for from_index in iterate_bits(pieces[KNIGHT]):
+            for to_index in iterate_bits(KNIGHT_ATTACKS[from_index] & ~own):
+                yield from_index, to_index
+        for from_index in iterate_bits(pieces[BISHOP]):
+            for to_index in iterate_bits(bishop_attacks(from_index, occupied) & ~own):
+                yield from_index, to_index
+        for from_index in iterate_bits(pieces[ROOK]):
+            for to_index in iterate_bits(rook_attacks(from_index, occupied) & ~own):
+                yield from_index, to_index
+        for from_index in iterate_bits(pieces[QUEEN]):
+            for to_index in iterate_bits(queen_attacks(from_index, occupied) & ~own):
+                yield from_index, to_index
+        for from_index in iterate_bits(pieces[KING]):
+            for to_index in iterate_bits(KING_ATTACKS[from_index] & ~own):
+                yield from_index, to_index
@@ -1,22 +1,80 @@
 """
-A module providing a representation of a chess board. The rules of chess are not implemented - 
-this is just a "dumb" board that will let you move pieces around as you like.
+A module providing a representation of a chess board. `move_piece` will still let you move pieces around as
+you like, while `legal_moves` knows the full rules of chess for the player whose turn it is.
 """
 
-from chessington.engine.data import Player, Square
+from chessington.engine.data import Player, Square, Move, MoveRecord, ALL_CASTLING, WHITE_KINGSIDE, \
+    WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
 from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+from chessington.engine.tables import ROOK_RAYS, BISHOP_RAYS, QUEEN_RAYS, KNIGHT_MOVES, KING_MOVES, PAWN_ATTACKS, \
+    SQUARES
+from chessington.engine.evaluation import SQUARE_TERMS, compute_terms
+from chessington.engine.zobrist import PIECE_SQUARE_KEYS, state_key, compute_key
 
 BOARD_SIZE = 8
 
+PROMOTION_PIECES = (Queen, Rook, Bishop, Knight)
+SLIDING_RAYS = {Rook: ROOK_RAYS, Bishop: BISHOP_RAYS, Queen: QUEEN_RAYS}
+JUMPS = {Knight: KNIGHT_MOVES, King: KING_MOVES}
+
+# The castling rights that survive a move to or from each square. Moving the king or a rook, or capturing a
+# rook on its starting square, loses the corresponding rights.
+CASTLING_MASKS = [[ALL_CASTLING] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+CASTLING_MASKS[0][0] = ALL_CASTLING & ~WHITE_QUEENSIDE
+CASTLING_MASKS[0][4] = ALL_CASTLING & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+CASTLING_MASKS[0][7] = ALL_CASTLING & ~WHITE_KINGSIDE
+CASTLING_MASKS[7][0] = ALL_CASTLING & ~BLACK_QUEENSIDE
+CASTLING_MASKS[7][4] = ALL_CASTLING & ~(BLACK_KINGSIDE | BLACK_QUEENSIDE)
+CASTLING_MASKS[7][7] = ALL_CASTLING & ~BLACK_KINGSIDE
+
 class Board:
     """
     A representation of the chess board, and the pieces on it.
     """
 
+    # When set, incrementally maintained state is checked against a full recompute every time it is read
+    debug = False
+
     def __init__(self, player, board_state):
-        self.current_player = Player.WHITE
+        self.current_player = player
         self.board = board_state
         self.turn = 1
+        self.halfmove_clock = 0
+        self.undo_stack = []
+        self.castling_rights = 0
+        self.en_passant_square = None
+
+        # An optional TranspositionTable in which to cache generated move lists
+        self.transposition_table = None
+
+        # Squares attacked by each player, cached until the next change to the board
+        self._attack_maps = {}
+
+        # While changes are being tracked (see track_changes), the piece each changed square held before its first
+        # change
+        self._changes = None
+
+        # XOR of the Zobrist keys of every piece on its square
+        self._piece_key = 0
+
+        # Static evaluation terms, summed over every piece on its square (see evaluation.compute_terms)
+        self._material = 0
+        self._middlegame = 0
+        self._endgame = 0
+        self._phase = 0
+
+        # Index of the squares holding each player's pieces, and of where the kings are, so that we never need to
+        # scan the board. It is keyed by square because a shared piece (see Piece.shared) may be on many squares.
+        self._player_squares = {Player.WHITE: {}, Player.BLACK: {}}
+        self._king_squares = {}
+        # And of the square of each piece, by identity; a shared piece on several squares has a list of them
+        self._piece_squares = {}
+        for row, pieces in enumerate(self.board):
+            for col, piece in enumerate(pieces):
+                if piece is not None:
+                    self._index_piece(SQUARES[row][col], piece)
+                    self._piece_key ^= PIECE_SQUARE_KEYS[type(piece)][piece.player][row][col]
+                    self._add_terms(SQUARE_TERMS[type(piece)][piece.player][row][col], 1)
 
     @staticmethod
     def empty():
@@ -24,7 +82,9 @@ class Board:
 
     @staticmethod
     def at_starting_position():
-        return Board(Player.WHITE, Board._create_starting_board())
+        board = Board(Player.WHITE, Board._create_starting_board())
+        board.castling_rights = ALL_CASTLING
+        return board
 
     @staticmethod
     def _create_empty_board():
@@ -51,7 +111,43 @@ class Board:
         """
         Places the piece at the given position on the board.
         """
-        self.board[square.row][square.col] = piece
+        row, col = square.row, square.col
+        existing = self.board[row][col]
+        if self._changes is not None and square not in self._changes:
+            self._changes[square] = existing
+        if existing is not None:
+            self._unindex_piece(square, existing)
+            self._piece_key ^= PIECE_SQUARE_KEYS[type(existing)][existing.player][row][col]
+            self._add_terms(SQUARE_TERMS[type(existing)][existing.player][row][col], -1)
+        self.board[row][col] = piece
+        if piece is not None:
+            self._index_piece(square, piece)
+            self._piece_key ^= PIECE_SQUARE_KEYS[type(piece)][piece.player][row][col]
+            self._add_terms(SQUARE_TERMS[type(piece)][piece.player][row][col], 1)
+        self._attack_maps.clear()
+
+    def track_changes(self):
+        """
+        Starts recording which squares change, so that a display can redraw (or send) only those. See
+        `take_changes`.
+        """
+        self._changes = {}
+
+    def take_changes(self):
+        """
+        The squares whose contents have changed since changes were last taken (or started being tracked), each
+        with the piece now on it, or None. Squares that were changed and then put back, such as by a search making
+        and unmaking moves, are left out.
+        """
+        if self._changes is None:
+            raise ValueError('Changes are not being tracked; call track_changes first')
+        changes = {}
+        for square, before in self._changes.items():
+            after = self.board[square.row][square.col]
+            if not _same_piece(before, after):
+                changes[square] = after
+        self._changes = {}
+        return changes
 
     def get_piece(self, square):
         """
@@ -61,28 +157,359 @@ class Board:
 
     def find_piece(self, piece_to_find):
         """
-        Searches for the given piece on the board and returns its square.
+        Finds the square of the given piece on the board. Raises ValueError for a shared piece (see Piece.shared)
+        that is on more than one square, since it cannot tell which is meant.
         """
-        for row in range(BOARD_SIZE):
-            for col in range(BOARD_SIZE):
-                if self.board[row][col] is piece_to_find:
-                    return Square.at(row, col)
-        raise Exception('The supplied piece is not on the board')
+        square = self._piece_squares.get(piece_to_find)
+        if square is None:
+            raise Exception('The supplied piece is not on the board')
+        if type(square) is list:
+            raise ValueError('The supplied piece is shared by several squares; give its square instead')
+        return square
 
-    def move_piece(self, from_square, to_square):
+    def get_pieces(self, player):
+        """
+        Lists all of the given player's pieces that are currently on the board.
+        """
+        return list(self._player_squares[player].values())
+
+    @property
+    def zobrist_key(self):
+        """
+        A 64-bit hash of the position: piece placement, side to move, castling rights and en-passant file.
+        """
+        key = self._piece_key ^ state_key(self.current_player, self.castling_rights, self.en_passant_square)
+        if self.debug:
+            expected = compute_key(self)
+            assert key == expected, f'Incremental Zobrist key {key:#x} does not match recomputed key {expected:#x}'
+        return key
+
+    @property
+    def evaluation_terms(self):
+        """
+        The (material, middlegame, endgame, phase) terms of the static evaluation, from white's point of view.
+        """
+        terms = (self._material, self._middlegame, self._endgame, self._phase)
+        if self.debug:
+            expected = compute_terms(self)
+            assert terms == expected, f'Incremental evaluation terms {terms} do not match recomputed terms {expected}'
+        return terms
+
+    def _add_terms(self, terms, sign):
+        material, middlegame, endgame, phase = terms
+        self._material += sign * material
+        self._middlegame += sign * middlegame
+        self._endgame += sign * endgame
+        self._phase += sign * phase
+
+    def _index_piece(self, square, piece):
+        self._player_squares[piece.player][square] = piece
+        if type(piece) is King:
+            self._king_squares[piece.player] = square
+        squares = self._piece_squares.get(piece)
+        if squares is None:
+            self._piece_squares[piece] = square
+        elif type(squares) is list:
+            squares.append(square)
+        else:
+            self._piece_squares[piece] = [squares, square]
+
+    def _unindex_piece(self, square, piece):
+        del self._player_squares[piece.player][square]
+        if type(piece) is King and self._king_squares.get(piece.player) == square:
+            del self._king_squares[piece.player]
+        squares = self._piece_squares[piece]
+        if type(squares) is not list:
+            del self._piece_squares[piece]
+        else:
+            squares.remove(square)
+            if len(squares) == 1:
+                self._piece_squares[piece] = squares[0]
+
+    def move_piece(self, from_square, to_square, promotion=None):
         """
         Moves the piece from the given starting square to the given destination square.
         """
         moving_piece = self.get_piece(from_square)
         if moving_piece is not None and moving_piece.player == self.current_player:
-            if moving_piece.en_passant_possible(self, to_square):
-                target = Square.at(from_square.row, to_square.col)
-                self.set_piece(target, None)
-            self.set_piece(to_square, moving_piece)
-            self.set_piece(from_square, None)
-            self.current_player = self.current_player.opponent()
-
-        if moving_piece.turn_first_moved == 0:
-            moving_piece.turn_first_moved = self.turn
+            self.make_move(from_square, to_square, promotion)
+            return
 
+        # Any chance to capture en passant has passed
+        self.en_passant_square = None
         self.turn +=1
+
+    def make_move(self, from_square, to_square, promotion=None):
+        """
+        Moves the current player's piece from the given square to the destination square, and pushes a record
+        onto the undo stack so that the move can be taken back with `unmake_move`.
+
+        Castling is made by moving the king two squares, and a pawn reaching the far side of the board is
+        replaced by the given promotion piece (a queen by default).
+        """
+        moving_piece = self.get_piece(from_square)
+        captured_square = to_square
+        if moving_piece.en_passant_possible(self, to_square, from_square):
+            captured_square = Square.at(from_square.row, to_square.col)
+        captured = self.get_piece(captured_square)
+
+        record = MoveRecord(from_square, to_square, moving_piece, captured, captured_square, self.current_player,
+                            self.turn, self.castling_rights, self.en_passant_square, self.halfmove_clock,
+                            self.zobrist_key)
+        self.undo_stack.append(record)
+
+        if captured_square != to_square:
+            self.set_piece(captured_square, None)
+        placed_piece = moving_piece
+        if isinstance(moving_piece, Pawn) and (to_square.row == 0 or to_square.row == BOARD_SIZE - 1):
+            placed_piece = (promotion or Queen)(moving_piece.player)
+        self.set_piece(to_square, placed_piece)
+        self.set_piece(from_square, None)
+        if isinstance(moving_piece, King) and abs(to_square.col - from_square.col) == 2:
+            rook_from, rook_to = self._castling_rook_squares(to_square)
+            self.set_piece(rook_to, self.get_piece(rook_from))
+            self.set_piece(rook_from, None)
+
+        self.castling_rights &= CASTLING_MASKS[from_square.row][from_square.col] \
+            & CASTLING_MASKS[to_square.row][to_square.col]
+        self.en_passant_square = None
+        if isinstance(moving_piece, Pawn) and abs(to_square.row - from_square.row) == 2:
+            self.en_passant_square = Square.at((from_square.row + to_square.row) // 2, from_square.col)
+
+        # Moves since the last capture or pawn move, for the fifty-move rule
+        if captured is not None or isinstance(moving_piece, Pawn):
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+        self.current_player = self.current_player.opponent()
+        self.turn += 1
+        return record
+
+    def unmake_move(self):
+        """
+        Takes back the most recent move made with `make_move`, restoring the board exactly as it was before.
+        """
+        record = self.undo_stack.pop()
+        moving_piece = record.piece
+        if isinstance(moving_piece, King) and abs(record.to_square.col - record.from_square.col) == 2:
+            rook_from, rook_to = self._castling_rook_squares(record.to_square)
+            self.set_piece(rook_from, self.get_piece(rook_to))
+            self.set_piece(rook_to, None)
+        self.set_piece(record.to_square, None)
+        self.set_piece(record.from_square, moving_piece)
+        if record.captured is not None:
+            self.set_piece(record.captured_square, record.captured)
+
+        self.current_player = record.player
+        self.turn = record.turn
+        self.castling_rights = record.castling_rights
+        self.en_passant_square = record.en_passant_square
+        self.halfmove_clock = record.halfmove_clock
+        return record
+
+    def is_repetition(self):
+        """
+        Whether the position has already occurred since the last capture or pawn move, among the positions reached
+        with `make_move`.
+        """
+        key = self.zobrist_key
+        records = self.undo_stack
+        earliest = max(len(records) - self.halfmove_clock, 0)
+        # Only positions with the same player to move can match, so look back two moves at a time
+        for index in range(len(records) - 2, earliest - 1, -2):
+            if records[index].zobrist_key == key:
+                return True
+        return False
+
+    @staticmethod
+    def _castling_rook_squares(king_to_square):
+        row = king_to_square.row
+        if king_to_square.col == 6:
+            return Square.at(row, 7), Square.at(row, 5)
+        return Square.at(row, 0), Square.at(row, 3)
+
+    def find_king(self, player):
+        """
+        Returns the given player's king, or None if they do not have one on the board.
+        """
+        square = self._king_squares.get(player)
+        return self.board[square.row][square.col] if square is not None else None
+
+    def attacked_squares(self, player):
+        """
+        The set of squares attacked by the given player's pieces. Sliding attacks continue through the opposing
+        king, so that the king cannot escape a check by stepping back along the line of attack.
+
+        The result is cached until the board next changes.
+        """
+        attacks = self._attack_maps.get(player)
+        if attacks is not None:
+            return attacks
+
+        attacks = set()
+        for square, piece in self._player_squares[player].items():
+            piece_type = type(piece)
+            if piece_type is Pawn:
+                attacks.update(PAWN_ATTACKS[player][square.row][square.col])
+            elif piece_type in JUMPS:
+                attacks.update(JUMPS[piece_type][square.row][square.col])
+            else:
+                for ray in SLIDING_RAYS[piece_type][square.row][square.col]:
+                    for target in ray:
+                        attacks.add(target)
+                        blocker = self.board[target.row][target.col]
+                        if blocker is not None and not (type(blocker) is King and blocker.player != player):
+                            break
+
+        self._attack_maps[player] = attacks
+        return attacks
+
+    def is_attacked(self, square, by_player):
+        """
+        Whether any of the given player's pieces attack the square, looking outwards from the square itself.
+        """
+        row, col = square.row, square.col
+        for jumps, piece_type in ((KNIGHT_MOVES, Knight), (KING_MOVES, King),
+                                  (PAWN_ATTACKS[by_player.opponent()], Pawn)):
+            for source in jumps[row][col]:
+                piece = self.board[source.row][source.col]
+                if type(piece) is piece_type and piece.player == by_player:
+                    return True
+        for rays, piece_types in ((ROOK_RAYS, (Rook, Queen)), (BISHOP_RAYS, (Bishop, Queen))):
+            for ray in rays[row][col]:
+                for source in ray:
+                    piece = self.board[source.row][source.col]
+                    if piece is not None:
+                        if type(piece) in piece_types and piece.player == by_player:
+                            return True
+                        break
+        return False
+
+    def in_check(self):
+        """
+        Whether the current player's king is under attack.
+        """
+        king_square = self._king_squares.get(self.current_player)
+        if king_square is None:
+            return False
+        return king_square in self.attacked_squares(self.current_player.opponent())
+
+    def legal_moves(self):
+        """
+        Generates every legal move for the current player, taking account of check, pins, castling, en passant
+        and promotion.
+
+        Rather than trying each move and testing for check, the opponent's attacked squares, the pieces giving
+        check and any pinned pieces are worked out once up front, and the moves filtered against them.
+
+        If the board has a transposition table, move lists are cached there by position key.
+        """
+        table = self.transposition_table
+        if table is not None:
+            key = self.zobrist_key
+            moves = table.get_moves(key)
+            if moves is None:
+                moves = self._generate_legal_moves()
+                table.store_moves(key, moves)
+            return list(moves)
+        return self._generate_legal_moves()
+
+    def _generate_legal_moves(self):
+        player = self.current_player
+        opponent = player.opponent()
+        king_square = self._king_squares.get(player)
+
+        checkers = []
+        block_squares = None
+        pins = {}
+        if king_square is not None:
+            attacked = self.attacked_squares(opponent)
+            checkers, block_squares, pins = self._checks_and_pins(player, king_square)
+
+        moves = []
+        for from_square, piece in list(self._player_squares[player].items()):
+            if from_square == king_square:
+                for to_square in piece.get_available_moves(self, from_square):
+                    if to_square in attacked:
+                        continue
+                    if abs(to_square.col - from_square.col) == 2:
+                        crossed = Square.at(from_square.row, (from_square.col + to_square.col) // 2)
+                        if checkers or crossed in attacked:
+                            continue
+                    moves.append(Move(from_square, to_square))
+                continue
+
+            # Only the king can get out of a double check
+            if len(checkers) > 1:
+                continue
+
+            is_pawn = type(piece) is Pawn
+            pin = pins.get(from_square)
+            for to_square in piece.get_available_moves(self, from_square):
+                if pin is not None and to_square not in pin:
+                    continue
+                if is_pawn and to_square.col != from_square.col and self.board[to_square.row][to_square.col] is None:
+                    # En passant removes a piece from a square the pin and check tests know nothing about
+                    if king_square is not None and not self._en_passant_is_legal(from_square, to_square, king_square):
+                        continue
+                elif checkers and to_square not in block_squares:
+                    continue
+
+                if is_pawn and (to_square.row == 0 or to_square.row == BOARD_SIZE - 1):
+                    moves.extend(Move(from_square, to_square, promotion) for promotion in PROMOTION_PIECES)
+                else:
+                    moves.append(Move(from_square, to_square))
+        return moves
+
+    def _checks_and_pins(self, player, king_square):
+        """
+        Finds the squares of pieces giving check, the squares on which a check can be captured or blocked, and
+        a map from the square of each pinned piece to the squares it may still move to.
+        """
+        row, col = king_square.row, king_square.col
+        checkers = []
+        block_squares = set()
+        pins = {}
+
+        for rays, sliders in ((ROOK_RAYS, (Rook, Queen)), (BISHOP_RAYS, (Bishop, Queen))):
+            for ray in rays[row][col]:
+                own_square = None
+                for distance, square in enumerate(ray):
+                    piece = self.board[square.row][square.col]
+                    if piece is None:
+                        continue
+                    if piece.player == player:
+                        if own_square is not None:
+                            break
+                        own_square = square
+                        continue
+                    if type(piece) in sliders:
+                        line = ray[:distance + 1]
+                        if own_square is None:
+                            checkers.append(square)
+                            block_squares.update(line)
+                        else:
+                            pins[own_square] = set(line)
+                    break
+
+        for jumps, piece_type in ((KNIGHT_MOVES, Knight), (PAWN_ATTACKS[player], Pawn)):
+            for square in jumps[row][col]:
+                piece = self.board[square.row][square.col]
+                if type(piece) is piece_type and piece.player != player:
+                    checkers.append(square)
+                    block_squares.add(square)
+
+        return checkers, block_squares, pins
+
+    def _en_passant_is_legal(self, from_square, to_square, king_square):
+        self.make_move(from_square, to_square)
+        legal = not self.is_attacked(king_square, self.current_player)
+        self.unmake_move()
+        return legal
+
+
+def _same_piece(piece, other):
+    # Pieces are interchangeable if they are of the same kind and belong to the same player
+    if piece is None or other is None:
+        return piece is other
+    return piece is other or (type(piece) is type(other) and piece.player == other.player)
@@ -0,0 +1,222 @@
+"""
+An opening book: the moves played from well-known positions, so that the engine can play them straight away
+instead of searching.
+
+A book file holds fixed-size records sorted by the Zobrist key of the position, each giving one move from the
+position, a weight and the number of games it was played in. `OpeningBook` memory-maps the file and finds a
+position's moves by binary search, so looking a position up takes microseconds and reads only a few pages of the
+file however large it is. Keys are this engine's own Zobrist keys, so book files are not interchangeable with
+other engines' (such as Polyglot) books.
+
+Build a book from PGN files with `poetry run book build games.pgn --output book.bin`.
+"""
+
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+from collections import defaultdict
+
+from chessington.engine.data import Move, Player
+from chessington.engine.fen import board_from_fen, move_to_uci
+from chessington.engine.pgn import read_games, parse_san
+from chessington.engine.pieces import Knight, Bishop, Rook, Queen
+from chessington.engine.tables import SQUARES
+
+FILE_MAGIC = b'CHOB'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')
+
+# Position key, move, weight, number of games
+ENTRY_FORMAT = struct.Struct('<QHHI')
+ENTRY_BYTES = ENTRY_FORMAT.size
+_KEY_FORMAT = struct.Struct('<Q')
+
+DEFAULT_PLIES = 20
+DEFAULT_MIN_GAMES = 1
+MAX_WEIGHT = 0xFFFF
+
+# Weights for the side that played the move: a win counts twice a draw, a loss not at all
+_RESULT_WEIGHTS = {
+    '1-0': {Player.WHITE: 2, Player.BLACK: 0},
+    '0-1': {Player.WHITE: 0, Player.BLACK: 2},
+    '1/2-1/2': {Player.WHITE: 1, Player.BLACK: 1},
+}
+_UNKNOWN_RESULT_WEIGHTS = {Player.WHITE: 1, Player.BLACK: 1}
+
+# Moves are packed as the from square (bits 0-5), the to square (bits 6-11) and the promotion (bits 12-14)
+PROMOTION_CODES = {None: 0, Knight: 1, Bishop: 2, Rook: 3, Queen: 4}
+_PROMOTIONS_BY_CODE = {code: piece_type for piece_type, code in PROMOTION_CODES.items()}
+
+
+def encode_move(move):
+    from_index = move.from_square.row * 8 + move.from_square.col
+    to_index = move.to_square.row * 8 + move.to_square.col
+    return from_index | to_index << 6 | PROMOTION_CODES[move.promotion] << 12
+
+
+def decode_move(code):
+    from_row, from_col = divmod(code & 0x3F, 8)
+    to_row, to_col = divmod(code >> 6 & 0x3F, 8)
+    return Move(SQUARES[from_row][from_col], SQUARES[to_row][to_col], _PROMOTIONS_BY_CODE[code >> 12 & 0x7])
+
+
+def build_book(games, path, plies=DEFAULT_PLIES, min_games=DEFAULT_MIN_GAMES):
+    """
+    Writes a book of the first `plies` moves of each of the games (an iterable of pgn.Game), leaving out moves
+    played in fewer than `min_games` games. Games with illegal moves are used up to the first illegal move.
+    Returns the number of entries written.
+    """
+    # (key, move) -> [weight, games]
+    counts = defaultdict(lambda: [0, 0])
+    for game in games:
+        weights = _RESULT_WEIGHTS.get(game.result, _UNKNOWN_RESULT_WEIGHTS)
+        try:
+            board = game.starting_board()
+            for san in game.san_moves()[:plies]:
+                move = parse_san(board, san)
+                entry = counts[board.zobrist_key, encode_move(move)]
+                entry[0] += weights[board.current_player]
+                entry[1] += 1
+                board.move_piece(move.from_square, move.to_square, move.promotion)
+        except ValueError:
+            continue
+
+    entries = [(key, move, weight, played) for (key, move), (weight, played) in counts.items() if played >= min_games]
+    # Sorted by key, and then best move first within a position
+    entries.sort(key=lambda entry: (entry[0], -entry[2], -entry[3], entry[1]))
+    with open(path, 'wb') as file:
+        file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, ENTRY_BYTES))
+        for key, move, weight, played in entries:
+            file.write(ENTRY_FORMAT.pack(key, move, min(weight, MAX_WEIGHT), played))
+    return len(entries)
+
+
+class OpeningBook:
+    """
+    A read-only, memory-mapped opening book, as written by `build_book`. Close it (or use it as a context
+    manager) when done.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < FILE_HEADER.size:
+                raise ValueError(f'{path} is not an opening book')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        magic, version, entry_bytes = FILE_HEADER.unpack_from(self._map)
+        if magic != FILE_MAGIC or version != FILE_VERSION or entry_bytes != ENTRY_BYTES:
+            self.close()
+            raise ValueError(f'{path} is not a version {FILE_VERSION} opening book')
+        if (size - FILE_HEADER.size) % ENTRY_BYTES:
+            self.close()
+            raise ValueError(f'{path} ends part way through an entry')
+        self._count = (size - FILE_HEADER.size) // ENTRY_BYTES
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def _key_at(self, index):
+        return _KEY_FORMAT.unpack_from(self._map, FILE_HEADER.size + index * ENTRY_BYTES)[0]
+
+    def entries(self, board):
+        """
+        The book's (move, weight, games) entries for the board's position, best first. Moves that are not legal
+        on the board, which can only come from a hash collision, are left out.
+        """
+        key = board.zobrist_key
+
+        # Find the first entry with the key
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+
+        entries = []
+        legal_moves = None
+        offset = FILE_HEADER.size + low * ENTRY_BYTES
+        end = FILE_HEADER.size + self._count * ENTRY_BYTES
+        while offset < end:
+            entry_key, code, weight, played = ENTRY_FORMAT.unpack_from(self._map, offset)
+            if entry_key != key:
+                break
+            if legal_moves is None:
+                legal_moves = board.legal_moves()
+            move = decode_move(code)
+            if move in legal_moves:
+                entries.append((move, weight, played))
+            offset += ENTRY_BYTES
+        return entries
+
+    def best_move(self, board):
+        """
+        The book move with the highest weight for the position, or None if the position is not in the book.
+        """
+        entries = self.entries(board)
+        return entries[0][0] if entries else None
+
+    def choose_move(self, board, rng=random):
+        """
+        A book move for the position chosen at random in proportion to the weights, or None if the position is
+        not in the book (or has no move with any weight).
+        """
+        entries = [(move, weight) for move, weight, _ in self.entries(board) if weight > 0]
+        if not entries:
+            return None
+        moves, weights = zip(*entries)
+        return rng.choices(moves, weights)[0]
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+
+def main(argv=None):
+    """Build or query an opening book from the command line."""
+    parser = argparse.ArgumentParser(description='Build or query an opening book.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    build = commands.add_parser('build', help='build a book from PGN files')
+    build.add_argument('pgn', nargs='+', help='PGN files of games to learn from')
+    build.add_argument('--output', required=True, help='book file to write')
+    build.add_argument('--plies', type=int, default=DEFAULT_PLIES,
+                       help=f'how many moves of each game to use (default: {DEFAULT_PLIES})')
+    build.add_argument('--min-games', type=int, default=DEFAULT_MIN_GAMES,
+                       help=f'leave out moves played in fewer games than this (default: {DEFAULT_MIN_GAMES})')
+
+    probe = commands.add_parser('probe', help='list the book moves for a position')
+    probe.add_argument('book', help='book file to read')
+    probe.add_argument('fen', help='the position, as a FEN string')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        games = (game for path in args.pgn for game in read_games(path))
+        count = build_book(games, args.output, args.plies, args.min_games)
+        print(f'Wrote {count} entries to {args.output}')
+    else:
+        with OpeningBook(args.book) as book:
+            for move, weight, played in book.entries(board_from_fen(args.fen)):
+                print(f'{move_to_uci(move)}  weight {weight}  games {played}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
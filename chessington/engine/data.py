@@ -11,6 +11,9 @@ class Player(Enum):
     WHITE = auto()
     BLACK = auto()
 
+    # Players are singletons, so hashing by identity is safe, and much cheaper than Enum's name-based hash
+    __hash__ = object.__hash__
+
     def opponent(self):
         if self == Player.WHITE: return Player.BLACK
         else: return Player.WHITE
@@ -18,6 +21,8 @@ class Player(Enum):
 
 @dataclass(frozen=True)
 class Square:
+    __slots__ = ('row', 'col')
+
     row: int
     col: int
 
@@ -26,7 +31,55 @@ class Square:
         """
         Provides backward compatibility with previous namedtuple implementation.
 
-        Square.at(...) is equivalent to Square(...).
+        Square.at(...) is equivalent to Square(...), but squares on the board are only ever created once, and
+        the same object is returned every time.
         """
-
+        if 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE and cls is Square:
+            return _SQUARES[row][col]
         return cls(row=row, col=col)
+
+
+BOARD_SIZE = 8
+_SQUARES = [[Square(row=row, col=col) for col in range(BOARD_SIZE)] for row in range(BOARD_SIZE)]
+
+
+# Castling rights are held as a bitmask of these flags
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+ALL_CASTLING = WHITE_KINGSIDE | WHITE_QUEENSIDE | BLACK_KINGSIDE | BLACK_QUEENSIDE
+KINGSIDE_CASTLING = {Player.WHITE: WHITE_KINGSIDE, Player.BLACK: BLACK_KINGSIDE}
+QUEENSIDE_CASTLING = {Player.WHITE: WHITE_QUEENSIDE, Player.BLACK: BLACK_QUEENSIDE}
+
+
+@dataclass(frozen=True)
+class Move:
+    """
+    A move from one square to another. Pawns reaching the far side of the board also say what they promote to.
+    """
+    from_square: Square
+    to_square: Square
+    promotion: type = None
+
+
+@dataclass(frozen=True)
+class MoveRecord:
+    """
+    Everything needed to take back a move made with Board.make_move.
+    """
+    __slots__ = ('from_square', 'to_square', 'piece', 'captured', 'captured_square', 'player', 'turn',
+                 'castling_rights', 'en_passant_square', 'halfmove_clock', 'zobrist_key')
+
+    from_square: Square
+    to_square: Square
+    piece: object
+    captured: object
+    captured_square: Square
+    player: Player
+    turn: int
+    castling_rights: int
+    en_passant_square: Square
+    halfmove_clock: int
+    # Of the position before the move, for spotting repetitions
+    zobrist_key: int
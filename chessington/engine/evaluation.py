@@ -0,0 +1,178 @@
+"""
+Static evaluation of a position: how good it looks for each side without searching any further, in
+centipawns (hundredths of a pawn).
+
+Scores are made up of material plus a piece-square table bonus for where each piece stands, using the
+values from https://www.chessprogramming.org/Simplified_Evaluation_Function. The tables differ between the
+middlegame and the endgame, and the two scores are blended according to how much material is left (the game
+phase).
+
+The Board keeps these terms up to date as pieces move, so `evaluate` does not need to look at every square.
+"""
+
+from chessington.engine.data import Player
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+
+PIECE_VALUES = {Pawn: 100, Knight: 320, Bishop: 330, Rook: 500, Queen: 900, King: 20000}
+
+# Tables are written as seen from white's side of the board, with the far (8th) rank on the first line
+PIECE_SQUARE_TABLES = {
+    Pawn: [
+        [0, 0, 0, 0, 0, 0, 0, 0],
+        [50, 50, 50, 50, 50, 50, 50, 50],
+        [10, 10, 20, 30, 30, 20, 10, 10],
+        [5, 5, 10, 25, 25, 10, 5, 5],
+        [0, 0, 0, 20, 20, 0, 0, 0],
+        [5, -5, -10, 0, 0, -10, -5, 5],
+        [5, 10, 10, -20, -20, 10, 10, 5],
+        [0, 0, 0, 0, 0, 0, 0, 0],
+    ],
+    Knight: [
+        [-50, -40, -30, -30, -30, -30, -40, -50],
+        [-40, -20, 0, 0, 0, 0, -20, -40],
+        [-30, 0, 10, 15, 15, 10, 0, -30],
+        [-30, 5, 15, 20, 20, 15, 5, -30],
+        [-30, 0, 15, 20, 20, 15, 0, -30],
+        [-30, 5, 10, 15, 15, 10, 5, -30],
+        [-40, -20, 0, 5, 5, 0, -20, -40],
+        [-50, -40, -30, -30, -30, -30, -40, -50],
+    ],
+    Bishop: [
+        [-20, -10, -10, -10, -10, -10, -10, -20],
+        [-10, 0, 0, 0, 0, 0, 0, -10],
+        [-10, 0, 5, 10, 10, 5, 0, -10],
+        [-10, 5, 5, 10, 10, 5, 5, -10],
+        [-10, 0, 10, 10, 10, 10, 0, -10],
+        [-10, 10, 10, 10, 10, 10, 10, -10],
+        [-10, 5, 0, 0, 0, 0, 5, -10],
+        [-20, -10, -10, -10, -10, -10, -10, -20],
+    ],
+    Rook: [
+        [0, 0, 0, 0, 0, 0, 0, 0],
+        [5, 10, 10, 10, 10, 10, 10, 5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [-5, 0, 0, 0, 0, 0, 0, -5],
+        [0, 0, 0, 5, 5, 0, 0, 0],
+    ],
+    Queen: [
+        [-20, -10, -10, -5, -5, -10, -10, -20],
+        [-10, 0, 0, 0, 0, 0, 0, -10],
+        [-10, 0, 5, 5, 5, 5, 0, -10],
+        [-5, 0, 5, 5, 5, 5, 0, -5],
+        [0, 0, 5, 5, 5, 5, 0, -5],
+        [-10, 5, 5, 5, 5, 5, 0, -10],
+        [-10, 0, 5, 0, 0, 0, 0, -10],
+        [-20, -10, -10, -5, -5, -10, -10, -20],
+    ],
+    King: [
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-30, -40, -40, -50, -50, -40, -40, -30],
+        [-20, -30, -30, -40, -40, -30, -30, -20],
+        [-10, -20, -20, -20, -20, -20, -20, -10],
+        [20, 20, 0, 0, 0, 0, 20, 20],
+        [20, 30, 10, 0, 0, 10, 30, 20],
+    ],
+}
+
+
+# In the endgame the king should come out to help, rather than hide behind its pawns
+ENDGAME_PIECE_SQUARE_TABLES = {
+    **PIECE_SQUARE_TABLES,
+    King: [
+        [-50, -40, -30, -20, -20, -30, -40, -50],
+        [-30, -20, -10, 0, 0, -10, -20, -30],
+        [-30, -10, 20, 30, 30, 20, -10, -30],
+        [-30, -10, 30, 40, 40, 30, -10, -30],
+        [-30, -10, 30, 40, 40, 30, -10, -30],
+        [-30, -10, 20, 30, 30, 20, -10, -30],
+        [-30, -30, 0, 0, 0, 0, -30, -30],
+        [-50, -30, -30, -30, -30, -30, -30, -50],
+    ],
+}
+
+# How much each piece counts towards the game phase, which runs from MAX_PHASE with all pieces on the board down
+# to 0 with only kings and pawns
+PHASE_WEIGHTS = {Pawn: 0, Knight: 1, Bishop: 1, Rook: 2, Queen: 4, King: 0}
+MAX_PHASE = 24
+
+
+def _square_scores(tables):
+    """Combined material and position score for each piece on each square, as board[row][col] lookups."""
+    scores = {}
+    for piece_type, table in tables.items():
+        value = PIECE_VALUES[piece_type]
+        scores[piece_type] = {
+            Player.WHITE: [[value + table[7 - row][col] for col in range(8)] for row in range(8)],
+            Player.BLACK: [[value + table[row][col] for col in range(8)] for row in range(8)],
+        }
+    return scores
+
+
+SQUARE_SCORES = _square_scores(PIECE_SQUARE_TABLES)
+ENDGAME_SQUARE_SCORES = _square_scores(ENDGAME_PIECE_SQUARE_TABLES)
+
+
+def _square_terms():
+    """
+    What each piece on each square adds to the (material, middlegame, endgame, phase) terms, with white's
+    pieces counting up and black's down.
+    """
+    terms = {}
+    for piece_type in PIECE_SQUARE_TABLES:
+        terms[piece_type] = {}
+        for player, sign in ((Player.WHITE, 1), (Player.BLACK, -1)):
+            terms[piece_type][player] = [
+                [(sign * PIECE_VALUES[piece_type], sign * SQUARE_SCORES[piece_type][player][row][col],
+                  sign * ENDGAME_SQUARE_SCORES[piece_type][player][row][col], PHASE_WEIGHTS[piece_type])
+                 for col in range(8)] for row in range(8)]
+    return terms
+
+
+SQUARE_TERMS = _square_terms()
+
+
+def piece_score(piece, square):
+    """
+    The middlegame value of the given piece standing on the given square, from its own player's point of view.
+    """
+    return SQUARE_SCORES[type(piece)][piece.player][square.row][square.col]
+
+
+def compute_terms(board):
+    """
+    Works out the (material, middlegame, endgame, phase) terms of the position from scratch, from white's point
+    of view.
+    """
+    material = middlegame = endgame = phase = 0
+    for row, pieces in enumerate(board.board):
+        for col, piece in enumerate(pieces):
+            if piece is not None:
+                piece_material, piece_middlegame, piece_endgame, piece_phase = \
+                    SQUARE_TERMS[type(piece)][piece.player][row][col]
+                material += piece_material
+                middlegame += piece_middlegame
+                endgame += piece_endgame
+                phase += piece_phase
+    return material, middlegame, endgame, phase
+
+
+def tapered_score(middlegame, endgame, phase):
+    """
+    Blends the middlegame and endgame scores according to the game phase.
+    """
+    phase = min(phase, MAX_PHASE)
+    return (middlegame * phase + endgame * (MAX_PHASE - phase)) // MAX_PHASE
+
+
+def evaluate(board):
+    """
+    Scores the position from the point of view of the player whose turn it is.
+    """
+    _, middlegame, endgame, phase = board.evaluation_terms
+    score = tapered_score(middlegame, endgame, phase)
+    return score if board.current_player == Player.WHITE else -score
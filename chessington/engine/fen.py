@@ -0,0 +1,198 @@
+"""
+Reading and writing positions in Forsyth-Edwards Notation (FEN), the standard one-line text format for a chess
+position, e.g. the starting position is
+
+    rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1
+
+The parser builds the board's rows directly out of shared piece instances (see `Piece.shared`) rather than placing
+new pieces one at a time, so that large files of positions can be loaded quickly. Use `read_fens` to stream boards
+from a file without holding them all in memory.
+"""
+
+from functools import lru_cache
+
+from chessington.engine.board import Board, BOARD_SIZE
+from chessington.engine.data import Move, Player, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, \
+    BLACK_QUEENSIDE
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+from chessington.engine.tables import SQUARES
+
+STARTING_FEN = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
+
+PIECE_LETTERS = {Pawn: 'p', Knight: 'n', Bishop: 'b', Rook: 'r', Queen: 'q', King: 'k'}
+CASTLING_LETTERS = ((WHITE_KINGSIDE, 'K'), (WHITE_QUEENSIDE, 'Q'), (BLACK_KINGSIDE, 'k'), (BLACK_QUEENSIDE, 'q'))
+FILES = 'abcdefgh'
+PROMOTION_LETTERS = {Queen: 'q', Rook: 'r', Bishop: 'b', Knight: 'n'}
+
+_PIECES_BY_LETTER = {
+    **{letter.upper(): (piece_type, Player.WHITE) for piece_type, letter in PIECE_LETTERS.items()},
+    **{letter: (piece_type, Player.BLACK) for piece_type, letter in PIECE_LETTERS.items()},
+}
+_CASTLING_BY_LETTER = {letter: flag for flag, letter in CASTLING_LETTERS}
+_PROMOTIONS_BY_LETTER = {letter: piece_type for piece_type, letter in PROMOTION_LETTERS.items()}
+
+
+def square_name(square):
+    """The algebraic name of a square, e.g. 'e4'."""
+    return FILES[square.col] + str(square.row + 1)
+
+
+def piece_letter(piece):
+    """The FEN letter for a piece: upper case for white and lower case for black."""
+    letter = PIECE_LETTERS[type(piece)]
+    return letter.upper() if piece.player == Player.WHITE else letter
+
+
+def parse_square(name):
+    """The square with the given algebraic name, e.g. 'e4'."""
+    if len(name) != 2 or name[0] not in FILES or name[1] not in '12345678':
+        raise ValueError(f'Invalid square name {name!r}')
+    return SQUARES[int(name[1]) - 1][FILES.index(name[0])]
+
+
+def move_to_uci(move):
+    """A move in UCI's long algebraic notation, e.g. 'e2e4' or 'e7e8q'."""
+    promotion = PROMOTION_LETTERS[move.promotion] if move.promotion is not None else ''
+    return square_name(move.from_square) + square_name(move.to_square) + promotion
+
+
+def parse_uci_move(board, text):
+    """
+    The legal move for the current player given in UCI's long algebraic notation. Raises ValueError if there
+    is no such legal move.
+    """
+    if len(text) not in (4, 5) or (len(text) == 5 and text[4] not in _PROMOTIONS_BY_LETTER):
+        raise ValueError(f'Invalid move {text!r}')
+    move = Move(parse_square(text[:2]), parse_square(text[2:4]), _PROMOTIONS_BY_LETTER.get(text[4:]))
+    if move not in board.legal_moves():
+        raise ValueError(f'Illegal move {text!r}')
+    return move
+
+
+@lru_cache(maxsize=4096)
+def _parse_rank(rank):
+    """The (piece type, player) or None on each square of a rank. The same ranks come up again and again."""
+    row = []
+    for char in rank:
+        if char in _PIECES_BY_LETTER:
+            row.append(_PIECES_BY_LETTER[char])
+        elif '1' <= char <= '8':
+            row.extend([None] * (ord(char) - ord('0')))
+        else:
+            raise ValueError(f'Invalid character {char!r} in rank {rank!r}')
+    if len(row) != BOARD_SIZE:
+        raise ValueError(f'Rank {rank!r} does not describe {BOARD_SIZE} squares')
+    return tuple(row)
+
+
+def _create_rank(rank):
+    return [piece[0].shared(piece[1]) if piece is not None else None for piece in _parse_rank(rank)]
+
+
+def board_from_fen(fen):
+    """
+    Builds a board from a FEN string. The move counters may be left off, as in EPD.
+    """
+    fields = fen.split()
+    if len(fields) == 4:
+        fields += ['0', '1']
+    if len(fields) != 6:
+        raise ValueError(f'FEN {fen!r} should have 6 fields')
+    placement, side, castling, en_passant, halfmove_clock, fullmove_number = fields
+
+    ranks = placement.split('/')
+    if len(ranks) != BOARD_SIZE:
+        raise ValueError(f'FEN {fen!r} should describe {BOARD_SIZE} ranks')
+    # FEN lists the ranks from black's side of the board, while rows count up from white's
+    try:
+        board_state = [_create_rank(rank) for rank in reversed(ranks)]
+    except ValueError as error:
+        raise ValueError(f'{error} in FEN {fen!r}') from None
+
+    if side not in ('w', 'b'):
+        raise ValueError(f'Invalid side to move {side!r} in FEN {fen!r}')
+    player = Player.WHITE if side == 'w' else Player.BLACK
+    board = Board(player, board_state)
+
+    if castling != '-':
+        # Each letter at most once, in the order KQkq
+        if ''.join(letter for _, letter in CASTLING_LETTERS if letter in castling) != castling:
+            raise ValueError(f'Invalid castling rights {castling!r} in FEN {fen!r}')
+        for letter in castling:
+            board.castling_rights |= _CASTLING_BY_LETTER[letter]
+    if en_passant != '-':
+        try:
+            square = parse_square(en_passant)
+        except ValueError:
+            square = None
+        if square is None or not _just_double_pushed_over(board, square):
+            raise ValueError(f'Invalid en passant square {en_passant!r} in FEN {fen!r}')
+        board.en_passant_square = square
+
+    try:
+        board.halfmove_clock = int(halfmove_clock)
+        board.turn = 2 * (max(int(fullmove_number), 1) - 1) + (1 if player == Player.WHITE else 2)
+    except ValueError:
+        raise ValueError(f'Invalid move counters in FEN {fen!r}') from None
+
+    return board
+
+
+def _just_double_pushed_over(board, square):
+    """
+    Whether an opponent pawn could just have moved two squares forward over the square.
+    """
+    # The opponent's pawns move down the board if white is to move, and up it if black is
+    direction = -1 if board.current_player == Player.WHITE else 1
+    if square.row != (5 if board.current_player == Player.WHITE else 2):
+        return False
+    pawn = board.get_piece(SQUARES[square.row + direction][square.col])
+    return isinstance(pawn, Pawn) and pawn.player != board.current_player \
+        and board.get_piece(square) is None and board.get_piece(SQUARES[square.row - direction][square.col]) is None
+
+
+def board_to_fen(board):
+    """
+    Describes the board as a FEN string.
+    """
+    ranks = []
+    for row in reversed(board.board):
+        rank = ''
+        empty = 0
+        for piece in row:
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                rank += str(empty)
+                empty = 0
+            rank += piece_letter(piece)
+        if empty:
+            rank += str(empty)
+        ranks.append(rank)
+
+    side = 'w' if board.current_player == Player.WHITE else 'b'
+    castling = ''.join(letter for flag, letter in CASTLING_LETTERS if board.castling_rights & flag) or '-'
+    en_passant = square_name(board.en_passant_square) if board.en_passant_square is not None else '-'
+    fullmove_number = (board.turn + 1) // 2
+    return f'{"/".join(ranks)} {side} {castling} {en_passant} {board.halfmove_clock} {fullmove_number}'
+
+
+def read_fens(source):
+    """
+    Lazily yields a board for each FEN line in a file, given a path or an open text file. Blank lines and lines
+    starting with '#' are skipped, and anything after the sixth field (such as EPD operations) is ignored.
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source) as file:
+            yield from read_fens(file)
+        return
+
+    for line in source:
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = line.split(None, 6)
+        if not (len(fields) >= 6 and fields[4].isdigit() and fields[5].isdigit()):
+            fields = fields[:4]
+        yield board_from_fen(' '.join(fields[:6]))
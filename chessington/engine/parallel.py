@@ -0,0 +1,191 @@
+"""
+Parallel search across CPU cores. A single Python process can only use one core because of the GIL, so the
+moves at the root of the search are shared out across a pool of worker processes, each of which searches its
+moves as deep as it can within the limits.
+
+The pool is started once and reused for every search, and each worker keeps its own transposition table
+between searches. Positions are sent to workers in their compact binary encoding rather than as pickled Piece
+objects.
+"""
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+from chessington.engine.data import Move, Square
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+from chessington.engine.positions import encode_position, decode_position
+from chessington.engine.search import Searcher, SearchResult, MATE_SCORE, MATE_THRESHOLD, MAX_DEPTH
+from chessington.engine.transposition import TranspositionTable
+
+DEFAULT_WORKER_TABLE_BYTES = 16 * 1024 * 1024
+
+# How often to look at the stop event while waiting for the workers
+STOP_POLL_SECONDS = 0.005
+
+_PIECE_CODES = {Pawn: 'p', Knight: 'n', Bishop: 'b', Rook: 'r', Queen: 'q', King: 'k'}
+_PIECE_TYPES = {code: piece_type for piece_type, code in _PIECE_CODES.items()}
+
+
+def _encode_move(move):
+    promotion = _PIECE_CODES[move.promotion] if move.promotion is not None else ''
+    return (move.from_square.row, move.from_square.col, move.to_square.row, move.to_square.col, promotion)
+
+
+def _decode_move(encoded):
+    from_row, from_col, to_row, to_col, promotion = encoded
+    return Move(Square.at(from_row, from_col), Square.at(to_row, to_col), _PIECE_TYPES.get(promotion))
+
+
+# Each worker process keeps one searcher, and so one transposition table, for its whole life
+_worker_searcher = None
+
+
+def _initialise_worker(table_bytes, stop_event):
+    global _worker_searcher
+    table = TranspositionTable(table_bytes) if table_bytes else None
+    _worker_searcher = Searcher(transposition_table=table, stop_event=stop_event)
+
+
+def _search_root_move(state, encoded_move, max_depth, deadline, node_limit):
+    """
+    Searches a single root move, returning its (score, principal variation) at each completed depth and the
+    number of nodes searched. Nothing is searched if the deadline has already passed.
+    """
+    if deadline is not None and time.time() >= deadline:
+        return [], 0
+    board = decode_position(state)
+    move = _decode_move(encoded_move)
+    time_limit = max(0.0, deadline - time.time()) if deadline is not None else None
+
+    iterations = []
+
+    def record(result):
+        iterations.append((result.score, [_encode_move(pv_move) for pv_move in result.principal_variation]))
+
+    result = _worker_searcher.search(board, max_depth=max_depth, time_limit=time_limit, node_limit=node_limit,
+                                     on_iteration=record, root_moves=[move])
+    return iterations, result.nodes
+
+
+def _iteration_at(iterations, depth):
+    """A move's result at the given depth. A forced mate stops deepening early, but holds at any greater depth."""
+    if depth <= len(iterations):
+        return iterations[depth - 1]
+    if iterations and abs(iterations[-1][0]) >= MATE_THRESHOLD:
+        return iterations[-1]
+    return None
+
+
+class ParallelSearcher:
+    """
+    Searches for the best move using a pool of worker processes, one root move per task.
+
+    Splitting at the root means each move is searched with a full window, so there is less pruning than in a
+    single search, but every core is kept busy. Call `close` (or use as a context manager) to stop the pool.
+
+    As with `Searcher`, setting `stop_event` makes a search finish early with the best move found so far.
+
+    Workers are only sent the position, not the moves that led to it, so they cannot see repetitions of positions
+    from earlier in the game - only those that occur within their own search - and may walk into a draw by
+    repetition that a single `Searcher` would avoid.
+    """
+
+    def __init__(self, workers=None, max_depth=MAX_DEPTH, time_limit=None, node_limit=None,
+                 worker_table_bytes=DEFAULT_WORKER_TABLE_BYTES, stop_event=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.worker_table_bytes = worker_table_bytes
+        self.stop_event = stop_event
+        self._pool = None
+        self._worker_stop_event = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._worker_stop_event = multiprocessing.Event()
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_initialise_worker,
+                                             initargs=(self.worker_table_bytes, self._worker_stop_event))
+        return self._pool
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def clear(self):
+        """
+        Forgets everything the workers have learned, by shutting them down so that the next search starts new
+        workers with empty transposition tables.
+        """
+        self.close()
+
+    def search(self, board, max_depth=None, time_limit=None, node_limit=None):
+        """
+        Searches the board across the worker pool, returning the best move at the deepest depth that every root
+        move completed.
+        """
+        max_depth = max_depth if max_depth is not None else self.max_depth
+        time_limit = time_limit if time_limit is not None else self.time_limit
+        node_limit = node_limit if node_limit is not None else self.node_limit
+
+        start = time.perf_counter()
+        moves = board.legal_moves()
+        if not moves:
+            return SearchResult(None, -MATE_SCORE if board.in_check() else 0, 0)
+
+        state = encode_position(board)
+        deadline = time.time() + time_limit if time_limit is not None else None
+        move_node_limit = max(1, node_limit // len(moves)) if node_limit is not None else None
+        pool = self._get_pool()
+        self._worker_stop_event.clear()
+        futures = [pool.submit(_search_root_move, state, _encode_move(move), max_depth, deadline, move_node_limit)
+                   for move in moves]
+
+        # The workers cannot see our stop event or the deadline, so when either comes the moves not yet started
+        # are cancelled and the running ones are told to stop
+        pending = futures
+        while pending:
+            stopped = self.stop_event is not None and self.stop_event.is_set()
+            if stopped or (deadline is not None and time.time() >= deadline):
+                for future in pending:
+                    future.cancel()
+                self._worker_stop_event.set()
+                wait(pending)
+                break
+            timeout = STOP_POLL_SECONDS if self.stop_event is not None else None
+            if deadline is not None:
+                remaining = max(0.0, deadline - time.time())
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            pending = wait(pending, timeout=timeout).not_done
+
+        results = []
+        nodes = 0
+        for move, future in zip(moves, futures):
+            iterations, move_nodes = ([], 0) if future.cancelled() else future.result()
+            results.append((move, iterations))
+            nodes += move_nodes
+
+        # Only compare moves at a depth they have all reached; fall back to whichever moves got anywhere at all
+        depth = min(len(iterations) if _iteration_at(iterations, max_depth) is None else max_depth
+                    for _, iterations in results)
+        candidates = [(move, _iteration_at(iterations, max(depth, 1))) for move, iterations in results]
+        candidates = [(move, iteration) for move, iteration in candidates if iteration is not None]
+        seconds = time.perf_counter() - start
+        if not candidates:
+            return SearchResult(moves[0], 0, 0, nodes=nodes, seconds=seconds)
+
+        best_move, (score, principal_variation) = max(candidates, key=lambda candidate: candidate[1][0])
+        return SearchResult(best_move, score, max(depth, 1), [_decode_move(move) for move in principal_variation],
+                            nodes, seconds)
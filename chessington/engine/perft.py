@@ -0,0 +1,118 @@
+"""
+Perft ("performance test") counts the leaf nodes of the legal move tree to a fixed depth. Comparing the counts
+against published values checks the move generator is correct, and timing them measures its throughput.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+from chessington.engine.fen import board_from_fen
+
+DEFAULT_OUTPUT = 'perft_results.json'
+
+# Positions from https://www.chessprogramming.org/Perft_Results, with the node counts at depths 1, 2, 3...
+STANDARD_POSITIONS = [
+    ('start', 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1', [20, 400, 8902, 197281, 4865609]),
+    ('kiwipete', 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1', [48, 2039, 97862, 4085603]),
+    ('position3', '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1', [14, 191, 2812, 43238, 674624]),
+    ('position4', 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1', [6, 264, 9467, 422333]),
+    ('position5', 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8', [44, 1486, 62379, 2103487]),
+    ('position6', 'r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10',
+     [46, 2079, 89890, 3894594]),
+]
+
+def perft(board, depth):
+    """
+    Counts the positions reachable from the board in exactly `depth` moves.
+    """
+    moves = board.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+
+    nodes = 0
+    for move in moves:
+        board.make_move(move.from_square, move.to_square, move.promotion)
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth):
+    """
+    Perft split by the first move, for tracking down which move a wrong count comes from.
+    """
+    counts = {}
+    for move in board.legal_moves():
+        board.make_move(move.from_square, move.to_square, move.promotion)
+        counts[move] = perft(board, depth - 1)
+        board.unmake_move()
+    return counts
+
+
+def run_benchmark(max_depth, positions=STANDARD_POSITIONS):
+    """
+    Runs perft on each position at every depth up to `max_depth`, returning one result per position and depth.
+    """
+    results = []
+    for name, fen, expected_counts in positions:
+        for depth in range(1, max_depth + 1):
+            board = board_from_fen(fen)
+            start = time.perf_counter()
+            nodes = perft(board, depth)
+            seconds = time.perf_counter() - start
+            expected = expected_counts[depth - 1] if depth <= len(expected_counts) else None
+            results.append({
+                'position': name,
+                'depth': depth,
+                'nodes': nodes,
+                'expected': expected,
+                'correct': expected is None or nodes == expected,
+                'seconds': seconds,
+                'nodes_per_second': nodes / seconds if seconds > 0 else None,
+            })
+    return results
+
+
+def write_results(results, path):
+    """
+    Saves benchmark results as JSON, along with enough about the environment to compare runs between releases.
+    """
+    report = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+
+
+def main(argv=None):
+    """Run the perft benchmark from the command line."""
+    parser = argparse.ArgumentParser(description='Count move-generator leaf nodes and measure throughput.')
+    parser.add_argument('--depth', type=int, default=3, help='maximum depth to search (default: 3)')
+    parser.add_argument('--position', action='append', choices=[name for name, _, _ in STANDARD_POSITIONS],
+                        help='only run the named position (may be repeated)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help=f'JSON results file (default: {DEFAULT_OUTPUT})')
+    args = parser.parse_args(argv)
+
+    positions = [position for position in STANDARD_POSITIONS if not args.position or position[0] in args.position]
+    results = run_benchmark(args.depth, positions)
+
+    for result in results:
+        status = 'ok' if result['correct'] else f'FAIL (expected {result["expected"]})'
+        nps = result['nodes_per_second'] or 0
+        print(f'{result["position"]:<10} depth {result["depth"]}  {result["nodes"]:>10} nodes  '
+              f'{result["seconds"]:8.3f}s  {nps:>10.0f} nodes/s  {status}')
+
+    write_results(results, args.output)
+    return 0 if all(result['correct'] for result in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
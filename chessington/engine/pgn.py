@@ -0,0 +1,219 @@
+"""
+Reading games in Portable Game Notation (PGN), the standard text format for chess game databases, e.g.
+
+    [Event "Casual game"]
+    [White "Alice"]
+    [Black "Bob"]
+    [Result "1-0"]
+
+    1. e4 e5 2. Qh5 Nc6 3. Bc4 Nf6 4. Qxf7# 1-0
+
+`read_games` streams games one at a time from a file, memory-mapping it when given a path, so memory use stays
+flat however big the archive is. A game's moves are only parsed when they are asked for, and games rejected by
+a header filter are skipped without even decoding their move text.
+"""
+
+import mmap
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict
+
+from chessington.engine.board import Board
+from chessington.engine.fen import board_from_fen, parse_square, square_name, FILES
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+
+SAN_LETTERS = {Knight: 'N', Bishop: 'B', Rook: 'R', Queen: 'Q', King: 'K'}
+_PIECES_BY_SAN_LETTER = {letter: piece_type for piece_type, letter in SAN_LETTERS.items()}
+
+_HEADER = re.compile(r'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_SAN = re.compile(r'([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?')
+_TOKENS = re.compile(r'\{[^}]*\}|;[^\n]*|\$\d+|\(|\)|1-0|0-1|1/2-1/2|\*|\d+\.+|[^\s(){};$]+')
+_KINGSIDE_CASTLING = ('O-O', '0-0')
+_QUEENSIDE_CASTLING = ('O-O-O', '0-0-0')
+
+
+@dataclass
+class Game:
+    """
+    One game from a PGN file: its header tags and its move text, which is left unparsed until it is needed.
+    """
+    headers: Dict[str, str] = field(default_factory=dict)
+    movetext: str = ''
+
+    @property
+    def result(self):
+        return self.headers.get('Result', '*')
+
+    def starting_board(self):
+        """
+        The position the game starts from, which is the standard starting position unless a FEN tag says otherwise.
+        """
+        if 'FEN' in self.headers:
+            return board_from_fen(self.headers['FEN'])
+        return Board.at_starting_position()
+
+    def san_moves(self):
+        """
+        The moves of the main line in Standard Algebraic Notation, leaving out comments, variations and annotations.
+        """
+        moves = []
+        variation_depth = 0
+        for token in _TOKENS.findall(self.movetext):
+            if token == '(':
+                variation_depth += 1
+            elif token == ')':
+                variation_depth = max(variation_depth - 1, 0)
+            elif variation_depth == 0 and token[0] not in '{;$' and token not in RESULTS \
+                    and not (token[0].isdigit() and token.endswith('.')):
+                moves.append(token)
+        return moves
+
+    def replay(self, board=None):
+        """
+        Lazily plays through the game, yielding the board and the move just played after each move. The same
+        board object is updated in place each time. Raises ValueError on a move that is illegal or ambiguous.
+        """
+        board = board if board is not None else self.starting_board()
+        for san in self.san_moves():
+            move = parse_san(board, san)
+            board.move_piece(move.from_square, move.to_square, move.promotion)
+            yield board, move
+
+    def moves(self):
+        """
+        The moves of the main line.
+        """
+        return [move for _, move in self.replay()]
+
+
+def parse_san(board, san):
+    """
+    The legal move for the current player described by the given Standard Algebraic Notation, e.g. 'Nbd7'.
+    Raises ValueError if no legal move, or more than one, matches.
+    """
+    text = san.rstrip('+#!?')
+    if text in _KINGSIDE_CASTLING or text in _QUEENSIDE_CASTLING:
+        direction = 1 if text in _KINGSIDE_CASTLING else -1
+        candidates = [move for move in board.legal_moves()
+                      if type(board.get_piece(move.from_square)) is King
+                      and move.to_square.col - move.from_square.col == 2 * direction]
+    else:
+        match = _SAN.fullmatch(text)
+        if match is None:
+            raise ValueError(f'Invalid move {san!r}')
+        letter, from_file, from_rank, to_name, promotion = match.groups()
+        piece_type = _PIECES_BY_SAN_LETTER[letter] if letter else Pawn
+        to_square = parse_square(to_name)
+        promotion_type = _PIECES_BY_SAN_LETTER[promotion] if promotion else None
+        candidates = [move for move in board.legal_moves()
+                      if move.to_square == to_square
+                      and type(board.get_piece(move.from_square)) is piece_type
+                      and (from_file is None or move.from_square.col == FILES.index(from_file))
+                      and (from_rank is None or move.from_square.row == int(from_rank) - 1)
+                      and (promotion_type is None or move.promotion is promotion_type)]
+
+    if not candidates:
+        raise ValueError(f'Illegal move {san!r}')
+    if len(candidates) > 1:
+        # A promotion with no piece named is taken to be to a queen
+        queens = [move for move in candidates if move.promotion is Queen]
+        if len(queens) != 1:
+            raise ValueError(f'Ambiguous move {san!r}')
+        candidates = queens
+    return candidates[0]
+
+
+def move_to_san(board, move):
+    """
+    Describes a legal move for the current player in Standard Algebraic Notation, without check markers.
+    """
+    piece = board.get_piece(move.from_square)
+    if type(piece) is King and abs(move.to_square.col - move.from_square.col) == 2:
+        return _KINGSIDE_CASTLING[0] if move.to_square.col > move.from_square.col else _QUEENSIDE_CASTLING[0]
+
+    capture = board.get_piece(move.to_square) is not None or \
+        (type(piece) is Pawn and move.from_square.col != move.to_square.col)
+    if type(piece) is Pawn:
+        san = (FILES[move.from_square.col] + 'x' if capture else '') + square_name(move.to_square)
+        return san + ('=' + SAN_LETTERS[move.promotion] if move.promotion is not None else '')
+
+    # Name the file, rank or both of the moving piece if another of the same kind could reach the same square
+    rivals = [other.from_square for other in board.legal_moves()
+              if other.to_square == move.to_square and other.from_square != move.from_square
+              and type(board.get_piece(other.from_square)) is type(piece)]
+    disambiguation = ''
+    if rivals:
+        from_name = square_name(move.from_square)
+        if all(rival.col != move.from_square.col for rival in rivals):
+            disambiguation = from_name[0]
+        elif all(rival.row != move.from_square.row for rival in rivals):
+            disambiguation = from_name[1]
+        else:
+            disambiguation = from_name
+    return SAN_LETTERS[type(piece)] + disambiguation + ('x' if capture else '') + square_name(move.to_square)
+
+
+def read_games(source, accept=None):
+    """
+    Lazily yields each game in a PGN file, given a path, a memory map or an open file (text or binary).
+
+    If `accept` is given it is called with each game's headers, and games it returns False for are skipped
+    without reading their move text.
+    """
+    if isinstance(source, (str, bytes)) or hasattr(source, '__fspath__'):
+        with open(source, 'rb') as file:
+            # An empty file cannot be memory-mapped
+            if os.fstat(file.fileno()).st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from read_games(mapped, accept)
+        return
+
+    headers = {}
+    movetext = []
+    in_movetext = False
+    skipping = False
+    for line in _read_lines(source):
+        if line[:1] in ('[', b'['):
+            if in_movetext:
+                if not skipping:
+                    yield Game(headers, _join(movetext))
+                headers, movetext, in_movetext, skipping = {}, [], False, False
+            match = _HEADER.match(_decode(line))
+            if match is not None:
+                headers[match.group(1)] = re.sub(r'\\(.)', r'\1', match.group(2))
+            continue
+
+        if not in_movetext:
+            if not line.strip():
+                continue
+            in_movetext = True
+            skipping = accept is not None and not accept(headers)
+        if not skipping:
+            movetext.append(line)
+
+    if in_movetext:
+        if not skipping:
+            yield Game(headers, _join(movetext))
+    elif headers and (accept is None or accept(headers)):
+        yield Game(headers)
+
+
+def _read_lines(source):
+    # Memory maps are not iterable line by line, but every kind of source supports readline
+    while True:
+        line = source.readline()
+        if not line:
+            return
+        yield line
+
+
+def _decode(line):
+    return line.decode('utf-8', 'replace') if isinstance(line, bytes) else line
+
+
+def _join(lines):
+    return _decode(lines[0][:0].join(lines)) if lines else ''
@@ -4,22 +4,39 @@ Definitions of each of the different chess pieces.
 
 from abc import ABC, abstractmethod
 
-from chessington.engine.data import Player, Square
+from chessington.engine.data import Player, Square, KINGSIDE_CASTLING, QUEENSIDE_CASTLING
+from chessington.engine.tables import BETWEEN, ROOK_RAYS, BISHOP_RAYS, QUEEN_RAYS, KNIGHT_MOVES, KING_MOVES
 
 
 class Piece(ABC):
     """
     An abstract base class from which all pieces inherit.
+
+    A piece knows nothing but which player it belongs to - everything else about the game is kept on the board -
+    so boards built in bulk can share one instance of each piece between all of its squares (see `shared`).
     """
+    __slots__ = ('player',)
 
     def __init__(self, player):
         self.player = player
-        self.turn_first_moved = 0
+
+    @classmethod
+    def shared(cls, player):
+        """
+        The single shared instance of this kind of piece for the given player. `Board.find_piece` cannot tell
+        which square a shared piece on several squares is meant, so pass the square to `get_available_moves`
+        when using them.
+        """
+        piece = _SHARED_PIECES.get((cls, player))
+        if piece is None:
+            piece = _SHARED_PIECES[(cls, player)] = cls(player)
+        return piece
 
     @abstractmethod
-    def get_available_moves(self, board):
+    def get_available_moves(self, board, square=None):
         """
-        Get all squares that the piece is allowed to move to.
+        Get all squares that the piece is allowed to move to. The piece is looked up on the board unless its
+        square is given.
         """
         pass
 
@@ -45,50 +62,71 @@ class Piece(ABC):
         else:
             return piece.player
 
-    def obstructed_path(self, board, square):
-        current_square = board.find_piece(self)
-        target_square = square
-        check_square = board.find_piece(self)
-        row_add = 0
-        col_add = 0
-        if current_square.row > target_square.row:
-            row_add = -1
-        elif current_square.row < target_square.row:
-            row_add = +1
-        if current_square.col > target_square.col:
-            col_add = -1
-        elif current_square.col < target_square.col:
-            col_add = +1
-        for i in range(8):
-            check_square = square.at(check_square.row + row_add, check_square.col + col_add)
-            if target_square == check_square:
-                return False
-            if self.obstructed_colour(board, check_square) is not None:
+    def obstructed_path(self, board, square, current_square=None):
+        current_square = current_square if current_square is not None else board.find_piece(self)
+        between = BETWEEN[current_square.row][current_square.col][square.row][square.col]
+        if between is None:
+            return True
+        for check_square in between:
+            if board.get_piece(check_square) is not None:
                 return True
-        return True
+        return False
 
-    def en_passant_possible(self, board, square):
+    def sliding_moves(self, board, rays):
+        """
+        Walk each ray outwards from the piece, stopping at (and capturing) the first piece in the way.
+        """
+        moves = []
+        for ray in rays:
+            for square in ray:
+                piece = board.get_piece(square)
+                if piece is None:
+                    moves.append(square)
+                else:
+                    if piece.player != self.player:
+                        moves.append(square)
+                    break
+        return moves
+
+    def jump_moves(self, board, squares):
+        """
+        Keep each of the given squares unless it is occupied by one of our own pieces.
+        """
+        moves = []
+        for square in squares:
+            piece = board.get_piece(square)
+            if piece is None or piece.player != self.player:
+                moves.append(square)
+        return moves
+
+    def en_passant_possible(self, board, square, current_square=None):
         if not isinstance(self, Pawn):
             return False
-        current_square = board.find_piece(self)
-        target_square = square
-        piece_square = Square.at(current_square.row, target_square.col)
-        piece = board.get_piece(piece_square)
-        if isinstance(piece, Pawn):
-            if piece.turn_first_moved == board.turn - 1:
-                if piece.player != self.player:
-                    return True
-        return False
+        if square != board.en_passant_square or board.get_piece(square) is not None:
+            return False
+        current_square = current_square if current_square is not None else board.find_piece(self)
+        forward = 1 if self.player == Player.WHITE else -1
+        if square.row - current_square.row != forward or abs(square.col - current_square.col) != 1:
+            return False
+
+        # The pawn that has just advanced two squares, past the en passant square, sits level with us
+        piece = board.get_piece(Square.at(current_square.row, square.col))
+        return isinstance(piece, Pawn) and piece.player != self.player
+
+
+# Shared instances of each piece, created on first use
+_SHARED_PIECES = {}
 
 
 class Pawn(Piece):
     """
     A class representing a chess pawn.
     """
+    __slots__ = ()
 
-    def get_available_moves(self, board):
+    def get_available_moves(self, board, square=None):
 
-        current = board.find_piece(self)
+        current = square if square is not None else board.find_piece(self)
         row = current.row
         col = current.col
         possible_moves = []
@@ -112,19 +150,19 @@ class Pawn(Piece):
             capture_moves.append(Square.at(row + 1, col - 1))
             capture_moves = list(filter(lambda s: self.on_board(board, s), capture_moves))
             capture_moves = list(
-                filter(lambda s: self.obstructed_colour(board, s) is Player.BLACK or self.en_passant_possible(board, s),
+                filter(lambda s: self.obstructed_colour(board, s) is Player.BLACK or self.en_passant_possible(board, s, current),
                        capture_moves))
         else:
             capture_moves.append(Square.at(row - 1, col + 1))
             capture_moves.append(Square.at(row - 1, col - 1))
             capture_moves = list(filter(lambda s: self.on_board(board, s), capture_moves))
             capture_moves = list(
-                filter(lambda s: self.obstructed_colour(board, s) is Player.WHITE or self.en_passant_possible(board, s),
+                filter(lambda s: self.obstructed_colour(board, s) is Player.WHITE or self.en_passant_possible(board, s, current),
                        capture_moves))
 
         possible_moves.extend(capture_moves)
 
-        possible_moves = list(filter(lambda s: self.obstructed_path(board, s) is False, possible_moves))
+        possible_moves = list(filter(lambda s: self.obstructed_path(board, s, current) is False, possible_moves))
 
         return possible_moves
 
@@ -133,58 +171,70 @@ class Knight(Piece):
     """
     A class representing a chess knight.
     """
+    __slots__ = ()
 
-    def get_available_moves(self, board):
-        return []
+    def get_available_moves(self, board, square=None):
+        current = square if square is not None else board.find_piece(self)
+        return self.jump_moves(board, KNIGHT_MOVES[current.row][current.col])
 
 
 class Bishop(Piece):
     """
     A class representing a chess bishop.
     """
+    __slots__ = ()
 
-    def get_available_moves(self, board):
-        return []
+    def get_available_moves(self, board, square=None):
+        current = square if square is not None else board.find_piece(self)
+        return self.sliding_moves(board, BISHOP_RAYS[current.row][current.col])
 
 
 class Rook(Piece):
     """
     A class representing a chess rook.
     """
+    __slots__ = ()
 
-    def get_available_moves(self, board):
-
-        current = board.find_piece(self)
-        row = current.row
-        col = current.col
-        possible_moves = []
-
-        for i in range(8):
-            possible_moves.append(Square.at(i, col))
-
-        for i in range(8):
-            possible_moves.append(Square.at(row, i))
-
-        possible_moves = list(filter(lambda s: self.on_board(board, s), possible_moves))
-        possible_moves = list(filter(lambda s: self.obstructed_colour(board, s) is not self.player, possible_moves))
-        possible_moves = list(filter(lambda s: not self.obstructed_path(board, s), possible_moves))
-
-        return possible_moves
+    def get_available_moves(self, board, square=None):
+        current = square if square is not None else board.find_piece(self)
+        return self.sliding_moves(board, ROOK_RAYS[current.row][current.col])
 
 
 class Queen(Piece):
     """
     A class representing a chess queen.
     """
+    __slots__ = ()
 
-    def get_available_moves(self, board):
-        return []
+    def get_available_moves(self, board, square=None):
+        current = square if square is not None else board.find_piece(self)
+        return self.sliding_moves(board, QUEEN_RAYS[current.row][current.col])
 
 
 class King(Piece):
     """
     A class representing a chess king.
     """
-
-    def get_available_moves(self, board):
-        return []
+    __slots__ = ()
+
+    def get_available_moves(self, board, square=None):
+        current = square if square is not None else board.find_piece(self)
+        moves = self.jump_moves(board, KING_MOVES[current.row][current.col])
+        home_row = 0 if self.player == Player.WHITE else 7
+        if current != Square.at(home_row, 4):
+            return moves
+
+        # Castling - whether the king would pass through check is left to Board.legal_moves
+        if board.castling_rights & KINGSIDE_CASTLING[self.player] \
+                and self.castling_path_clear(board, home_row, 7, (5, 6)):
+            moves.append(Square.at(home_row, 6))
+        if board.castling_rights & QUEENSIDE_CASTLING[self.player] \
+                and self.castling_path_clear(board, home_row, 0, (1, 2, 3)):
+            moves.append(Square.at(home_row, 2))
+        return moves
+
+    def castling_path_clear(self, board, row, rook_col, empty_cols):
+        rook = board.get_piece(Square.at(row, rook_col))
+        if not isinstance(rook, Rook) or rook.player != self.player:
+            return False
+        return all(board.get_piece(Square.at(row, col)) is None for col in empty_cols)
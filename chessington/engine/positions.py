@@ -0,0 +1,175 @@
+"""
+A compact fixed-width binary encoding of a position, and an on-disk store of encoded positions.
+
+Each position takes 36 bytes: 32 bytes holding a 4-bit piece code for each square, two at a time starting from
+a1, followed by two little-endian 16-bit words. The first packs the side to move (bit 0), the castling rights
+(bits 1-4), the en-passant file plus one, or zero (bits 5-8), and the halfmove clock (bits 9-15, capped at 127).
+The second holds the turn number.
+
+A `PositionStore` memory-maps a file of such records, so any position can be read without loading the rest.
+"""
+
+import mmap
+import os
+import struct
+
+from chessington.engine.board import Board, BOARD_SIZE
+from chessington.engine.data import Player
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+from chessington.engine.tables import SQUARES
+
+POSITION_FORMAT = struct.Struct('<32sHH')
+POSITION_BYTES = POSITION_FORMAT.size
+
+FILE_MAGIC = b'CHPS'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')
+
+MAX_HALFMOVE_CLOCK = 127
+MAX_TURN = 0xFFFF
+
+# Piece codes: 0 is an empty square, 1-6 a white piece, and the same with bit 3 set for a black piece
+PIECE_TYPES = (Pawn, Knight, Bishop, Rook, Queen, King)
+BLACK_BIT = 8
+_PIECE_CODES = {piece_type: code for code, piece_type in enumerate(PIECE_TYPES, 1)}
+_PIECES_BY_CODE = [None] * 16
+for _piece_type, _code in _PIECE_CODES.items():
+    _PIECES_BY_CODE[_code] = (_piece_type, Player.WHITE)
+    _PIECES_BY_CODE[_code | BLACK_BIT] = (_piece_type, Player.BLACK)
+
+# Both pieces described by each possible byte of the placement
+_PIECES_BY_BYTE = [(_PIECES_BY_CODE[byte & 0xF], _PIECES_BY_CODE[byte >> 4]) for byte in range(256)]
+
+
+def encode_position(board):
+    """
+    Packs the board into POSITION_BYTES bytes.
+    """
+    codes = []
+    for pieces in board.board:
+        for piece in pieces:
+            if piece is None:
+                codes.append(0)
+            else:
+                code = _PIECE_CODES[type(piece)]
+                codes.append(code if piece.player == Player.WHITE else code | BLACK_BIT)
+    placement = bytes(codes[index] | codes[index + 1] << 4 for index in range(0, len(codes), 2))
+
+    en_passant = board.en_passant_square.col + 1 if board.en_passant_square is not None else 0
+    flags = (board.current_player == Player.BLACK) | board.castling_rights << 1 | en_passant << 5 \
+        | min(board.halfmove_clock, MAX_HALFMOVE_CLOCK) << 9
+    return POSITION_FORMAT.pack(placement, flags, min(board.turn, MAX_TURN))
+
+
+def decode_position(data):
+    """
+    Rebuilds a board from the bytes made by `encode_position`. Any bytes-like object will do, such as a slice of
+    a memory map.
+    """
+    placement, flags, turn = POSITION_FORMAT.unpack(data)
+    board_state = [[None] * BOARD_SIZE for _ in range(BOARD_SIZE)]
+    for index, byte in enumerate(placement):
+        if byte:
+            row, col = divmod(2 * index, BOARD_SIZE)
+            for offset, piece in enumerate(_PIECES_BY_BYTE[byte]):
+                if piece is not None:
+                    board_state[row][col + offset] = piece[0].shared(piece[1])
+
+    player = Player.BLACK if flags & 1 else Player.WHITE
+    board = Board(player, board_state)
+    board.castling_rights = flags >> 1 & 0xF
+    en_passant = flags >> 5 & 0xF
+    if en_passant:
+        board.en_passant_square = SQUARES[5 if player == Player.WHITE else 2][en_passant - 1]
+    board.halfmove_clock = flags >> 9
+    board.turn = turn
+    return board
+
+
+def write_positions(path, boards):
+    """
+    Writes the boards to a new position store file, returning how many were written. `boards` may be any
+    iterable, including a generator, and is consumed one board at a time.
+    """
+    count = 0
+    with open(path, 'wb') as file:
+        file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, POSITION_BYTES))
+        for board in boards:
+            file.write(encode_position(board))
+            count += 1
+    return count
+
+
+class PositionStore:
+    """
+    A read-only, memory-mapped file of encoded positions, as written by `write_positions`.
+
+    Indexing returns a Board; `raw` and `iter_raw` give the encoded bytes as memoryviews onto the map, without
+    copying, and must be let go of before the store is closed. Close the store (or use it as a context manager)
+    when done.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < FILE_HEADER.size:
+                raise ValueError(f'{path} is not a position store')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        magic, version, record_bytes = FILE_HEADER.unpack_from(self._map)
+        if magic != FILE_MAGIC or version != FILE_VERSION or record_bytes != POSITION_BYTES:
+            self.close()
+            raise ValueError(f'{path} is not a version {FILE_VERSION} position store')
+        if (size - FILE_HEADER.size) % POSITION_BYTES:
+            self.close()
+            raise ValueError(f'{path} ends part way through a position')
+
+        self._count = (size - FILE_HEADER.size) // POSITION_BYTES
+        self._view = memoryview(self._map)[FILE_HEADER.size:]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        return decode_position(self.raw(index))
+
+    def __iter__(self):
+        for data in self.iter_raw():
+            yield decode_position(data)
+
+    def raw(self, index):
+        """
+        The encoded bytes of the position at the given index, as a memoryview onto the file.
+        """
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError('position index out of range')
+        return self._view[index * POSITION_BYTES:(index + 1) * POSITION_BYTES]
+
+    def iter_raw(self):
+        """
+        Yields the encoded bytes of every position in turn, as memoryviews onto the file.
+        """
+        for start in range(0, self._count * POSITION_BYTES, POSITION_BYTES):
+            yield self._view[start:start + POSITION_BYTES]
+
+    def close(self):
+        if self._map is not None:
+            # Views onto the map must be released before it can be closed
+            if getattr(self, '_view', None) is not None:
+                self._view.release()
+                self._view = None
+            self._map.close()
+            self._map = None
+        self._file.close()
@@ -0,0 +1,241 @@
+"""
+Opt-in profiling of the engine's hot paths: how often `Board.find_piece`, `Board.move_piece`, each piece's
+`get_available_moves`, `Piece.obstructed_path` and `Piece.en_passant_possible` are called, and how long they take.
+
+The functions are only wrapped while profiling is enabled - `enable` patches timing wrappers onto the classes and
+`disable` puts the originals back - so there is no cost at all the rest of the time, and profiling can be switched
+on in a running service. Collect over a block of code with
+
+    with profiling() as profile:
+        searcher.search(board)
+    print(profile.summary())
+
+and export the results as JSON (`summary`), in the Prometheus text format (`to_prometheus`), or as a file that
+`pstats` and tools such as snakeviz can read (`dump_stats`).
+"""
+
+import functools
+import marshal
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from chessington.engine.board import Board
+from chessington.engine.pieces import Piece, Pawn, Knight, Bishop, Rook, Queen, King
+
+# The (class, method name) of each profiled function
+PROFILED_FUNCTIONS = [(Board, 'find_piece'), (Board, 'move_piece'),
+                      *((piece_type, 'get_available_moves')
+                        for piece_type in (Pawn, Knight, Bishop, Rook, Queen, King)),
+                      (Piece, 'obstructed_path'), (Piece, 'en_passant_possible')]
+
+PROMETHEUS_PREFIX = 'chessington_engine'
+
+
+class _Entry:
+    __slots__ = ('calls', 'seconds', 'own_seconds', 'callers')
+
+    def __init__(self):
+        self.calls = 0
+        # Total time in the function, and the part of it not spent in other profiled functions
+        self.seconds = 0.0
+        self.own_seconds = 0.0
+        # Calls made from each other profiled function
+        self.callers = defaultdict(int)
+
+
+class Profile:
+    """
+    The calls and timings collected while profiling is enabled. Each thread records into its own tables, which
+    are only combined when the results are read, so that threads do not lose each other's counts.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stopped = None
+        self._lock = threading.Lock()
+        self._thread_entries = []
+        self._local = threading.local()
+
+    @property
+    def seconds(self):
+        """How long the profile has been (or was) collecting for."""
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def _thread_state(self):
+        """
+        The calling thread's entries by function name, and its stack of (name, [time in profiled callees]).
+        """
+        local = self._local
+        try:
+            return local.entries, local.stack
+        except AttributeError:
+            local.entries = defaultdict(_Entry)
+            local.stack = []
+            with self._lock:
+                self._thread_entries.append(local.entries)
+            return local.entries, local.stack
+
+    def entries(self):
+        """
+        The combined entries of every thread, by function name.
+        """
+        combined = defaultdict(_Entry)
+        with self._lock:
+            thread_entries = [dict(entries) for entries in self._thread_entries]
+        for entries in thread_entries:
+            for name, entry in entries.items():
+                total = combined[name]
+                total.calls += entry.calls
+                total.seconds += entry.seconds
+                total.own_seconds += entry.own_seconds
+                for caller, calls in list(entry.callers.items()):
+                    total.callers[caller] += calls
+        return dict(sorted(combined.items()))
+
+    def summary(self):
+        """
+        For each function called, the number of calls and the total and own (excluding other profiled functions)
+        time in milliseconds, ready to be written as JSON.
+        """
+        return {'seconds': self.seconds,
+                'functions': {name: {'calls': entry.calls,
+                                     'total_ms': entry.seconds * 1000,
+                                     'own_ms': entry.own_seconds * 1000,
+                                     'callers': dict(sorted(entry.callers.items()))}
+                              for name, entry in self.entries().items()}}
+
+    def to_prometheus(self):
+        """
+        The calls and times of each function as counters in the Prometheus text exposition format.
+        """
+        entries = self.entries()
+        metrics = [('calls_total', 'Calls to profiled engine functions.', lambda entry: entry.calls),
+                   ('seconds_total', 'Time spent in profiled engine functions.', lambda entry: entry.seconds),
+                   ('own_seconds_total', 'Time spent in profiled engine functions, excluding the other profiled '
+                                         'functions they call.', lambda entry: entry.own_seconds)]
+        lines = []
+        for suffix, description, value in metrics:
+            metric = f'{PROMETHEUS_PREFIX}_{suffix}'
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} counter')
+            for name, entry in entries.items():
+                lines.append(f'{metric}{{function="{name}"}} {value(entry)}')
+        return '\n'.join(lines) + '\n'
+
+    def dump_stats(self, path):
+        """
+        Writes the profile in the format of cProfile's `dump_stats`, to be read with `pstats.Stats(path)`.
+        Functions are only credited with callers that are themselves profiled.
+        """
+        keys = {name: _function_key(name) for name in _FUNCTIONS_BY_NAME}
+        stats = {}
+        for name, entry in self.entries().items():
+            callers = {keys[caller]: calls for caller, calls in entry.callers.items()}
+            stats[keys[name]] = (entry.calls, entry.calls, entry.own_seconds, entry.seconds, callers)
+        with open(path, 'wb') as file:
+            marshal.dump(stats, file)
+
+
+def _profiled_name(owner, name):
+    return f'{owner.__name__}.{name}'
+
+
+_FUNCTIONS_BY_NAME = {_profiled_name(owner, name): (owner, name) for owner, name in PROFILED_FUNCTIONS}
+
+
+def _function_key(name):
+    # pstats identifies functions by (file, first line, name)
+    owner, method = _FUNCTIONS_BY_NAME[name]
+    function = owner.__dict__[method]
+    code = getattr(function, '__wrapped__', function).__code__
+    return code.co_filename, code.co_firstlineno, name
+
+
+def _instrument(function, name, profile):
+    """
+    Wraps the function to record its calls and timings in the profile.
+    """
+    perf_counter = time.perf_counter
+
+    @functools.wraps(function)
+    def profiled(*args, **kwargs):
+        entries, stack = profile._thread_state()
+        callee_seconds = [0.0]
+        stack.append((name, callee_seconds))
+        started = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - started
+            stack.pop()
+            entry = entries[name]
+            entry.calls += 1
+            entry.seconds += elapsed
+            entry.own_seconds += elapsed - callee_seconds[0]
+            if stack:
+                caller, caller_callee_seconds = stack[-1]
+                caller_callee_seconds[0] += elapsed
+                entry.callers[caller] += 1
+
+    return profiled
+
+
+# The profile being collected, if any, and the original functions its wrappers replaced
+_active_profile = None
+_originals = {}
+_enable_lock = threading.Lock()
+
+
+def enable():
+    """
+    Starts profiling the engine, returning the new Profile that results are recorded in. Only one profile can be
+    collected at a time.
+    """
+    global _active_profile
+    with _enable_lock:
+        if _active_profile is not None:
+            raise RuntimeError('Profiling is already enabled')
+        profile = Profile()
+        for owner, name in PROFILED_FUNCTIONS:
+            function = owner.__dict__[name]
+            _originals[owner, name] = function
+            setattr(owner, name, _instrument(function, _profiled_name(owner, name), profile))
+        _active_profile = profile
+        return profile
+
+
+def disable():
+    """
+    Stops profiling and restores the original functions, returning the finished Profile (or None if profiling
+    was not enabled).
+    """
+    global _active_profile
+    with _enable_lock:
+        profile = _active_profile
+        if profile is None:
+            return None
+        for (owner, name), function in _originals.items():
+            setattr(owner, name, function)
+        _originals.clear()
+        profile.stopped = time.perf_counter()
+        _active_profile = None
+        return profile
+
+
+def active_profile():
+    """The profile being collected, or None if profiling is not enabled."""
+    return _active_profile
+
+
+@contextmanager
+def profiling():
+    """
+    Profiles the engine for the duration of the with block, giving the Profile.
+    """
+    profile = enable()
+    try:
+        yield profile
+    finally:
+        disable()
@@ -0,0 +1,313 @@
+"""
+A search engine that picks a move: negamax with alpha-beta pruning, deepened one ply at a time until it runs
+out of depth, time or nodes.
+
+Moves are tried in an order that makes cut-offs likely early: the best move from the previous iteration,
+then captures (most valuable victim first), then "killer" quiet moves that caused cut-offs at the same ply,
+then quiet moves by their history score.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from chessington.engine.data import Move
+from chessington.engine.evaluation import evaluate, PIECE_VALUES
+from chessington.engine.pieces import Pawn
+from chessington.engine.transposition import EXACT, LOWER_BOUND, UPPER_BOUND
+
+MATE_SCORE = 100000
+INFINITY = 1000000
+MAX_DEPTH = 64
+
+# Anything beyond this is a forced mate, scored by how many plies away it is
+MATE_THRESHOLD = MATE_SCORE - 1000
+
+# Plies without a capture or pawn move after which a draw can be claimed
+FIFTY_MOVE_PLIES = 100
+
+# How many nodes to search between looking at the clock
+CLOCK_CHECK_INTERVAL = 1024
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside the search when it runs out of time or nodes, or is stopped.
+    """
+
+
+@dataclass
+class SearchResult:
+    best_move: Optional[Move]
+    score: int
+    depth: int
+    principal_variation: List[Move] = field(default_factory=list)
+    nodes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+
+class Searcher:
+    """
+    Searches a board for the best move for the current player.
+
+    Limits given to the constructor apply to every search, and can be overridden for a single call to `search`.
+    A transposition table, if given, is used to remember results between positions and between searches.
+
+    A search can be stopped from another thread with `stop`, or by setting `stop_event` (a threading or
+    multiprocessing Event), which, unlike `stop`, also works if it is set before the search has started.
+
+    If an `opening_book` (see book.OpeningBook) is given, positions in the book are answered with a book move
+    without searching at all. Likewise with a `tablebase` (see tablebase.Tablebase), which is also probed for
+    the exact score of every position it covers that is reached during the search.
+    """
+
+    def __init__(self, max_depth=MAX_DEPTH, time_limit=None, node_limit=None, transposition_table=None,
+                 stop_event=None, opening_book=None, tablebase=None):
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.transposition_table = transposition_table
+        self.stop_event = stop_event
+        self.opening_book = opening_book
+        self.tablebase = tablebase
+
+        self.nodes = 0
+        self._deadline = None
+        self._node_budget = None
+        self._stopped = False
+        self._killers = []
+        self._history = {}
+        self._pv = []
+        self._root_moves = None
+        self._root_best_move = None
+
+    def stop(self):
+        """
+        Asks a running search to finish as soon as possible, returning the best move found so far.
+        """
+        self._stopped = True
+
+    def search(self, board, max_depth=None, time_limit=None, node_limit=None, on_iteration=None, root_moves=None):
+        """
+        Searches the board by iterative deepening, returning the result of the deepest completed iteration.
+
+        `on_iteration`, if given, is called with the SearchResult of each iteration as it completes. If
+        `root_moves` is given, only those moves are considered for the current player.
+        """
+        max_depth = max_depth if max_depth is not None else self.max_depth
+        time_limit = time_limit if time_limit is not None else self.time_limit
+        node_limit = node_limit if node_limit is not None else self.node_limit
+
+        start = time.perf_counter()
+        self.nodes = 0
+        self._deadline = start + time_limit if time_limit is not None else None
+        self._node_budget = node_limit
+        self._stopped = False
+        self._killers = [[None, None] for _ in range(MAX_DEPTH + 1)]
+        self._history = {}
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+
+        self._root_moves = list(root_moves) if root_moves is not None else None
+        if self.opening_book is not None and self._root_moves is None:
+            book_move = self.opening_book.choose_move(board)
+            if book_move is not None:
+                return SearchResult(book_move, 0, 0, [book_move], seconds=time.perf_counter() - start)
+        if self.tablebase is not None and self._root_moves is None:
+            score = self.tablebase.probe_score(board, 0)
+            tablebase_move = self.tablebase.best_move(board) if score is not None else None
+            if tablebase_move is not None:
+                return SearchResult(tablebase_move, score, 0, [tablebase_move],
+                                    seconds=time.perf_counter() - start)
+
+        moves = self._root_moves if self._root_moves is not None else board.legal_moves()
+        if not moves:
+            return SearchResult(None, -MATE_SCORE if board.in_check() else 0, 0)
+        result = SearchResult(moves[0], 0, 0)
+        self._root_best_move = None
+
+        for depth in range(1, max_depth + 1):
+            self._pv = [[] for _ in range(MAX_DEPTH + 1)]
+            try:
+                score = self._negamax(board, depth, -INFINITY, INFINITY, 0)
+            except SearchAborted:
+                break
+
+            principal_variation = self._pv[0]
+            result = SearchResult(principal_variation[0] if principal_variation else result.best_move, score, depth,
+                                  list(principal_variation), self.nodes, time.perf_counter() - start)
+            self._root_best_move = result.best_move
+            if on_iteration is not None:
+                on_iteration(result)
+            if abs(score) >= MATE_THRESHOLD:
+                break
+
+        result.nodes = self.nodes
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def _check_limits(self):
+        if self._stopped or (self.stop_event is not None and self.stop_event.is_set()):
+            raise SearchAborted()
+        if self._node_budget is not None and self.nodes >= self._node_budget:
+            raise SearchAborted()
+        if self._deadline is not None and self.nodes % CLOCK_CHECK_INTERVAL == 0 \
+                and time.perf_counter() >= self._deadline:
+            raise SearchAborted()
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        self._check_limits()
+        self._pv[ply] = []
+
+        # A repeated position could be repeated again and again, and fifty moves without a capture or pawn move
+        # can be claimed, so both are draws
+        if ply > 0 and (board.halfmove_clock >= FIFTY_MOVE_PLIES or board.is_repetition()):
+            return 0
+
+        if self.tablebase is not None and ply > 0:
+            score = self.tablebase.probe_score(board, ply)
+            if score is not None:
+                return score
+
+        if depth <= 0:
+            return self._quiescence(board, alpha, beta, ply)
+
+        # Reuse an earlier result for this position if it was searched at least as deep
+        table = self.transposition_table
+        key = board.zobrist_key if table is not None else None
+        hash_move = None
+        if table is not None:
+            entry = table.probe(key)
+            if entry is not None and entry.score is not None:
+                hash_move = entry.best_move
+                if ply > 0 and entry.depth >= depth:
+                    score = _score_from_table(entry.score, ply)
+                    if entry.bound == EXACT or (entry.bound == LOWER_BOUND and score >= beta) \
+                            or (entry.bound == UPPER_BOUND and score <= alpha):
+                        return score
+
+        # Without a table, the root at least starts from the previous iteration's best move
+        if ply == 0 and hash_move is None:
+            hash_move = self._root_best_move
+
+        moves = self._root_moves if ply == 0 and self._root_moves is not None else board.legal_moves()
+        if not moves:
+            return -MATE_SCORE + ply if board.in_check() else 0
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        for move in self._order_moves(board, moves, ply, hash_move):
+            capture = _is_capture(board, move)
+            board.make_move(move.from_square, move.to_square, move.promotion)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+                self._pv[ply] = [move] + self._pv[ply + 1]
+            if alpha >= beta:
+                if not capture:
+                    self._record_cutoff(move, depth, ply)
+                break
+
+        # A root search restricted to some of the moves says nothing reliable about the position as a whole
+        if table is not None and not (ply == 0 and self._root_moves is not None):
+            if best_score <= original_alpha:
+                bound = UPPER_BOUND
+            elif best_score >= beta:
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            table.store(key, depth, _score_to_table(best_score, ply), bound, best_move)
+        return best_score
+
+    def _quiescence(self, board, alpha, beta, ply):
+        """
+        Keeps searching captures and promotions until the position is quiet, so that the static evaluation is
+        never taken in the middle of an exchange.
+        """
+        stand_pat = evaluate(board)
+        if stand_pat >= beta:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        if ply >= MAX_DEPTH:
+            return stand_pat
+
+        forcing = [move for move in board.legal_moves() if move.promotion is not None or _is_capture(board, move)]
+        for move in self._order_moves(board, forcing, ply, None):
+            self.nodes += 1
+            self._check_limits()
+            board.make_move(move.from_square, move.to_square, move.promotion)
+            try:
+                score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def _order_moves(self, board, moves, ply, hash_move):
+        killers = self._killers[ply] if ply < len(self._killers) else (None, None)
+
+        def priority(move):
+            if move == hash_move:
+                return 10_000_000
+            victim = board.get_piece(move.to_square)
+            if victim is not None:
+                attacker = board.get_piece(move.from_square)
+                return 1_000_000 + 10 * PIECE_VALUES[type(victim)] - PIECE_VALUES[type(attacker)] // 10
+            if move.promotion is not None:
+                return 900_000 + PIECE_VALUES[move.promotion]
+            if _is_capture(board, move):
+                return 1_000_000 + 10 * PIECE_VALUES[Pawn]
+            if move == killers[0]:
+                return 800_000
+            if move == killers[1]:
+                return 700_000
+            return self._history.get((move.from_square, move.to_square), 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _record_cutoff(self, move, depth, ply):
+        killers = self._killers[ply]
+        if killers[0] != move:
+            killers[1] = killers[0]
+            killers[0] = move
+        key = (move.from_square, move.to_square)
+        self._history[key] = self._history.get(key, 0) + depth * depth
+
+
+def _is_capture(board, move):
+    if board.get_piece(move.to_square) is not None:
+        return True
+    # A pawn moving diagonally onto an empty square is capturing en passant
+    return move.from_square.col != move.to_square.col and isinstance(board.get_piece(move.from_square), Pawn)
+
+
+def _score_to_table(score, ply):
+    """Mate scores are stored relative to the position, rather than to the root of the search."""
+    if score >= MATE_THRESHOLD:
+        return score + ply
+    if score <= -MATE_THRESHOLD:
+        return score - ply
+    return score
+
+
+def _score_from_table(score, ply):
+    if score >= MATE_THRESHOLD:
+        return score - ply
+    if score <= -MATE_THRESHOLD:
+        return score + ply
+    return score
@@ -0,0 +1,622 @@
+"""
+Endgame tablebases: the exact result, and distance to mate, of every position with a few given pieces, worked out
+by retrograde analysis so that such endgames can be played perfectly without searching.
+
+A table covers one material signature such as 'KQvK' (white king and queen against the black king), and its
+colour-reversed twin. Positions are indexed by the squares of the pieces and the side to move, using the board's
+symmetries to cut the table down: a pawnless position can be rotated or reflected so that the white king is in
+the a1-d1-d4 triangle, and one with pawns reflected so that it is on files a-d.
+
+Generation starts from the positions where the side to move is checkmated and works backwards: a position is won
+if some move reaches a lost position, and lost if every move reaches a won one. Moves that capture or promote
+leave the table and are scored by probing the smaller table they lead to, which is generated first. Moves are
+generated by the engine itself, in a pool of worker processes.
+
+Each table is written twice: a DTM file holding a byte per position, the number of plies to mate with best play
+(even when the side to move is losing, odd when winning), and a WDL file holding just win, draw or loss in two
+bits per position. Both are memory-mapped when probed. Castling and en passant are not modelled, so positions
+where either is possible are not probed.
+
+Generate tables with `poetry run tablebase generate KQvK KRvK KPvK --directory tablebases`.
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from chessington.engine.board import Board
+from chessington.engine.data import Player
+from chessington.engine.evaluation import PIECE_VALUES
+from chessington.engine.fen import board_from_fen, move_to_uci
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+from chessington.engine.search import MATE_SCORE
+from chessington.engine.tables import SQUARES
+
+FILE_MAGIC = b'CHTB'
+FILE_VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')
+DTM_KIND = 1
+WDL_KIND = 2
+
+# Values of the DTM table: plies to mate, or one of these
+MAX_DTM = 252
+UNKNOWN = 253
+DRAW = 254
+INVALID = 255
+
+# Results, for the side to move
+WIN = 1
+LOSS = -1
+DRAWN = 0
+
+# Values of the WDL table, two bits per position
+_WDL_CODES = {LOSS: 1, DRAWN: 2, WIN: 3}
+_WDL_RESULTS = {code: result for result, code in _WDL_CODES.items()}
+
+DEFAULT_DIRECTORY = 'tablebases'
+CHUNK_POSITIONS = 4096
+
+PIECE_LETTERS = {King: 'K', Queen: 'Q', Rook: 'R', Bishop: 'B', Knight: 'N', Pawn: 'P'}
+_PIECES_BY_LETTER = {letter: piece_type for piece_type, letter in PIECE_LETTERS.items()}
+_LETTER_ORDER = 'KQRBNP'
+
+
+def _transform(function):
+    return [function(index // 8, index % 8) for index in range(64)]
+
+
+# Reflections and rotations of the board, as maps from square index (row * 8 + col) to square index
+_MIRROR = _transform(lambda row, col: row * 8 + 7 - col)
+_ALL_TRANSFORMS = [_transform(function) for function in (
+    lambda row, col: row * 8 + col,
+    lambda row, col: row * 8 + 7 - col,
+    lambda row, col: (7 - row) * 8 + col,
+    lambda row, col: (7 - row) * 8 + 7 - col,
+    lambda row, col: col * 8 + row,
+    lambda row, col: col * 8 + 7 - row,
+    lambda row, col: (7 - col) * 8 + row,
+    lambda row, col: (7 - col) * 8 + 7 - row,
+)]
+_PAWN_TRANSFORMS = [list(range(64)), _MIRROR]
+_TRIANGLE = [row * 8 + col for row in range(4) for col in range(row, 4)]
+_LEFT_HALF = [row * 8 + col for row in range(8) for col in range(4)]
+
+
+def _side_letters(pieces):
+    return ''.join(sorted((PIECE_LETTERS[type(piece)] for piece in pieces), key=_LETTER_ORDER.index))
+
+
+def _strength(letters):
+    return sum(PIECE_VALUES[_PIECES_BY_LETTER[letter]] for letter in letters), letters
+
+
+def canonical_signature(white, black):
+    """
+    The signature of the table holding positions with the given pieces (e.g. 'KQ' and 'K'), and whether the
+    colours must be swapped to look them up in it. The stronger side is always white in a table.
+    """
+    if _strength(white) >= _strength(black):
+        return f'{white}v{black}', False
+    return f'{black}v{white}', True
+
+
+def is_trivial_draw(signature):
+    """
+    Whether no position with this material can be won, so that there is no need for a table.
+    """
+    letters = signature.replace('v', '').replace('K', '')
+    return not any(letter in 'QRP' for letter in letters) and len(letters) <= 1
+
+
+class _Layout:
+    """
+    How positions with a given signature are numbered.
+    """
+
+    def __init__(self, signature):
+        white, black = signature.split('v')
+        if white[:1] != 'K' or black[:1] != 'K' or any(letter not in _PIECES_BY_LETTER for letter in white + black) \
+                or 'K' in white[1:] + black[1:]:
+            raise ValueError(f'Invalid tablebase signature {signature!r}')
+        self.signature = signature
+        self.pieces = [King.shared(Player.WHITE), King.shared(Player.BLACK)] \
+            + [_PIECES_BY_LETTER[letter].shared(Player.WHITE) for letter in white[1:]] \
+            + [_PIECES_BY_LETTER[letter].shared(Player.BLACK) for letter in black[1:]]
+        self.keys = [(type(piece), piece.player) for piece in self.pieces]
+        self.has_pawns = 'P' in signature
+        self.region = _LEFT_HALF if self.has_pawns else _TRIANGLE
+        self.region_slots = {square: slot for slot, square in enumerate(self.region)}
+        self.transforms = _PAWN_TRANSFORMS if self.has_pawns else _ALL_TRANSFORMS
+        self.side_size = len(self.region) * 64 ** (len(self.pieces) - 1)
+        self.size = 2 * self.side_size
+
+    def encode(self, player, squares):
+        """
+        The index of the position with the pieces on the given squares (in the order of `pieces`).
+        """
+        if squares[0] not in self.region_slots:
+            for transform in self.transforms:
+                if transform[squares[0]] in self.region_slots:
+                    squares = [transform[square] for square in squares]
+                    break
+        index = self.region_slots[squares[0]]
+        for square in squares[1:]:
+            index = index * 64 + square
+        return index if player == Player.WHITE else index + self.side_size
+
+    def decode(self, index):
+        """
+        The (player to move, squares of the pieces) of the position with the given index.
+        """
+        player = Player.WHITE if index < self.side_size else Player.BLACK
+        rest = index % self.side_size
+        squares = []
+        for _ in range(len(self.pieces) - 1):
+            rest, square = divmod(rest, 64)
+            squares.append(square)
+        squares.append(self.region[rest])
+        squares.reverse()
+        return player, squares
+
+    def is_plausible(self, squares):
+        """
+        Whether the pieces are on different squares, with no pawn on the first or last rank.
+        """
+        if len(set(squares)) != len(squares):
+            return False
+        if self.has_pawns:
+            for (piece_type, _), square in zip(self.keys, squares):
+                if piece_type is Pawn and not 8 <= square < 56:
+                    return False
+        return True
+
+
+@dataclass
+class ProbeResult:
+    result: int
+    # Plies to mate with best play, or None for a draw
+    plies: Optional[int]
+
+
+def _value_result(value):
+    if value == DRAW:
+        return DRAWN
+    return WIN if value % 2 else LOSS
+
+
+def _en_passant_matters(board):
+    # Whether the side to move has a pawn that could capture en passant, which the tables do not allow for
+    square = board.en_passant_square
+    if square is None:
+        return False
+    pawn_row = square.row + 1 if square.row == 2 else square.row - 1
+    for col in (square.col - 1, square.col + 1):
+        if 0 <= col < 8:
+            piece = board.board[pawn_row][col]
+            if type(piece) is Pawn and piece.player == board.current_player:
+                return True
+    return False
+
+
+class Tablebase:
+    """
+    Probes the tables in a directory. Tables are opened, and memory-mapped, when first needed; close the
+    tablebase (or use it as a context manager) when done.
+    """
+
+    def __init__(self, directory=DEFAULT_DIRECTORY):
+        self.directory = directory
+        self._tables = {}
+        self._files = []
+        self.max_pieces = 0
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                if name.endswith('.dtm'):
+                    self.max_pieces = max(self.max_pieces, len(name[:-4].replace('v', '')))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        for file in self._files:
+            file.close()
+        self._tables = {}
+        self._files = []
+
+    def _open(self, signature, kind):
+        key = (signature, kind)
+        if key not in self._tables:
+            self._tables[key] = None
+            path = table_path(self.directory, signature, kind)
+            if os.path.exists(path):
+                file = open(path, 'rb')
+                self._files.append(file)
+                table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                magic, version, file_kind = FILE_HEADER.unpack_from(table)
+                size = _Layout(signature).size
+                expected = FILE_HEADER.size + (size if kind == DTM_KIND else (size + 3) // 4)
+                if magic != FILE_MAGIC or version != FILE_VERSION or file_kind != kind or len(table) != expected:
+                    table.close()
+                    raise ValueError(f'{path} is not a version {FILE_VERSION} tablebase file')
+                self._tables[key] = table
+        return self._tables[key]
+
+    def _locate(self, board):
+        """
+        The signature, layout and index of the board's position, or None if tables cannot answer for it.
+        """
+        if board.castling_rights or _en_passant_matters(board):
+            return None
+        white = board.get_pieces(Player.WHITE)
+        black = board.get_pieces(Player.BLACK)
+        signature, swapped = canonical_signature(_side_letters(white), _side_letters(black))
+        if is_trivial_draw(signature):
+            return signature, None, None
+
+        layout = _Layout(signature)
+        squares_by_piece = defaultdict(list)
+        for row, pieces in enumerate(board.board):
+            for col, piece in enumerate(pieces):
+                if piece is not None:
+                    player = piece.player.opponent() if swapped else piece.player
+                    square = (7 - row if swapped else row) * 8 + col
+                    squares_by_piece[type(piece), player].append(square)
+        squares = [squares_by_piece[key].pop() for key in layout.keys]
+        player = board.current_player.opponent() if swapped else board.current_player
+        return signature, layout, layout.encode(player, squares)
+
+    def probe_value(self, board):
+        """
+        The raw DTM table value for the position (plies to mate, or DRAW), or None if there is no table for it.
+        """
+        location = self._locate(board)
+        if location is None:
+            return None
+        signature, layout, index = location
+        if layout is None:
+            return DRAW
+        table = self._open(signature, DTM_KIND)
+        if table is None:
+            return None
+        value = table[FILE_HEADER.size + index]
+        return None if value == INVALID else value
+
+    def probe(self, board):
+        """
+        The result of the position for the side to move, and the plies to mate, or None if there is no table.
+        """
+        value = self.probe_value(board)
+        if value is None:
+            return None
+        return ProbeResult(_value_result(value), None if value == DRAW else value)
+
+    def probe_wdl(self, board):
+        """
+        Just WIN, DRAWN or LOSS for the side to move, read from the smaller WDL table, or None if there is no
+        table.
+        """
+        location = self._locate(board)
+        if location is None:
+            return None
+        signature, layout, index = location
+        if layout is None:
+            return DRAWN
+        table = self._open(signature, WDL_KIND)
+        if table is None:
+            return None
+        code = table[FILE_HEADER.size + index // 4] >> (2 * (index % 4)) & 3
+        return _WDL_RESULTS.get(code)
+
+    def probe_score(self, board, ply):
+        """
+        The position's search score (see search.Searcher) at the given ply, or None if there is no table for it.
+        """
+        if len(board.get_pieces(Player.WHITE)) + len(board.get_pieces(Player.BLACK)) > self.max_pieces:
+            return None
+        value = self.probe_value(board)
+        if value is None:
+            return None
+        if value == DRAW:
+            return 0
+        return MATE_SCORE - ply - value if value % 2 else -MATE_SCORE + ply + value
+
+    def best_move(self, board):
+        """
+        A move that keeps the best result for the side to move: the quickest mate when winning, any drawing move
+        when drawn, and the slowest defeat when losing. None if there is no table for the position.
+        """
+        value = self.probe_value(board)
+        if value is None:
+            return None
+        best_move, best_rank = None, None
+        for move in board.legal_moves():
+            board.make_move(move.from_square, move.to_square, move.promotion)
+            try:
+                reply = self.probe_value(board)
+            finally:
+                board.unmake_move()
+            if reply is None:
+                continue
+            # Rank moves from the mover's point of view: wins first (sooner is better), then draws, then losses
+            if reply == DRAW:
+                rank = (1, 0)
+            elif reply % 2 == 0:
+                rank = (2, -reply)
+            else:
+                rank = (0, reply)
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
+
+
+def table_path(directory, signature, kind=DTM_KIND):
+    return os.path.join(directory, signature + ('.dtm' if kind == DTM_KIND else '.wdl'))
+
+
+def dependencies(signature):
+    """
+    The signatures of the tables that captures and promotions lead to from this one, which must be generated
+    first. Trivially drawn signatures are left out.
+    """
+    white, black = signature.split('v')
+    found = set()
+
+    def add(new_white, new_black):
+        sorted_white = ''.join(sorted(new_white, key=_LETTER_ORDER.index))
+        sorted_black = ''.join(sorted(new_black, key=_LETTER_ORDER.index))
+        dependency, _ = canonical_signature(sorted_white, sorted_black)
+        if not is_trivial_draw(dependency):
+            found.add(dependency)
+
+    for index, letter in enumerate(white[1:], 1):
+        add(white[:index] + white[index + 1:], black)
+        if letter == 'P':
+            for promotion in 'QRBN':
+                add(white[:index] + promotion + white[index + 1:], black)
+    for index, letter in enumerate(black[1:], 1):
+        add(white, black[:index] + black[index + 1:])
+        if letter == 'P':
+            for promotion in 'QRBN':
+                add(white, black[:index] + promotion + black[index + 1:])
+    return sorted(found)
+
+
+# Each worker process keeps a tablebase open on the directory being generated into
+_worker_tablebase = None
+
+
+def _initialise_worker(directory):
+    global _worker_tablebase
+    _worker_tablebase = Tablebase(directory)
+
+
+def _generate_chunk(signature, start, stop):
+    """
+    Works out, for each position in a slice of the table: whether it is valid, checkmate or stalemate, how many
+    legal moves it has, the indices of the positions its moves lead to within the table, and the values of the
+    positions its moves lead to in other tables.
+    """
+    layout = _Layout(signature)
+    tablebase = _worker_tablebase
+    board = Board.empty()
+    placed = []
+
+    values = bytearray([UNKNOWN]) * (stop - start)
+    move_counts = array('H', bytes(2 * (stop - start)))
+    successor_counts = array('H', bytes(2 * (stop - start)))
+    successors = array('I')
+    exits = array('I')
+    exit_values = array('B')
+
+    for offset, index in enumerate(range(start, stop)):
+        player, squares = layout.decode(index)
+        if not layout.is_plausible(squares):
+            values[offset] = INVALID
+            continue
+
+        for square in placed:
+            board.set_piece(square, None)
+        placed = [SQUARES[square // 8][square % 8] for square in squares]
+        for piece, square in zip(layout.pieces, placed):
+            board.set_piece(square, piece)
+        board.current_player = player
+
+        # The side that has just moved cannot have left its king in check
+        if board.is_attacked(placed[1 if player == Player.WHITE else 0], player):
+            values[offset] = INVALID
+            continue
+
+        moves = board.legal_moves()
+        if not moves:
+            values[offset] = 0 if board.in_check() else DRAW
+            continue
+
+        move_counts[offset] = len(moves)
+        opponent = player.opponent()
+        for move in moves:
+            to_square = move.to_square
+            if move.promotion is not None or board.board[to_square.row][to_square.col] is not None:
+                board.make_move(move.from_square, to_square, move.promotion)
+                value = tablebase.probe_value(board)
+                board.unmake_move()
+                if value is None:
+                    raise ValueError(f'Missing the table for a capture or promotion from {signature}')
+                exits.append(offset)
+                exit_values.append(value)
+            else:
+                from_index = move.from_square.row * 8 + move.from_square.col
+                new_squares = list(squares)
+                new_squares[squares.index(from_index)] = to_square.row * 8 + to_square.col
+                successors.append(layout.encode(opponent, new_squares))
+                successor_counts[offset] += 1
+
+    return start, values, move_counts, successor_counts, successors, exits, exit_values
+
+
+def generate(signature, directory=DEFAULT_DIRECTORY, workers=None, force=False):
+    """
+    Generates the DTM and WDL tables for a signature such as 'KQvK' into the directory, first generating any
+    smaller tables that it depends on. Tables already in the directory are kept unless `force` is set. Returns
+    the paths of the tables generated.
+    """
+    layout = _Layout(signature)
+    canonical, _ = canonical_signature(*signature.split('v'))
+    if canonical != signature:
+        raise ValueError(f'Generate {canonical} instead of {signature}; it covers the same positions')
+    if is_trivial_draw(signature):
+        return []
+
+    generated = []
+    for dependency in dependencies(signature):
+        generated += generate(dependency, directory, workers)
+    if not force and os.path.exists(table_path(directory, signature)):
+        return generated
+
+    os.makedirs(directory, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    chunks = [(signature, start, min(start + CHUNK_POSITIONS, layout.size))
+              for start in range(0, layout.size, CHUNK_POSITIONS)]
+    if workers == 1:
+        _initialise_worker(directory)
+        try:
+            results = [_generate_chunk(*chunk) for chunk in chunks]
+        finally:
+            _worker_tablebase.close()
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initialise_worker,
+                                 initargs=(directory,)) as pool:
+            results = list(pool.map(_generate_chunk, *zip(*chunks)))
+
+    values = _solve(layout, results)
+    _write_tables(directory, signature, values)
+    return generated + [table_path(directory, signature), table_path(directory, signature, WDL_KIND)]
+
+
+def _solve(layout, results):
+    """
+    Retrograde analysis: resolves positions in order of distance to mate, starting from checkmates.
+    """
+    values = bytearray(layout.size)
+    remaining = array('H', bytes(2 * layout.size))
+    predecessor_counts = array('I', bytes(4 * (layout.size + 1)))
+    # Positions to resolve at each distance, and positions told of a move to a resolved position in another table
+    resolved_at = defaultdict(list)
+    exit_notices = defaultdict(list)
+
+    for start, chunk_values, move_counts, successor_counts, successors, exits, exit_values in results:
+        values[start:start + len(chunk_values)] = chunk_values
+        remaining[start:start + len(move_counts)] = move_counts
+        for successor in successors:
+            predecessor_counts[successor + 1] += 1
+        for offset, value in zip(exits, exit_values):
+            if value != DRAW:
+                exit_notices[value].append(start + offset)
+    # Checkmates come out of the chunks already scored, but are resolved like everything else
+    for offset, value in enumerate(values):
+        if value == 0:
+            values[offset] = UNKNOWN
+            resolved_at[0].append(offset)
+
+    # Invert the moves, so that each position can tell the positions that lead to it
+    for index in range(layout.size):
+        predecessor_counts[index + 1] += predecessor_counts[index]
+    predecessors = array('I', bytes(4 * predecessor_counts[layout.size]))
+    filled = array('I', predecessor_counts)
+    for start, _, _, successor_counts, successors, _, _ in results:
+        position = 0
+        for offset, count in enumerate(successor_counts):
+            for successor in successors[position:position + count]:
+                predecessors[filled[successor]] = start + offset
+                filled[successor] += 1
+            position += count
+
+    distance = 0
+    while distance <= max(list(resolved_at) + list(exit_notices) + [0]):
+        if distance > MAX_DTM:
+            raise ValueError(f'{layout.signature} has mates too long to store')
+        told = exit_notices.pop(distance, [])
+        for index in resolved_at.pop(distance, []):
+            if values[index] == UNKNOWN:
+                values[index] = distance
+                told.extend(predecessors[predecessor_counts[index]:predecessor_counts[index + 1]])
+        for index in told:
+            if values[index] != UNKNOWN:
+                continue
+            if distance % 2 == 0:
+                # A move to a lost position wins
+                resolved_at[distance + 1].append(index)
+            else:
+                # Every move leads to a won position
+                remaining[index] -= 1
+                if remaining[index] == 0:
+                    resolved_at[distance + 1].append(index)
+        distance += 1
+
+    # Anything left unresolved can be held forever
+    return values.replace(bytes([UNKNOWN]), bytes([DRAW]))
+
+
+def _write_tables(directory, signature, values):
+    wdl = bytearray((len(values) + 3) // 4)
+    for index, value in enumerate(values):
+        if value != INVALID:
+            wdl[index // 4] |= _WDL_CODES[_value_result(value)] << (2 * (index % 4))
+
+    for kind, data in ((DTM_KIND, values), (WDL_KIND, wdl)):
+        path = table_path(directory, signature, kind)
+        temporary_path = f'{path}.{os.getpid()}.tmp'
+        with open(temporary_path, 'wb') as file:
+            file.write(FILE_HEADER.pack(FILE_MAGIC, FILE_VERSION, kind))
+            file.write(data)
+        os.replace(temporary_path, path)
+
+
+def main(argv=None):
+    """Generate or probe endgame tablebases from the command line."""
+    parser = argparse.ArgumentParser(description='Generate or probe endgame tablebases.')
+    parser.add_argument('--directory', default=DEFAULT_DIRECTORY,
+                        help=f'where the tables are kept (default: {DEFAULT_DIRECTORY})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate_command = commands.add_parser('generate', help='generate tables, e.g. KQvK KRvK KPvK')
+    generate_command.add_argument('signature', nargs='+', help='material to generate, stronger side first')
+    generate_command.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+
+    probe_command = commands.add_parser('probe', help='look up a position')
+    probe_command.add_argument('fen', help='the position, as a FEN string')
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        for signature in args.signature:
+            for path in generate(signature, args.directory, args.workers):
+                print(f'Wrote {path}')
+        return 0
+
+    board = board_from_fen(args.fen)
+    with Tablebase(args.directory) as tablebase:
+        result = tablebase.probe(board)
+        if result is None:
+            print('Not in the tablebase')
+            return 1
+        outcome = {WIN: 'win', DRAWN: 'draw', LOSS: 'loss'}[result.result]
+        mate = f', mate in {result.plies} plies' if result.plies is not None else ''
+        best_move = tablebase.best_move(board)
+        print(f'{outcome}{mate}' + (f', best move {move_to_uci(best_move)}' if best_move is not None else ''))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
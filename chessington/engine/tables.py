@@ -0,0 +1,64 @@
+"""
+Precomputed movement tables, so that move generation never has to work out directions or check board edges.
+
+Each table is indexed as TABLE[row][col] and holds the squares (or rays of squares, nearest first) reachable
+from that square on an empty board.
+"""
+
+from chessington.engine.data import Player, Square
+
+BOARD_SIZE = 8
+
+ORTHOGONAL_DIRECTIONS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+DIAGONAL_DIRECTIONS = ((1, 1), (1, -1), (-1, -1), (-1, 1))
+KNIGHT_OFFSETS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+KING_OFFSETS = ORTHOGONAL_DIRECTIONS + DIAGONAL_DIRECTIONS
+PAWN_ATTACK_OFFSETS = {Player.WHITE: ((1, -1), (1, 1)), Player.BLACK: ((-1, -1), (-1, 1))}
+
+SQUARES = [[Square.at(row, col) for col in range(BOARD_SIZE)] for row in range(BOARD_SIZE)]
+
+
+def _on_board(row, col):
+    return 0 <= row < BOARD_SIZE and 0 <= col < BOARD_SIZE
+
+
+def _ray(row, col, direction):
+    row_step, col_step = direction
+    ray = []
+    row, col = row + row_step, col + col_step
+    while _on_board(row, col):
+        ray.append(SQUARES[row][col])
+        row, col = row + row_step, col + col_step
+    return tuple(ray)
+
+
+def _rays_table(directions):
+    return [[tuple(ray for ray in (_ray(row, col, direction) for direction in directions) if ray)
+             for col in range(BOARD_SIZE)] for row in range(BOARD_SIZE)]
+
+
+def _jumps_table(offsets):
+    return [[tuple(SQUARES[row + row_step][col + col_step] for row_step, col_step in offsets
+                   if _on_board(row + row_step, col + col_step))
+             for col in range(BOARD_SIZE)] for row in range(BOARD_SIZE)]
+
+
+def _between_table():
+    """BETWEEN[r1][c1][r2][c2] is the squares strictly between two squares on a line, or None if not on a line."""
+    table = [[[[None] * BOARD_SIZE for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)]
+    for row in range(BOARD_SIZE):
+        for col in range(BOARD_SIZE):
+            for direction in KING_OFFSETS:
+                ray = _ray(row, col, direction)
+                for distance, target in enumerate(ray):
+                    table[row][col][target.row][target.col] = ray[:distance]
+    return table
+
+
+ROOK_RAYS = _rays_table(ORTHOGONAL_DIRECTIONS)
+BISHOP_RAYS = _rays_table(DIAGONAL_DIRECTIONS)
+QUEEN_RAYS = _rays_table(KING_OFFSETS)
+KNIGHT_MOVES = _jumps_table(KNIGHT_OFFSETS)
+KING_MOVES = _jumps_table(KING_OFFSETS)
+PAWN_ATTACKS = {player: _jumps_table(offsets) for player, offsets in PAWN_ATTACK_OFFSETS.items()}
+BETWEEN = _between_table()
@@ -0,0 +1,394 @@
+"""
+Self-play matches for testing engine changes: two engine configurations play each other from a set of opening
+positions, with colours reversed on every other game so that neither side benefits from the openings.
+
+Games are played in a pool of worker processes and each result is appended to a JSONL file as soon as it is
+known. A sequential probability ratio test (SPRT) can stop the match as soon as there is enough evidence that one
+configuration is, or is not, stronger than the other by a given margin.
+
+Run with `poetry run tournament --engine name=new,depth=4 --engine name=old,depth=3 --output results.jsonl`.
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+from chessington.engine.data import Player
+from chessington.engine.fen import board_from_fen, board_to_fen, read_fens, move_to_uci
+from chessington.engine.pieces import Knight, Bishop, King
+from chessington.engine.positions import encode_position, decode_position
+from chessington.engine.search import Searcher, MAX_DEPTH
+from chessington.engine.transposition import TranspositionTable
+
+DEFAULT_MAX_PLIES = 300
+DEFAULT_TABLE_BYTES = 16 * 1024 * 1024
+
+# A few common openings, four plies in, to vary the games
+DEFAULT_OPENINGS = (
+    'r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3',  # Open game
+    'rnbqkbnr/pp2pppp/3p4/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 0 3',  # Sicilian
+    'rnbqkbnr/ppp2ppp/4p3/3p4/3PP3/8/PPP2PPP/RNBQKBNR w KQkq d6 0 3',  # French
+    'rnbqkbnr/pp2pppp/2p5/3p4/3PP3/8/PPP2PPP/RNBQKBNR w KQkq d6 0 3',  # Caro-Kann
+    'rnbqkbnr/ppp2ppp/4p3/3p4/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3',  # Queen's Gambit Declined
+    'rnbqkbnr/pp2pppp/2p5/3p4/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3',  # Slav
+    'rnbqkb1r/pppppp1p/5np1/8/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3',  # King's Indian
+    'rnbqkb1r/pppp1ppp/4pn2/8/2PP4/8/PP2PPPP/RNBQKBNR w KQkq - 0 3',  # Nimzo/Queen's Indian
+    'rnbqkb1r/pppp1ppp/5n2/4p3/2P5/2N5/PP1PPPPP/R1BQKBNR w KQkq - 2 3',  # English
+    'rnbqkb1r/ppp1pppp/5n2/3p4/8/5NP1/PPPPPP1P/RNBQKB1R w KQkq - 1 3',  # King's Indian Attack
+)
+
+WHITE_WINS = '1-0'
+BLACK_WINS = '0-1'
+DRAW = '1/2-1/2'
+
+# The score of the game for white
+_RESULT_SCORES = {WHITE_WINS: 1.0, BLACK_WINS: 0.0, DRAW: 0.5}
+
+
+@dataclass(frozen=True)
+class EngineConfig:
+    """
+    How one side of a match searches. Every limit that is set applies to each move.
+    """
+    name: str
+    max_depth: Optional[int] = None
+    time_limit: Optional[float] = None
+    node_limit: Optional[int] = None
+    table_bytes: int = DEFAULT_TABLE_BYTES
+
+    def create_searcher(self):
+        table = TranspositionTable(self.table_bytes) if self.table_bytes else None
+        return Searcher(self.max_depth or MAX_DEPTH, self.time_limit, self.node_limit, table)
+
+    @staticmethod
+    def parse(text):
+        """
+        A configuration from comma-separated settings, e.g. 'name=new,depth=4,nodes=20000,movetime=100,hash=16',
+        with the move time in milliseconds and the hash size in megabytes.
+        """
+        settings = {}
+        for item in text.split(','):
+            key, separator, value = item.partition('=')
+            if not separator:
+                raise ValueError(f'Expected key=value, not {item!r}')
+            settings[key.strip()] = value.strip()
+        try:
+            config = EngineConfig(
+                name=settings.pop('name', text),
+                max_depth=int(settings.pop('depth')) if 'depth' in settings else None,
+                time_limit=int(settings.pop('movetime')) / 1000 if 'movetime' in settings else None,
+                node_limit=int(settings.pop('nodes')) if 'nodes' in settings else None,
+                table_bytes=int(settings.pop('hash', DEFAULT_TABLE_BYTES // (1024 * 1024))) * 1024 * 1024)
+        except ValueError:
+            raise ValueError(f'Invalid engine settings {text!r}') from None
+        if settings:
+            raise ValueError(f'Unknown engine settings: {", ".join(settings)}')
+        if config.max_depth is None and config.time_limit is None and config.node_limit is None:
+            raise ValueError(f'Engine {config.name!r} needs a depth, movetime or nodes limit')
+        return config
+
+
+@dataclass
+class GameResult:
+    round: int
+    white: str
+    black: str
+    opening: str
+    result: str
+    reason: str
+    plies: int
+    moves: list
+    seconds: float
+
+
+def insufficient_material(board):
+    """
+    Whether neither side can possibly checkmate: bare kings, or a king and a single knight or bishop against a
+    bare king.
+    """
+    pieces = [piece for player in Player for piece in board.get_pieces(player) if type(piece) is not King]
+    return not pieces or (len(pieces) == 1 and type(pieces[0]) in (Knight, Bishop))
+
+
+def play_game(white, black, board, max_plies=DEFAULT_MAX_PLIES):
+    """
+    Plays out a game from the board between two searchers, returning (result, reason, moves in UCI notation).
+    The game is adjudicated a draw after `max_plies` plies.
+    """
+    searchers = {Player.WHITE: white, Player.BLACK: black}
+    moves = []
+    repetitions = Counter([board.zobrist_key])
+    while True:
+        if not board.legal_moves():
+            if board.in_check():
+                return (BLACK_WINS if board.current_player == Player.WHITE else WHITE_WINS), 'checkmate', moves
+            return DRAW, 'stalemate', moves
+        if board.halfmove_clock >= 100:
+            return DRAW, 'fifty-move rule', moves
+        if repetitions[board.zobrist_key] >= 3:
+            return DRAW, 'threefold repetition', moves
+        if insufficient_material(board):
+            return DRAW, 'insufficient material', moves
+        if len(moves) >= max_plies:
+            return DRAW, 'move limit', moves
+
+        move = searchers[board.current_player].search(board).best_move
+        board.move_piece(move.from_square, move.to_square, move.promotion)
+        moves.append(move_to_uci(move))
+        repetitions[board.zobrist_key] += 1
+
+
+# Each worker process keeps a searcher for each configuration it has played with
+_worker_searchers = {}
+
+
+def _worker_searcher(config):
+    searcher = _worker_searchers.get(config)
+    if searcher is None:
+        searcher = _worker_searchers[config] = config.create_searcher()
+    elif searcher.transposition_table is not None:
+        # Start every game afresh, so that games do not depend on which worker played them before
+        searcher.transposition_table.clear()
+    return searcher
+
+
+def _play_round(round_number, white, black, state, max_plies):
+    board = decode_position(state)
+    opening = board_to_fen(board)
+    start = time.perf_counter()
+    result, reason, moves = play_game(_worker_searcher(white), _worker_searcher(black), board, max_plies)
+    return GameResult(round_number, white.name, black.name, opening, result, reason, len(moves), moves,
+                      time.perf_counter() - start)
+
+
+def elo_difference(score):
+    """
+    The Elo difference that gives an expected score (between 0 and 1) under the logistic model.
+    """
+    if score <= 0:
+        return -math.inf
+    if score >= 1:
+        return math.inf
+    return -400 * math.log10(1 / score - 1)
+
+
+def expected_score(elo):
+    """
+    The expected score (between 0 and 1) of a player this many Elo points stronger than their opponent.
+    """
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+@dataclass(frozen=True)
+class Sprt:
+    """
+    A sequential probability ratio test of H0: the first engine is elo0 stronger, against H1: it is elo1
+    stronger, with false positive rate alpha and false negative rate beta.
+    """
+    elo0: float = 0.0
+    elo1: float = 10.0
+    alpha: float = 0.05
+    beta: float = 0.05
+
+    @property
+    def lower_bound(self):
+        return math.log(self.beta / (1 - self.alpha))
+
+    @property
+    def upper_bound(self):
+        return math.log((1 - self.beta) / self.alpha)
+
+    def log_likelihood_ratio(self, wins, draws, losses):
+        """
+        The log-likelihood ratio of H1 to H0 given the results so far, using the normal approximation to the
+        distribution of the mean score. It is 0 until the results vary at all.
+        """
+        games = wins + draws + losses
+        if not games:
+            return 0.0
+        score = (wins + draws / 2) / games
+        variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+        if variance == 0:
+            return 0.0
+        score0, score1 = expected_score(self.elo0), expected_score(self.elo1)
+        return games * (score1 - score0) * (2 * score - score0 - score1) / (2 * variance)
+
+    def decide(self, wins, draws, losses):
+        """
+        'H1' once there is enough evidence for H1, 'H0' once there is enough for H0, or None to keep playing.
+        """
+        ratio = self.log_likelihood_ratio(wins, draws, losses)
+        if ratio >= self.upper_bound:
+            return 'H1'
+        if ratio <= self.lower_bound:
+            return 'H0'
+        return None
+
+
+@dataclass
+class MatchResult:
+    """
+    The results of a match, from the first engine's point of view.
+    """
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    log_likelihood_ratio: float = 0.0
+    decision: Optional[str] = None
+    seconds: float = 0.0
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    @property
+    def score(self):
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.5
+
+    @property
+    def elo(self):
+        return elo_difference(self.score)
+
+    @property
+    def elo_error(self):
+        """
+        The half-width of the 95% confidence interval on `elo`.
+        """
+        if not self.games:
+            return math.inf
+        score = self.score
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 + self.losses * score ** 2) \
+            / self.games
+        margin = 1.96 * math.sqrt(variance / self.games)
+        return (elo_difference(min(score + margin, 1)) - elo_difference(max(score - margin, 0))) / 2
+
+    @property
+    def games_per_hour(self):
+        return self.games * 3600 / self.seconds if self.seconds > 0 else 0.0
+
+    def summary(self):
+        return f'{self.games} games: +{self.wins} ={self.draws} -{self.losses}, ' \
+               f'Elo {self.elo:+.1f} +/- {self.elo_error:.1f}, LLR {self.log_likelihood_ratio:.2f}, ' \
+               f'{self.games_per_hour:.0f} games/hour'
+
+
+def run_match(engine, opponent, openings=DEFAULT_OPENINGS, games=None, workers=None, output=None, sprt=None,
+              max_plies=DEFAULT_MAX_PLIES, on_game=None):
+    """
+    Plays `engine` against `opponent`, returning a MatchResult from `engine`'s point of view.
+
+    Each opening, given as a FEN or a Board, is played twice with colours reversed, cycling through the openings
+    until `games` games (by default, two per opening) have been played or the SPRT, if given, reaches a decision.
+    Each GameResult is written as a line of JSON to the file at `output`, if given, and passed to `on_game`.
+    """
+    boards = [board_from_fen(opening) if isinstance(opening, str) else opening for opening in openings]
+    if not boards:
+        raise ValueError('A match needs at least one opening')
+    states = [encode_position(board) for board in boards]
+    games = games if games is not None else 2 * len(states)
+    workers = workers or os.cpu_count() or 1
+
+    def schedule(pool, round_number):
+        # The engine under test plays white in even rounds and black in odd ones
+        state = states[(round_number // 2) % len(states)]
+        white, black = (engine, opponent) if round_number % 2 == 0 else (opponent, engine)
+        return pool.submit(_play_round, round_number, white, black, state, max_plies)
+
+    match = MatchResult()
+    start = time.perf_counter()
+    output_file = open(output, 'a') if output is not None else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Keep a few games queued per worker so that none sits idle, but not so many that an early stop wastes
+            # much work
+            next_round = 0
+            pending = set()
+            while next_round < games or pending:
+                while next_round < games and len(pending) < 2 * workers:
+                    pending.add(schedule(pool, next_round))
+                    next_round += 1
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    game = future.result()
+                    _record(match, game)
+                    if output_file is not None:
+                        output_file.write(json.dumps(asdict(game)) + '\n')
+                        output_file.flush()
+                    if on_game is not None:
+                        on_game(game)
+
+                match.seconds = time.perf_counter() - start
+                if sprt is not None:
+                    match.log_likelihood_ratio = sprt.log_likelihood_ratio(match.wins, match.draws, match.losses)
+                    match.decision = sprt.decide(match.wins, match.draws, match.losses)
+                    if match.decision is not None:
+                        for future in pending:
+                            future.cancel()
+                        break
+    finally:
+        if output_file is not None:
+            output_file.close()
+    match.seconds = time.perf_counter() - start
+    return match
+
+
+def _record(match, game):
+    score = _RESULT_SCORES[game.result]
+    if game.round % 2:
+        score = 1 - score
+    if score == 1:
+        match.wins += 1
+    elif score == 0:
+        match.losses += 1
+    else:
+        match.draws += 1
+
+
+def main(argv=None):
+    """Run a self-play match from the command line."""
+    parser = argparse.ArgumentParser(description='Play two engine configurations against each other.')
+    parser.add_argument('--engine', action='append', required=True, type=EngineConfig.parse,
+                        help='an engine, e.g. name=new,depth=4 (give exactly two; the first is the one under test)')
+    parser.add_argument('--openings', help='file of opening positions, one FEN per line (default: built in)')
+    parser.add_argument('--games', type=int, help='most games to play (default: two per opening)')
+    parser.add_argument('--workers', type=int, help='worker processes (default: one per CPU)')
+    parser.add_argument('--output', help='JSONL file to append game results to')
+    parser.add_argument('--max-plies', type=int, default=DEFAULT_MAX_PLIES,
+                        help=f'plies after which a game is drawn (default: {DEFAULT_MAX_PLIES})')
+    parser.add_argument('--sprt', nargs=2, type=float, metavar=('ELO0', 'ELO1'),
+                        help='stop early once an SPRT of ELO0 against ELO1 reaches a decision')
+    parser.add_argument('--report-every', type=int, default=10, help='games between progress reports (default: 10)')
+    args = parser.parse_args(argv)
+    if len(args.engine) != 2:
+        parser.error('give exactly two --engine options')
+
+    openings = list(read_fens(args.openings)) if args.openings else DEFAULT_OPENINGS
+    sprt = Sprt(*args.sprt) if args.sprt else None
+    engine, opponent = args.engine
+    finished = 0
+
+    def report(game):
+        nonlocal finished
+        finished += 1
+        if finished % args.report_every == 0:
+            print(f'{finished} games finished', flush=True)
+
+    match = run_match(engine, opponent, openings, args.games, args.workers, args.output, sprt, args.max_plies,
+                      on_game=report)
+    print(f'{engine.name} vs {opponent.name}: {match.summary()}')
+    if sprt is not None:
+        print(f'SPRT: {match.decision or "no decision"} '
+              f'(bounds {sprt.lower_bound:.2f}, {sprt.upper_bound:.2f})')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
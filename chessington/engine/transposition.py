@@ -0,0 +1,205 @@
+"""
+A fixed-size transposition table: a cache of work done on a position, keyed by its Zobrist hash, so that a
+position reached again by a different move order does not have to be worked out from scratch.
+
+Each entry can hold the position's generated move list and the result of searching it. The table never
+grows past the memory budget it is given, evicting entries instead.
+"""
+
+import sys
+
+from chessington.engine.data import Move, Square
+
+DEPTH_PREFERRED = 'depth-preferred'
+ALWAYS_REPLACE = 'always-replace'
+REPLACEMENT_POLICIES = (DEPTH_PREFERRED, ALWAYS_REPLACE)
+
+# What a stored search score means relative to the true value of the position
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Depth given to entries that only hold a move list, so that any search result takes priority over them
+MOVES_ONLY_DEPTH = -1
+
+
+class TranspositionEntry:
+    """
+    Everything the table knows about one position.
+    """
+    __slots__ = ('key', 'moves', 'depth', 'score', 'bound', 'best_move', 'generation', 'size')
+
+    def __init__(self, key, generation):
+        self.key = key
+        self.moves = None
+        self.depth = MOVES_ONLY_DEPTH
+        self.score = None
+        self.bound = None
+        self.best_move = None
+        self.generation = generation
+        self.size = 0
+
+
+def _estimate_sizes():
+    square = Square.at(0, 0)
+    entry = TranspositionEntry(0, 0)
+    entry_bytes = sys.getsizeof(entry) + sys.getsizeof(1 << 63)
+    move_bytes = sys.getsizeof(Move(square, square)) + sys.getsizeof([None]) - sys.getsizeof([])
+    return entry_bytes + sys.getsizeof([]), move_bytes
+
+
+ENTRY_BYTES, MOVE_BYTES = _estimate_sizes()
+
+
+class TranspositionTable:
+    """
+    A cache of move lists and search results, in a fixed number of slots addressed by position key.
+
+    When two positions want the same slot, the replacement policy decides which one is kept: 'always-replace'
+    keeps the newest, while 'depth-preferred' keeps whichever was searched deeper, unless the old entry is left
+    over from a previous search. The estimated memory used by all entries never exceeds `max_bytes`.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, policy=DEPTH_PREFERRED):
+        if policy not in REPLACEMENT_POLICIES:
+            raise ValueError(f'Unknown replacement policy {policy!r}, expected one of {REPLACEMENT_POLICIES}')
+        slot_count = max_bytes // ENTRY_BYTES
+        if slot_count < 1:
+            raise ValueError(f'A transposition table needs at least {ENTRY_BYTES} bytes')
+
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self._slots = [None] * slot_count
+        self._generation = 0
+        self._cursor = 0
+        self.used_bytes = sys.getsizeof(self._slots)
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return sum(1 for entry in self._slots if entry is not None)
+
+    def new_search(self):
+        """
+        Marks every existing entry as belonging to an earlier search, so depth-preferred replacement lets go of it.
+        """
+        self._generation += 1
+
+    def clear(self):
+        self._slots = [None] * len(self._slots)
+        self.used_bytes = sys.getsizeof(self._slots)
+
+    def probe(self, key):
+        """
+        Returns the entry for the given position key, or None if the table does not hold it.
+        """
+        entry = self._slots[key % len(self._slots)]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def get_moves(self, key):
+        """
+        Returns the cached move list for the position, or None if it has not been stored.
+        """
+        entry = self.probe(key)
+        return entry.moves if entry is not None else None
+
+    def store_moves(self, key, moves):
+        """
+        Caches the generated move list for the position.
+        """
+        entry = self._entry_for_store(key, MOVES_ONLY_DEPTH)
+        if entry is not None:
+            entry.moves = moves
+            self._resize(entry)
+
+    def store(self, key, depth, score, bound, best_move):
+        """
+        Records the result of searching the position to the given depth.
+        """
+        entry = self._entry_for_store(key, depth)
+        if entry is None or (entry.depth > depth and entry.generation == self._generation
+                             and self.policy == DEPTH_PREFERRED):
+            return
+        entry.depth = depth
+        entry.score = score
+        entry.bound = bound
+        entry.best_move = best_move
+        entry.generation = self._generation
+
+    def stats(self):
+        """
+        Counters describing how well the table is working.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'slots': len(self._slots),
+            'used_bytes': self.used_bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
+
+    def _entry_for_store(self, key, depth):
+        """
+        Finds or makes the entry to store into for the given key, or returns None if the policy keeps the old one.
+        """
+        index = key % len(self._slots)
+        existing = self._slots[index]
+        if existing is not None and existing.key == key:
+            self.stores += 1
+            return existing
+
+        if existing is not None:
+            keep_existing = self.policy == DEPTH_PREFERRED and existing.generation == self._generation \
+                and existing.depth > depth
+            if keep_existing:
+                return None
+            self._evict(index)
+
+        entry = TranspositionEntry(key, self._generation)
+        self._slots[index] = entry
+        self._resize(entry)
+        self.stores += 1
+        return entry
+
+    def _resize(self, entry):
+        """
+        Updates the memory accounting for an entry whose contents changed, evicting others to stay within budget.
+        """
+        size = ENTRY_BYTES + (len(entry.moves) * MOVE_BYTES if entry.moves is not None else 0)
+        self.used_bytes += size - entry.size
+        entry.size = size
+
+        # Sweep round the table from where the last sweep stopped, so eviction is spread evenly
+        slot_count = len(self._slots)
+        for _ in range(slot_count):
+            if self.used_bytes <= self.max_bytes:
+                return
+            self._cursor = (self._cursor + 1) % slot_count
+            victim = self._slots[self._cursor]
+            if victim is not None and victim is not entry:
+                self._evict(self._cursor)
+
+        # The entry is too big to keep even on its own
+        if self.used_bytes > self.max_bytes:
+            entry.moves = None
+            self.used_bytes -= entry.size - ENTRY_BYTES
+            entry.size = ENTRY_BYTES
+
+    def _evict(self, index):
+        self.used_bytes -= self._slots[index].size
+        self._slots[index] = None
+        self.evictions += 1
@@ -0,0 +1,274 @@
+"""
+The Universal Chess Interface (UCI): the text protocol that chess GUIs and tools use to drive an engine over
+its standard input and output. Run with `poetry run uci`.
+
+Commands are read on the asyncio event loop while searches run in a worker thread, so `stop` and `isready` are
+answered straight away even in the middle of a search. See https://www.chessprogramming.org/UCI for the
+protocol; this supports `uci`, `isready`, `ucinewgame`, `position`, `go`, `stop`, `setoption` (Hash and
+Threads) and `quit`.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from chessington.engine.board import Board
+from chessington.engine.data import Player
+from chessington.engine.fen import board_from_fen, move_to_uci, parse_uci_move
+from chessington.engine.parallel import ParallelSearcher
+from chessington.engine.search import Searcher, MATE_SCORE, MATE_THRESHOLD, MAX_DEPTH
+from chessington.engine.transposition import TranspositionTable
+
+ENGINE_NAME = 'Chessington'
+ENGINE_AUTHOR = 'the Chessington developers'
+
+DEFAULT_HASH_MEGABYTES = 16
+MAX_HASH_MEGABYTES = 1024
+MAX_THREADS = os.cpu_count() or 1
+
+# With a clock but no fixed time per move, plan on this many more moves, and keep this much time in hand
+DEFAULT_MOVES_TO_GO = 30
+SAFETY_MARGIN_SECONDS = 0.05
+
+def format_score(score):
+    """A search score as UCI reports it: 'cp <centipawns>', or 'mate <moves>' for a forced mate."""
+    if score >= MATE_THRESHOLD:
+        return f'mate {(MATE_SCORE - score + 1) // 2}'
+    if score <= -MATE_THRESHOLD:
+        return f'mate {-((MATE_SCORE + score) // 2)}'
+    return f'cp {score}'
+
+
+def format_info(result):
+    """A UCI 'info' line describing a SearchResult."""
+    milliseconds = int(result.seconds * 1000)
+    line = f'info depth {result.depth} score {format_score(result.score)} nodes {result.nodes} ' \
+           f'nps {int(result.nodes_per_second)} time {milliseconds}'
+    if result.principal_variation:
+        line += ' pv ' + ' '.join(move_to_uci(move) for move in result.principal_variation)
+    return line
+
+
+def parse_go(board, words):
+    """
+    Works out the (max depth, time limit in seconds, node limit) for a search from the arguments of a 'go'
+    command, any of which may be None for no limit.
+    """
+    options = {}
+    index = 0
+    while index < len(words):
+        word = words[index]
+        if word in ('infinite', 'ponder'):
+            options[word] = True
+            index += 1
+        elif word == 'searchmoves':
+            # Everything after searchmoves is a move, which we do not support restricting to
+            break
+        else:
+            if index + 1 < len(words):
+                try:
+                    options[word] = int(words[index + 1])
+                except ValueError:
+                    pass
+            index += 2
+
+    max_depth = options.get('depth')
+    node_limit = options.get('nodes')
+    time_limit = None
+    if 'infinite' in options:
+        pass
+    elif 'movetime' in options:
+        time_limit = options['movetime'] / 1000
+    else:
+        prefix = 'w' if board.current_player == Player.WHITE else 'b'
+        remaining = options.get(prefix + 'time')
+        if remaining is not None:
+            increment = options.get(prefix + 'inc', 0)
+            moves_to_go = options.get('movestogo') or DEFAULT_MOVES_TO_GO
+            budget = remaining / moves_to_go + increment / 2
+            time_limit = max(0.0, min(budget, remaining - SAFETY_MARGIN_SECONDS * 1000) / 1000)
+    return max_depth, time_limit, node_limit
+
+
+class UciEngine:
+    """
+    The engine's side of a UCI session. Feed it command lines with `handle`, or a whole stream of them with
+    `run`; responses are written to `output`, a text file (standard output by default).
+    """
+
+    def __init__(self, output=None):
+        self.output = output if output is not None else sys.stdout
+        self.board = Board.at_starting_position()
+        self.hash_megabytes = DEFAULT_HASH_MEGABYTES
+        self.threads = 1
+
+        self._stop_event = threading.Event()
+        self._searcher = None
+        self._parallel_searcher = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._search_task = None
+        self._loop = None
+        self._create_searchers()
+
+    def _create_searchers(self):
+        table_bytes = self.hash_megabytes * 1024 * 1024
+        self._searcher = Searcher(transposition_table=TranspositionTable(table_bytes), stop_event=self._stop_event)
+        if self._parallel_searcher is not None:
+            self._parallel_searcher.close()
+            self._parallel_searcher = None
+        if self.threads > 1:
+            self._parallel_searcher = ParallelSearcher(workers=self.threads, stop_event=self._stop_event,
+                                                       worker_table_bytes=table_bytes // self.threads)
+
+    def send(self, line):
+        self.output.write(line + '\n')
+        self.output.flush()
+
+    async def run(self, lines):
+        """
+        Handles each command from an async iterable of lines, until 'quit' or the end of the input.
+        """
+        try:
+            async for line in lines:
+                if not await self.handle(line):
+                    break
+        finally:
+            await self.close()
+
+    async def close(self):
+        await self._stop_search()
+        if self._parallel_searcher is not None:
+            self._parallel_searcher.close()
+        self._executor.shutdown()
+
+    async def handle(self, line):
+        """
+        Acts on a single command line, returning False once the session should end.
+        """
+        self._loop = asyncio.get_running_loop()
+        words = line.split()
+        if not words:
+            return True
+        command, arguments = words[0], words[1:]
+
+        if command == 'uci':
+            self.send(f'id name {ENGINE_NAME}')
+            self.send(f'id author {ENGINE_AUTHOR}')
+            self.send(f'option name Hash type spin default {DEFAULT_HASH_MEGABYTES} min 1 max {MAX_HASH_MEGABYTES}')
+            self.send(f'option name Threads type spin default 1 min 1 max {MAX_THREADS}')
+            self.send('uciok')
+        elif command == 'isready':
+            self.send('readyok')
+        elif command == 'ucinewgame':
+            await self._stop_search()
+            self._searcher.transposition_table.clear()
+            if self._parallel_searcher is not None:
+                self._parallel_searcher.clear()
+        elif command == 'position':
+            await self._stop_search()
+            self._set_position(arguments)
+        elif command == 'go':
+            await self._stop_search()
+            # Cleared here rather than in the search task, so that a 'stop' straight after is not lost
+            self._stop_event.clear()
+            self._search_task = asyncio.ensure_future(self._search(arguments))
+        elif command == 'stop':
+            await self._stop_search()
+        elif command == 'setoption':
+            await self._stop_search()
+            self._set_option(arguments)
+        elif command == 'quit':
+            return False
+        elif command not in ('debug', 'ponderhit', 'register'):
+            self.send(f'info string Unknown command: {line.strip()}')
+        return True
+
+    def _set_position(self, arguments):
+        moves_at = arguments.index('moves') if 'moves' in arguments else len(arguments)
+        try:
+            if arguments[:1] == ['startpos']:
+                board = Board.at_starting_position()
+            elif arguments[:1] == ['fen']:
+                board = board_from_fen(' '.join(arguments[1:moves_at]))
+            else:
+                raise ValueError('Expected "startpos" or "fen"')
+            for text in arguments[moves_at + 1:]:
+                move = parse_uci_move(board, text)
+                board.move_piece(move.from_square, move.to_square, move.promotion)
+        except ValueError as error:
+            self.send(f'info string Invalid position: {error}')
+            return
+        self.board = board
+
+    def _set_option(self, arguments):
+        if 'name' not in arguments or 'value' not in arguments:
+            return
+        name = ' '.join(arguments[arguments.index('name') + 1:arguments.index('value')]).lower()
+        value = ' '.join(arguments[arguments.index('value') + 1:])
+        try:
+            if name == 'hash':
+                self.hash_megabytes = min(max(int(value), 1), MAX_HASH_MEGABYTES)
+            elif name == 'threads':
+                self.threads = min(max(int(value), 1), MAX_THREADS)
+            else:
+                self.send(f'info string Unknown option: {name}')
+                return
+        except ValueError:
+            self.send(f'info string Invalid value for {name}: {value}')
+            return
+        self._create_searchers()
+
+    async def _search(self, arguments):
+        max_depth, time_limit, node_limit = parse_go(self.board, arguments)
+        max_depth = min(max_depth or MAX_DEPTH, MAX_DEPTH)
+        board = self.board
+
+        def report(result):
+            # Called on the search thread, so hand the line over to the event loop to write
+            self._loop.call_soon_threadsafe(self.send, format_info(result))
+
+        def search():
+            if self._parallel_searcher is not None:
+                return self._parallel_searcher.search(board, max_depth=max_depth, time_limit=time_limit,
+                                                      node_limit=node_limit)
+            return self._searcher.search(board, max_depth=max_depth, time_limit=time_limit, node_limit=node_limit,
+                                         on_iteration=report)
+
+        result = await self._loop.run_in_executor(self._executor, search)
+        if self._parallel_searcher is not None and result.depth:
+            self.send(format_info(result))
+        if 'infinite' in arguments:
+            # An infinite search only gives its best move once told to stop, even if it has finished early
+            await self._loop.run_in_executor(self._executor, self._stop_event.wait)
+        self.send(f'bestmove {move_to_uci(result.best_move) if result.best_move is not None else "0000"}')
+
+    async def _stop_search(self):
+        """
+        Stops any search in progress and waits for it to report its best move.
+        """
+        if self._search_task is not None:
+            self._stop_event.set()
+            await self._search_task
+            self._search_task = None
+
+
+async def _read_lines(stream):
+    # Reading a console asynchronously is not portable, so block on it in a thread instead
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await loop.run_in_executor(None, stream.readline)
+        if not line:
+            return
+        yield line
+
+
+def main(argv=None):
+    """Run a UCI session over standard input and output."""
+    asyncio.run(UciEngine().run(_read_lines(sys.stdin)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
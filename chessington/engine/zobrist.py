@@ -0,0 +1,71 @@
+"""
+Zobrist hashing - a 64-bit key for a position, formed by XOR-ing together a random number for each piece on
+its square, the side to move, the castling rights and the en-passant file. Because XOR is its own inverse, the
+key can be updated as pieces are placed and removed instead of being recomputed from the whole board.
+"""
+
+import random
+
+from chessington.engine.data import Player, WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
+
+BOARD_SIZE = 8
+
+# A fixed seed keeps keys stable between runs, so they can be stored on disk
+_random = random.Random(0x5EED_C0DE)
+
+
+def _random_key():
+    return _random.getrandbits(64)
+
+
+PIECE_SQUARE_KEYS = {
+    piece_type: {player: [[_random_key() for _ in range(BOARD_SIZE)] for _ in range(BOARD_SIZE)] for player in Player}
+    for piece_type in (Pawn, Knight, Bishop, Rook, Queen, King)
+}
+BLACK_TO_MOVE_KEY = _random_key()
+EN_PASSANT_KEYS = [_random_key() for _ in range(BOARD_SIZE)]
+
+
+def _castling_keys():
+    """One key per combination of castling rights, made from a key for each individual right."""
+    flag_keys = {flag: _random_key() for flag in (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)}
+    keys = []
+    for rights in range(16):
+        key = 0
+        for flag, flag_key in flag_keys.items():
+            if rights & flag:
+                key ^= flag_key
+        keys.append(key)
+    return keys
+
+
+CASTLING_KEYS = _castling_keys()
+
+
+def piece_key(piece, square):
+    """The key for a single piece standing on a square."""
+    return PIECE_SQUARE_KEYS[type(piece)][piece.player][square.row][square.col]
+
+
+def state_key(player, castling_rights, en_passant_square):
+    """The part of the key that depends on everything other than piece placement."""
+    key = CASTLING_KEYS[castling_rights]
+    if player == Player.BLACK:
+        key ^= BLACK_TO_MOVE_KEY
+    if en_passant_square is not None:
+        key ^= EN_PASSANT_KEYS[en_passant_square.col]
+    return key
+
+
+def compute_key(board):
+    """
+    Computes a board's key from scratch, for checking the incrementally updated one.
+    """
+    key = 0
+    for row in range(BOARD_SIZE):
+        for col in range(BOARD_SIZE):
+            piece = board.board[row][col]
+            if piece is not None:
+                key ^= PIECE_SQUARE_KEYS[type(piece)][piece.player][row][col]
+    return key ^ state_key(board.current_player, board.castling_rights, board.en_passant_square)
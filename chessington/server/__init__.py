@@ -0,0 +1,342 @@
+"""
+A headless game server hosting many games at once over HTTP and WebSocket. Run with `poetry run serve`.
+
+    POST   /games              start a game, from {"fen": ...} if given
+    GET    /games/{id}         the game's state
+    DELETE /games/{id}         end the game
+    GET    /games/{id}/moves   the legal moves
+    POST   /games/{id}/moves   play {"move": "e2e4"}
+    GET    /games/{id}/ws      a WebSocket that is sent the state, then every move played in the game along with the
+                               squares it changed, and accepts {"type": "move", "move": ...}, {"type": "state"} and
+                               {"type": "legal_moves"}
+    GET    /metrics            request latency percentiles, and session counts
+    POST   /profile            start profiling the engine (see chessington.engine.profiling)
+    GET    /profile            the engine's calls and timings so far
+    GET    /profile/prometheus the same, in the Prometheus text format
+    DELETE /profile            stop profiling, giving the final calls and timings
+
+Games left alone for too long, or pushed out by newer games once there are too many, are evicted.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+
+from chessington.engine import profiling
+from chessington.server.metrics import LatencyRecorder
+from chessington.server.protocol import HttpError, WebSocket, GOING_AWAY, read_request, response, \
+    websocket_handshake
+from chessington.server.sessions import SessionPool, DEFAULT_MAX_SESSIONS, DEFAULT_IDLE_SECONDS
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8080
+DEFAULT_SWEEP_SECONDS = 30
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+logger = logging.getLogger(__name__)
+
+
+class GameServer:
+    """
+    The server and the games it hosts. Use `start` (or `async with`) to begin listening; a port of 0 picks a free
+    port, which `port` then gives.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, max_sessions=DEFAULT_MAX_SESSIONS,
+                 idle_seconds=DEFAULT_IDLE_SECONDS, sweep_seconds=DEFAULT_SWEEP_SECONDS):
+        self.host = host
+        self.port = port
+        self.sweep_seconds = sweep_seconds
+        self.sessions = SessionPool(max_sessions, idle_seconds, on_evict=self._close_subscribers)
+        self.latency = LatencyRecorder()
+
+        self._server = None
+        self._sweeper = None
+        self._connections = {}
+        self._routes = {
+            '/games': {'POST': self._create_game},
+            '/games/{id}': {'GET': self._get_state, 'DELETE': self._end_game},
+            '/games/{id}/moves': {'GET': self._get_legal_moves, 'POST': self._play_move},
+            '/metrics': {'GET': self._get_metrics},
+            '/profile': {'POST': self._start_profiling, 'GET': self._get_profile, 'DELETE': self._stop_profiling},
+            '/profile/prometheus': {'GET': self._get_profile_prometheus},
+        }
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._sweeper = asyncio.ensure_future(self._sweep())
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    async def close(self):
+        """
+        Stops listening, and closes every connection, telling WebSocket clients the server is going away.
+        """
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if self._server is not None:
+            self._server.close()
+            # Closing each connection ends its handler, which sees the connection close as the client leaving
+            for writer in list(self._connections):
+                writer.close()
+            await asyncio.gather(*self._connections.values(), return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.sweep_seconds)
+            self.sessions.evict_idle()
+
+    def _close_subscribers(self, session):
+        # Called synchronously by the session pool, so the sockets are closed in the background
+        for socket in list(session.subscribers):
+            asyncio.ensure_future(socket.close(GOING_AWAY))
+        session.subscribers.clear()
+
+    async def _handle_connection(self, reader, writer):
+        self._connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except HttpError as error:
+                    writer.write(response(error.status, {'error': error.message}, keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+
+                if request.wants_websocket:
+                    await self._handle_websocket(request, reader, writer)
+                    break
+
+                started = time.perf_counter()
+                route, status, body, headers = self._dispatch(request)
+                writer.write(response(status, body, request.keep_alive, headers))
+                await writer.drain()
+                self.latency.record(route, time.perf_counter() - started)
+                if not request.keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            del self._connections[writer]
+            writer.close()
+
+    def _match(self, path):
+        """
+        The route pattern for a path, and the game id in it, if any.
+        """
+        parts = path.strip('/').split('/')
+        if len(parts) >= 2 and parts[0] == 'games':
+            return '/' + '/'.join(['games', '{id}'] + parts[2:]), parts[1]
+        return '/' + '/'.join(parts), None
+
+    def _dispatch(self, request):
+        """
+        Handles an HTTP request, returning the route's name (for metrics), and the status, body and any extra
+        headers of the response. Handlers return the status and body, and optionally the extra headers.
+        """
+        pattern, session_id = self._match(request.path)
+        handlers = self._routes.get(pattern)
+        if handlers is None:
+            return 'unknown', 404, {'error': f'No such resource: {request.path}'}, None
+        route = f'{request.method} {pattern}'
+        handler = handlers.get(request.method)
+        if handler is None:
+            return route, 405, {'error': f'{request.method} is not allowed here'}, {'Allow': ', '.join(handlers)}
+        try:
+            status, body, *headers = handler(request, session_id)
+        except HttpError as error:
+            return route, error.status, {'error': error.message}, None
+        except Exception:
+            logger.exception('Error handling %s %s', request.method, request.path)
+            return route, 500, {'error': 'Internal server error'}, None
+        return route, status, body, headers[0] if headers else None
+
+    def _session(self, session_id):
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise HttpError(404, f'No such game: {session_id}')
+        return session
+
+    def _create_game(self, request, _):
+        fen = request.json().get('fen')
+        try:
+            session = self.sessions.create(fen)
+        except ValueError as error:
+            raise HttpError(400, str(error)) from None
+        return 201, session.state()
+
+    def _get_state(self, _, session_id):
+        return 200, self._session(session_id).state()
+
+    def _end_game(self, _, session_id):
+        session = self.sessions.remove(session_id)
+        if session is None:
+            raise HttpError(404, f'No such game: {session_id}')
+        self._close_subscribers(session)
+        return 204, None
+
+    def _get_legal_moves(self, _, session_id):
+        return 200, {'legal_moves': self._session(session_id).legal_moves()}
+
+    def _play_move(self, request, session_id):
+        session = self._session(session_id)
+        state = self._play(session, request.json().get('move'))
+        return 200, state
+
+    def _get_metrics(self, _, __):
+        return 200, {'sessions': len(self.sessions),
+                     'evictions': self.sessions.evictions,
+                     'latency_ms': self.latency.summary()}
+
+    def _start_profiling(self, _, __):
+        try:
+            profiling.enable()
+        except RuntimeError as error:
+            raise HttpError(409, str(error)) from None
+        return 201, {'profiling': True}
+
+    def _active_profile(self):
+        profile = profiling.active_profile()
+        if profile is None:
+            raise HttpError(404, 'Profiling is not enabled')
+        return profile
+
+    def _get_profile(self, _, __):
+        return 200, self._active_profile().summary()
+
+    def _get_profile_prometheus(self, _, __):
+        text = self._active_profile().to_prometheus()
+        return 200, text.encode('utf-8'), {'Content-Type': PROMETHEUS_CONTENT_TYPE}
+
+    def _stop_profiling(self, _, __):
+        profile = profiling.disable()
+        if profile is None:
+            raise HttpError(404, 'Profiling is not enabled')
+        return 200, profile.summary()
+
+    def _play(self, session, text):
+        """
+        Plays the move in the session and pushes it out to the session's subscribers, returning the new state.
+        """
+        if not isinstance(text, str):
+            raise HttpError(400, 'Expected a move, e.g. {"move": "e2e4"}')
+        try:
+            session.play(text)
+        except ValueError as error:
+            raise HttpError(400, str(error)) from None
+        # Subscribers already have the board, so only the squares that changed are sent to them
+        changes = session.take_changes()
+        state = session.state()
+        if session.subscribers:
+            message = json.dumps({'type': 'move', 'move': session.moves[-1], 'changes': changes, **state})
+            for socket in list(session.subscribers):
+                asyncio.ensure_future(self._push(session, socket, message))
+        return state
+
+    async def _push(self, session, socket, message):
+        try:
+            await socket.send(message)
+        except ConnectionError:
+            session.subscribers.discard(socket)
+
+    async def _handle_websocket(self, request, reader, writer):
+        pattern, session_id = self._match(request.path)
+        session = self.sessions.get(session_id) if pattern == '/games/{id}/ws' else None
+        if session is None:
+            writer.write(response(404, {'error': f'No such game: {request.path}'}, keep_alive=False))
+            await writer.drain()
+            return
+        try:
+            writer.write(websocket_handshake(request))
+        except HttpError as error:
+            writer.write(response(error.status, {'error': error.message}, keep_alive=False))
+            await writer.drain()
+            return
+        await writer.drain()
+
+        socket = WebSocket(reader, writer)
+        session.subscribers.add(socket)
+        try:
+            await socket.send({'type': 'state', **session.state()})
+            while True:
+                text = await socket.receive()
+                if text is None:
+                    break
+                started = time.perf_counter()
+                route = await self._handle_message(session, socket, text)
+                self.latency.record(route, time.perf_counter() - started)
+        finally:
+            session.subscribers.discard(socket)
+            await socket.close()
+
+    async def _handle_message(self, session, socket, text):
+        """
+        Acts on a message from a WebSocket client, returning the route's name for metrics.
+        """
+        try:
+            message = json.loads(text)
+            kind = message.get('type')
+        except (ValueError, AttributeError):
+            await socket.send({'type': 'error', 'error': 'Messages must be JSON objects'})
+            return 'WS invalid'
+
+        if self.sessions.get(session.id) is not session:
+            await socket.close(GOING_AWAY)
+        elif kind == 'move':
+            try:
+                # The move is pushed out to every subscriber, including this one
+                self._play(session, message.get('move'))
+            except HttpError as error:
+                await socket.send({'type': 'error', 'error': error.message})
+        elif kind == 'state':
+            await socket.send({'type': 'state', **session.state()})
+        elif kind == 'legal_moves':
+            await socket.send({'type': 'legal_moves', 'legal_moves': session.legal_moves()})
+        else:
+            await socket.send({'type': 'error', 'error': f'Unknown message type: {kind}'})
+            return 'WS invalid'
+        return f'WS {kind}'
+
+
+def main(argv=None):
+    """Run the game server until interrupted."""
+    parser = argparse.ArgumentParser(description='Host chess games over HTTP and WebSocket.')
+    parser.add_argument('--host', default=DEFAULT_HOST, help=f'address to listen on (default: {DEFAULT_HOST})')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f'port to listen on (default: {DEFAULT_PORT})')
+    parser.add_argument('--max-sessions', type=int, default=DEFAULT_MAX_SESSIONS,
+                        help=f'most games to host at once (default: {DEFAULT_MAX_SESSIONS})')
+    parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_SECONDS,
+                        help=f'seconds before an idle game is evicted (default: {DEFAULT_IDLE_SECONDS})')
+    args = parser.parse_args(argv)
+
+    async def serve():
+        async with GameServer(args.host, args.port, args.max_sessions, args.idle_timeout) as server:
+            print(f'Serving games on http://{server.host}:{server.port}')
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
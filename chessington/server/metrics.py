@@ -0,0 +1,48 @@
+"""
+Request latency tracking, reported as percentiles.
+"""
+
+import math
+from collections import defaultdict, deque
+
+DEFAULT_SAMPLE_SIZE = 10000
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, percent):
+    """
+    The value below which the given percentage of the (sorted) values fall, by the nearest-rank method.
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class LatencyRecorder:
+    """
+    Keeps the most recent latencies of each kind of request, in a fixed-size window so that memory use does not
+    grow with traffic.
+    """
+
+    def __init__(self, sample_size=DEFAULT_SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._samples = defaultdict(lambda: deque(maxlen=self.sample_size))
+        self._counts = defaultdict(int)
+
+    def record(self, name, seconds):
+        self._samples[name].append(seconds)
+        self._counts[name] += 1
+
+    def summary(self):
+        """
+        For each kind of request, the total count and the latency percentiles and maximum over the recent window,
+        in milliseconds.
+        """
+        summary = {}
+        for name, samples in sorted(self._samples.items()):
+            values = sorted(samples)
+            summary[name] = {'count': self._counts[name],
+                             **{f'p{percent}': percentile(values, percent) * 1000 for percent in PERCENTILES},
+                             'max': values[-1] * 1000}
+        return summary
@@ -0,0 +1,276 @@
+"""
+Just enough HTTP/1.1 and WebSocket (RFC 6455) over asyncio streams to serve games, with no dependencies beyond
+the standard library.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+from dataclasses import dataclass, field
+from typing import Dict
+
+MAX_HEADER_BYTES = 16 * 1024
+MAX_BODY_BYTES = 64 * 1024
+MAX_MESSAGE_BYTES = 64 * 1024
+
+STATUS_REASONS = {
+    101: 'Switching Protocols',
+    200: 'OK',
+    201: 'Created',
+    204: 'No Content',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    409: 'Conflict',
+    413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+# WebSocket frame opcodes
+CONTINUATION = 0x0
+TEXT = 0x1
+BINARY = 0x2
+CLOSE = 0x8
+PING = 0x9
+PONG = 0xA
+
+NORMAL_CLOSURE = 1000
+GOING_AWAY = 1001
+MESSAGE_TOO_BIG = 1009
+
+
+class HttpError(Exception):
+    """
+    Raised while handling a request to send back an error response with the given status.
+    """
+
+    def __init__(self, status, message=None):
+        super().__init__(message or STATUS_REASONS.get(status, ''))
+        self.status = status
+        self.message = message or STATUS_REASONS.get(status, '')
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b''
+
+    @property
+    def keep_alive(self):
+        return self.headers.get('connection', '').lower() != 'close'
+
+    @property
+    def wants_websocket(self):
+        return self.headers.get('upgrade', '').lower() == 'websocket'
+
+    def json(self):
+        """
+        The request body parsed as a JSON object, or an empty one if there is no body.
+        """
+        if not self.body:
+            return {}
+        try:
+            value = json.loads(self.body)
+        except ValueError:
+            raise HttpError(400, 'Request body is not valid JSON') from None
+        if not isinstance(value, dict):
+            raise HttpError(400, 'Request body must be a JSON object')
+        return value
+
+
+async def read_request(reader):
+    """
+    Reads the next request from the stream, or returns None if the client has closed the connection.
+    """
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except asyncio.IncompleteReadError as error:
+        if not error.partial:
+            return None
+        raise HttpError(400, 'Malformed request') from None
+    except asyncio.LimitOverrunError:
+        raise HttpError(413, 'Request headers too large') from None
+    if len(head) > MAX_HEADER_BYTES:
+        raise HttpError(413, 'Request headers too large')
+
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, _ = lines[0].split(' ', 2)
+    except ValueError:
+        raise HttpError(400, 'Malformed request line') from None
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise HttpError(400, 'Invalid Content-Length') from None
+    if length < 0:
+        raise HttpError(400, 'Invalid Content-Length')
+    if length > MAX_BODY_BYTES:
+        raise HttpError(413, 'Request body too large')
+    try:
+        body = await reader.readexactly(length) if length else b''
+    except asyncio.IncompleteReadError:
+        raise HttpError(400, 'Request body is shorter than its Content-Length') from None
+    return Request(method.upper(), target.split('?', 1)[0], headers, body)
+
+
+def response(status, body=None, keep_alive=True, headers=None):
+    """
+    The bytes of an HTTP response. A body that is not already bytes is sent as JSON.
+    """
+    if body is None:
+        payload = b''
+    elif isinstance(body, bytes):
+        payload = body
+    else:
+        payload = json.dumps(body).encode('utf-8')
+    lines = [f'HTTP/1.1 {status} {STATUS_REASONS.get(status, "")}',
+             f'Content-Length: {len(payload)}',
+             f'Connection: {"keep-alive" if keep_alive else "close"}']
+    if body is not None and not isinstance(body, bytes):
+        lines.append('Content-Type: application/json')
+    for name, value in (headers or {}).items():
+        lines.append(f'{name}: {value}')
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload
+
+
+def websocket_accept_key(key):
+    """The Sec-WebSocket-Accept value that answers a client's Sec-WebSocket-Key."""
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def websocket_handshake(request):
+    """
+    The response that upgrades the request's connection to a WebSocket.
+    """
+    key = request.headers.get('sec-websocket-key')
+    if key is None or request.headers.get('sec-websocket-version') != '13':
+        raise HttpError(400, 'Invalid WebSocket handshake')
+    lines = ['HTTP/1.1 101 Switching Protocols', 'Upgrade: websocket', 'Connection: Upgrade',
+             f'Sec-WebSocket-Accept: {websocket_accept_key(key)}']
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def encode_frame(payload, opcode=TEXT, mask=False):
+    """
+    A single, final WebSocket frame. Servers send unmasked frames, while clients must mask theirs.
+    """
+    if isinstance(payload, str):
+        payload = payload.encode('utf-8')
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, mask_bit | length)
+    elif length < 1 << 16:
+        header = struct.pack('!BBH', 0x80 | opcode, mask_bit | 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, mask_bit | 127, length)
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    return header + key + _apply_mask(payload, key)
+
+
+def _apply_mask(payload, key):
+    # XOR with the key repeated over the whole payload, done as one big integer rather than byte by byte
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(payload), 'big')
+
+
+async def read_frame(reader, max_bytes=MAX_MESSAGE_BYTES):
+    """
+    Reads one WebSocket frame, returning (final, opcode, payload) with the payload unmasked.
+    """
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length, = struct.unpack('!H', await reader.readexactly(2))
+    elif length == 127:
+        length, = struct.unpack('!Q', await reader.readexactly(8))
+    if length > max_bytes:
+        raise ValueError('WebSocket frame too large')
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if key is not None:
+        payload = _apply_mask(payload, key)
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+class WebSocket:
+    """
+    One end of a WebSocket connection, exchanging text messages. Set `mask` for the client end.
+    """
+
+    def __init__(self, reader, writer, mask=False):
+        self.reader = reader
+        self.writer = writer
+        self.mask = mask
+        self.closed = False
+
+    async def receive(self):
+        """
+        The next text message, or None once the connection has closed. Pings are answered along the way.
+        """
+        fragments = []
+        while not self.closed:
+            try:
+                final, opcode, payload = await read_frame(self.reader)
+            except ValueError:
+                await self.close(MESSAGE_TOO_BIG)
+                return None
+            except (EOFError, ConnectionError):
+                self.closed = True
+                return None
+
+            if opcode == CLOSE:
+                await self.close()
+                return None
+            if opcode == PING:
+                await self._send_frame(payload, PONG)
+                continue
+            if opcode == PONG:
+                continue
+
+            fragments.append(payload)
+            if sum(len(fragment) for fragment in fragments) > MAX_MESSAGE_BYTES:
+                await self.close(MESSAGE_TOO_BIG)
+                return None
+            if final:
+                return b''.join(fragments).decode('utf-8', 'replace')
+        return None
+
+    async def send(self, message):
+        """
+        Sends a text message, or anything else as JSON.
+        """
+        if not isinstance(message, str):
+            message = json.dumps(message)
+        await self._send_frame(message, TEXT)
+
+    async def close(self, code=NORMAL_CLOSURE):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._send_frame(struct.pack('!H', code), CLOSE, force=True)
+        except ConnectionError:
+            pass
+
+    async def _send_frame(self, payload, opcode, force=False):
+        if self.closed and not force:
+            raise ConnectionError('WebSocket is closed')
+        self.writer.write(encode_frame(payload, opcode, self.mask))
+        await self.writer.drain()
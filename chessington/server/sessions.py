@@ -0,0 +1,158 @@
+"""
+Games hosted by the server, and the pool that keeps them within a memory budget.
+"""
+
+import secrets
+import time
+from collections import OrderedDict
+
+from chessington.engine.board import Board
+from chessington.engine.data import Player
+from chessington.engine.fen import board_from_fen, board_to_fen, piece_letter, square_name, move_to_uci, \
+    parse_uci_move
+
+DEFAULT_MAX_SESSIONS = 10000
+DEFAULT_IDLE_SECONDS = 30 * 60
+
+IN_PROGRESS = 'in progress'
+CHECKMATE = 'checkmate'
+STALEMATE = 'stalemate'
+
+
+def _status(legal_moves, in_check):
+    if legal_moves:
+        return IN_PROGRESS
+    return CHECKMATE if in_check else STALEMATE
+
+
+class GameSession:
+    """
+    One game: its board, the moves played so far, and the WebSocket clients watching it.
+    """
+
+    def __init__(self, session_id, board, clock=time.monotonic):
+        self.id = session_id
+        self.board = board
+        self.board.track_changes()
+        self.moves = []
+        self.subscribers = set()
+        self.last_used = clock()
+
+    def legal_moves(self):
+        return [move_to_uci(move) for move in self.board.legal_moves()]
+
+    def status(self):
+        return _status(self.board.legal_moves(), self.board.in_check())
+
+    def state(self):
+        """
+        Everything a client needs to show the game, as a JSON-friendly dict.
+        """
+        legal_moves = self.board.legal_moves()
+        in_check = self.board.in_check()
+        return {
+            'id': self.id,
+            'fen': board_to_fen(self.board),
+            'turn': 'white' if self.board.current_player == Player.WHITE else 'black',
+            'status': _status(legal_moves, in_check),
+            'check': in_check,
+            'moves': list(self.moves),
+            'legal_moves': [move_to_uci(move) for move in legal_moves],
+        }
+
+    def play(self, text):
+        """
+        Plays a move given in UCI notation, e.g. 'e2e4', raising ValueError if it is not legal.
+        """
+        move = parse_uci_move(self.board, text)
+        self.board.move_piece(move.from_square, move.to_square, move.promotion)
+        self.moves.append(move_to_uci(move))
+        return move
+
+    def take_changes(self):
+        """
+        The squares that have changed since this was last called, by name, with the FEN letter of the piece now on
+        each, or None for an empty square.
+        """
+        return {square_name(square): piece_letter(piece) if piece is not None else None
+                for square, piece in self.board.take_changes().items()}
+
+
+class SessionPool:
+    """
+    The games being hosted, least recently used first. Creating a game beyond `max_sessions` evicts the least
+    recently used one, and `evict_idle` evicts any left alone for longer than `idle_seconds`.
+
+    Evicted sessions are passed to `on_evict`, if given, so that their clients can be told.
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, idle_seconds=DEFAULT_IDLE_SECONDS, on_evict=None,
+                 clock=time.monotonic):
+        if max_sessions < 1:
+            raise ValueError('A session pool needs room for at least one session')
+        self.max_sessions = max_sessions
+        self.idle_seconds = idle_seconds
+        self.on_evict = on_evict
+        self.clock = clock
+        self.evictions = 0
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def create(self, fen=None):
+        """
+        Starts a new game, from the given FEN or the starting position. Raises ValueError for an invalid FEN.
+        """
+        if fen is not None and not isinstance(fen, str):
+            raise ValueError('The FEN must be a string')
+        board = board_from_fen(fen) if fen is not None else Board.at_starting_position()
+        session = GameSession(secrets.token_urlsafe(8), board, self.clock)
+        while len(self._sessions) >= self.max_sessions:
+            self._evict(next(iter(self._sessions)))
+        self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id):
+        """
+        The session with the given id, marked as just used, or None if there is no such session.
+        """
+        session = self._sessions.get(session_id)
+        if session is not None:
+            session.last_used = self.clock()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def remove(self, session_id):
+        """
+        Ends the session, returning it, or None if there was no such session.
+        """
+        return self._sessions.pop(session_id, None)
+
+    def evict_idle(self):
+        """
+        Evicts every session that has not been used for `idle_seconds`, returning how many were evicted.
+        """
+        cutoff = self.clock() - self.idle_seconds
+        evicted = 0
+        # Sessions are kept in order of use, so the idle ones are all at the front
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used >= cutoff:
+                break
+            if session.subscribers:
+                # Someone is still watching, so count it as used
+                self.get(session_id)
+                continue
+            self._evict(session_id)
+            evicted += 1
+        return evicted
+
+    def _evict(self, session_id):
+        session = self._sessions.pop(session_id)
+        self.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(session)
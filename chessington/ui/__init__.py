@@ -2,15 +2,26 @@
 A GUI chess board that can be interacted with, and pieces moved around on.
 """
 
+import os
+import queue
+import threading
 import tkinter as tk
-from typing import Iterable
+from typing import Dict, Iterable, TYPE_CHECKING
 
 from chessington.engine.board import Board, BOARD_SIZE
-from chessington.engine.data import Square
+from chessington.engine.data import Player, Square
 from chessington.ui.colours import Colour
 from chessington.ui.images import ImageRepository
 
+if TYPE_CHECKING:
+    from chessington.engine.search import Searcher
+
 WINDOW_SIZE = 60
+COMPUTER_THINKING_TIME = 2.0
+# How often to check whether the computer has finished thinking
+OPPONENT_POLL_MILLISECONDS = 50
+DEFAULT_BOOK_PATH = 'book.bin'
+DEFAULT_TABLEBASE_DIRECTORY = 'tablebases'
 
 images = ImageRepository()
 
@@ -39,12 +50,22 @@ def update_pieces_and_colours(window: tk.Tk, board: Board):
             update_square(window, board, Square(row, col))
 
 
-def highlight_squares(window: tk.Tk, board: Board, from_square: Square, to_squares: Iterable[Square]):
-    """Set background colours on active movement squares"""
+def get_highlights(from_square: Square, to_squares: Iterable[Square]) -> Dict[Square, Colour]:
+    """Determine the background colours of the active movement squares"""
+    highlights = {square: Colour.TO_SQUARE for square in to_squares}
     if from_square is not None:
-        update_square(window, board, from_square, Colour.FROM_SQUARE)
-    for square in to_squares:
-        update_square(window, board, square, Colour.TO_SQUARE)
+        highlights[from_square] = Colour.FROM_SQUARE
+    return highlights
+
+
+def redraw_changes(window: tk.Tk, board: Board, highlights: Dict[Square, Colour],
+                   previous_highlights: Dict[Square, Colour]):
+    """Re-draw only the squares whose piece or highlight has changed since the last redraw"""
+    squares = set(board.take_changes())
+    squares.update(square for square in highlights.keys() | previous_highlights.keys()
+                   if highlights.get(square) != previous_highlights.get(square))
+    for square in squares:
+        update_square(window, board, square, highlights.get(square))
 
 
 def square_id(square: Square):
@@ -52,19 +73,53 @@ def square_id(square: Square):
     return f'square@{square.row}{square.col}'
 
 
-def play_game():
-    """Launch Chessington!"""
+def play_game(opponent: 'Searcher' = None, opponent_player: Player = Player.BLACK):
+    """Launch Chessington! If given an opponent, it plays the moves for `opponent_player`."""
     window = tk.Tk()
     window.title('Chessington')
     window.resizable(False, False)
+    images.set_master(window)
     board = Board.at_starting_position()
 
     from_square = None
     to_squares = []
+    highlights = {}
+    thinking = False
+    opponent_results = queue.Queue()
+
+    def schedule_opponent_move():
+        nonlocal thinking
+        # Give the window a chance to redraw before the opponent starts thinking. Clicks are ignored from now until
+        # the move is made, and there is nothing to think about once the game is over.
+        if opponent is None or board.current_player != opponent_player or not board.legal_moves():
+            return
+        thinking = True
+        window.after(10, play_opponent_move)
+
+    def play_opponent_move():
+        # Think on another thread so that the window stays responsive
+        threading.Thread(target=lambda: opponent_results.put(opponent.search(board)), daemon=True).start()
+        window.after(OPPONENT_POLL_MILLISECONDS, finish_opponent_move)
+
+    def finish_opponent_move():
+        nonlocal highlights, thinking
+        try:
+            result = opponent_results.get_nowait()
+        except queue.Empty:
+            window.after(OPPONENT_POLL_MILLISECONDS, finish_opponent_move)
+            return
+        thinking = False
+        if result.best_move is not None:
+            move = result.best_move
+            board.move_piece(move.from_square, move.to_square, move.promotion)
+        redraw_changes(window, board, {}, highlights)
+        highlights = {}
 
     def generate_click_handler(clicked_square: Square):
         def handle_click():
-            nonlocal window, board, from_square, to_squares
+            nonlocal window, board, from_square, to_squares, highlights
+            if thinking:
+                return
             clicked_piece = board.get_piece(clicked_square)
 
             # If making an allowed move, then make it
@@ -75,14 +130,16 @@ def play_game():
             # If clicking on a piece whose turn it is, get its allowed moves
             elif clicked_piece is not None and clicked_piece.player == board.current_player:
                 from_square = clicked_square
-                to_squares = clicked_piece.get_available_moves(board)
+                to_squares = [move.to_square for move in board.legal_moves() if move.from_square == clicked_square]
 
             # Otherwise reset everthing to default
             else:
                 from_square, to_squares = None, []
 
-            update_pieces_and_colours(window, board)
-            highlight_squares(window, board, from_square, to_squares)
+            new_highlights = get_highlights(from_square, to_squares)
+            redraw_changes(window, board, new_highlights, highlights)
+            highlights = new_highlights
+            schedule_opponent_move()
 
         return handle_click
 
@@ -105,5 +162,27 @@ def play_game():
             btn.grid(sticky='wens')
 
     update_pieces_and_colours(window, board)
+    board.track_changes()
+    schedule_opponent_move()
     window.mainloop()
 
+
+def play_against_computer(book_path: str = DEFAULT_BOOK_PATH, tablebase_directory: str = DEFAULT_TABLEBASE_DIRECTORY):
+    """
+    Launch Chessington, with the computer playing black, using its opening book and endgame tablebases if there
+    are any.
+    """
+    # The engine is only loaded when it is needed, so that the two-player game starts quickly
+    from chessington.engine.book import OpeningBook
+    from chessington.engine.search import Searcher
+    from chessington.engine.tablebase import Tablebase
+
+    book = OpeningBook(book_path) if os.path.exists(book_path) else None
+    tablebase = Tablebase(tablebase_directory)
+    try:
+        play_game(Searcher(time_limit=COMPUTER_THINKING_TIME, opening_book=book, tablebase=tablebase))
+    finally:
+        tablebase.close()
+        if book is not None:
+            book.close()
+
@@ -1,14 +1,24 @@
 import os
-from typing import Optional
+import tkinter as tk
+from typing import TYPE_CHECKING
 
-from PIL import Image, ImageTk
-
-from chessington.engine.data import Player
 from chessington.engine.pieces import Pawn, Knight, Bishop, King, Queen, Rook, Piece
 from chessington.ui.colours import Colour
 
+if TYPE_CHECKING:
+    from PIL import Image
+
 IMAGES_BASE_DIRECTORY = 'images'
 
+# Bump this whenever the format of the cached images changes, so that old caches are ignored
+CACHE_VERSION = 1
+
+
+def default_cache_directory() -> str:
+    """Where preprocessed images are kept between runs, following the XDG convention"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'chessington', f'images-v{CACHE_VERSION}')
+
 
 class ImageRepository:
     """
@@ -17,36 +27,71 @@ class ImageRepository:
 
     This class works around the limitation by providing pre-processed piece images
     with all possible backgrounds.
+
+    Nothing is loaded until an image is first asked for. Each piece is then composited onto
+    its background once, and saved in `cache_directory` so that later runs can hand the
+    result straight to Tk without touching PIL.
     """
 
     PIECES_WITH_IMAGES = [Pawn, Knight, Bishop, King, Queen, Rook]
 
-    def __init__(self):
-        self._images = {}
-        self._load_from_disk()
-
-    def _load_from_disk(self):
-        """Load all possible images into memory to optimise performance"""
-        mapping = {}
+    def __init__(self, cache_directory: str = None):
+        self.cache_directory = cache_directory or default_cache_directory()
+        self._photo_images = {}
+        self._master = None
 
-        def piece_on_all_backgrounds(piece: Optional[Piece]):
-            return {colour: get_image_with_background(piece, colour) for colour in Colour}
+    def set_master(self, master):
+        """Make images for the given Tk root from now on
 
-        for piece in self.PIECES_WITH_IMAGES:
-            mapping[piece] = {}
-            mapping[piece][Player.WHITE] = piece_on_all_backgrounds(piece(Player.WHITE))
-            mapping[piece][Player.BLACK] = piece_on_all_backgrounds(piece(Player.BLACK))
+        PhotoImages belong to a Tk root, so any images made for an old root are dropped. Nothing is made here:
+        each image is still only made the first time it is asked for.
+        """
+        if master is not self._master:
+            self._master = master
+            self._photo_images = {}
 
-        mapping['empty'] = piece_on_all_backgrounds(None)
-        self._images = mapping
+    def get_image(self, piece: Piece, background_colour: Colour) -> tk.PhotoImage:
+        """Get a GUI-ready image of a piece on the specified background colour
 
-    def get_image(self, piece: Piece, background_colour: Colour) -> ImageTk:
-        """Get a GUI-ready image of a piece on the specified background colour"""
+        The same image object is returned every time, so it must not be modified.
+        """
         if piece:
-            image = self._images[piece.__class__][piece.player][background_colour]
-        else:
-            image = self._images['empty'][background_colour]
-        return ImageTk.PhotoImage(image.convert('RGB'))
+            return self._get_photo_image(piece.__class__, piece.player, background_colour)
+        return self._get_photo_image(None, None, background_colour)
+
+    def _get_photo_image(self, piece_type, player, background_colour):
+        key = (piece_type, player, background_colour)
+        photo_image = self._photo_images.get(key)
+        if photo_image is None:
+            piece = piece_type.shared(player) if piece_type is not None else None
+            photo_image = self._load_photo_image(piece, background_colour)
+            self._photo_images[key] = photo_image
+        return photo_image
+
+    def _load_photo_image(self, piece: Piece, background_colour: Colour):
+        """Load the image from the cache, compositing and caching it first if need be"""
+        path = self.get_cached_filename(piece, background_colour)
+        if not os.path.exists(path):
+            image = get_image_with_background(piece, background_colour).convert('RGB')
+            try:
+                os.makedirs(self.cache_directory, exist_ok=True)
+                # Write to a temporary file first so that a concurrent run never reads half an image
+                temporary_path = f'{path}.{os.getpid()}.tmp'
+                image.save(temporary_path, 'PPM')
+                os.replace(temporary_path, path)
+            except OSError:
+                # Without a usable cache, just use the image we made
+                from PIL import ImageTk
+                return ImageTk.PhotoImage(image, master=self._master)
+        # Tk reads PPM images itself, so a cached image needs no help from PIL
+        return tk.PhotoImage(file=path, master=self._master)
+
+    def get_cached_filename(self, piece: Piece, background_colour: Colour) -> str:
+        """The cache file for a piece on a background, named after everything the image is made from"""
+        source = get_filename_for_piece(piece)
+        name = os.path.splitext(os.path.basename(source))[0]
+        modified = os.stat(source).st_mtime_ns
+        return os.path.join(self.cache_directory, f'{name}-{background_colour.value.lstrip("#")}-{modified}.ppm')
 
 
 def get_filename_for_piece(piece: Piece) -> str:
@@ -57,18 +102,20 @@ def get_filename_for_piece(piece: Piece) -> str:
     return os.path.join(IMAGES_BASE_DIRECTORY, image_name)
 
 
-def get_image_for_piece(piece: Piece) -> Image:
+def get_image_for_piece(piece: Piece) -> 'Image.Image':
     """Load a piece image from disk"""
+    from PIL import Image
     file = get_filename_for_piece(piece)
     return Image.open(file)
 
 
-def get_image_with_background(piece: Piece, background_colour: Colour) -> Image:
+def get_image_with_background(piece: Piece, background_colour: Colour) -> 'Image.Image':
     """Load a piece image from disk and add background colour.
 
     You can't make tkinter elements transparent, and they are all rectangular.
     This function pre-processes piece PNGs to give appropriate background colours.
     """
+    from PIL import Image
     image = get_image_for_piece(piece)
     new_image = Image.new("RGBA", image.size, background_colour.value)
     try:
@@ -0,0 +1,87 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from chessington.engine import batch
+from chessington.engine.board import Board
+from chessington.engine.evaluation import evaluate
+from chessington.engine.fen import board_from_fen, board_to_fen
+from chessington.engine.perft import STANDARD_POSITIONS
+
+
+def standard_boards():
+    return [board_from_fen(fen) for _, fen, _ in STANDARD_POSITIONS] + \
+           [board_from_fen('8/5k2/8/8/3P4/8/1K6/8 b - - 0 1'), board_from_fen('3rk3/8/8/8/8/8/8/1K2R3 w - - 0 1')]
+
+
+class TestBatch:
+
+    @staticmethod
+    def test_boards_round_trip_through_planes_and_squares():
+        # Arrange
+        boards = standard_boards()
+
+        # Act
+        planes = batch.boards_to_planes(boards)
+        squares = batch.planes_to_squares(planes)
+        rebuilt = batch.planes_to_boards(planes, batch.white_to_move(boards))
+
+        # Assert
+        assert planes.shape == (len(boards), 12, 8, 8)
+        assert (squares == batch.boards_to_squares(boards)).all()
+        assert [board_to_fen(board).split()[:2] for board in rebuilt] == \
+               [board_to_fen(board).split()[:2] for board in boards]
+
+    @staticmethod
+    def test_scores_match_single_position_evaluation():
+        # Arrange
+        boards = standard_boards()
+        squares = batch.boards_to_squares(boards)
+
+        # Act
+        scores = batch.evaluate(squares, batch.white_to_move(boards))
+
+        # Assert
+        assert scores.tolist() == [evaluate(board) for board in boards]
+
+    @staticmethod
+    def test_starting_position_features():
+        # Act
+        features = batch.features(batch.boards_to_planes([Board.at_starting_position()]))
+
+        # Assert
+        assert features.material.tolist() == [0]
+        assert features.piece_square.tolist() == [0]
+        assert features.phase.tolist() == [24]
+        assert features.mobility.tolist() == [[20, 20]]
+        assert features.attacks.tolist() == [[38, 38]]
+
+    @staticmethod
+    def test_mobility_matches_move_count_in_a_quiet_position():
+        # Arrange
+        board = board_from_fen('4k3/1p4p1/2n5/3B4/8/5N2/PP3PPP/3R2K1 w - - 0 1')
+
+        # Act
+        features = batch.features(batch.boards_to_squares([board]))
+
+        # Assert
+        assert features.mobility[0, batch.WHITE] == len(board.legal_moves())
+
+    @staticmethod
+    def test_attack_maps_stop_at_blockers():
+        # Arrange
+        board = board_from_fen('4k3/8/8/8/8/8/8/R3K2r w - - 0 1')
+
+        # Act
+        maps = batch.attack_maps(batch.boards_to_squares([board]))
+
+        # Assert
+        assert maps[0, batch.WHITE, 0, 3] == 2
+        assert maps[0, batch.WHITE, 0, 5] == 1
+        assert maps[0, batch.BLACK, 0, 4] == 1
+        assert maps[0, batch.BLACK, 0, 3] == 0
+
+    @staticmethod
+    def test_rejects_arrays_of_the_wrong_shape():
+        with pytest.raises(ValueError):
+            batch.material(np.zeros((3, 8, 8)))
@@ -0,0 +1,115 @@
+from chessington.engine.bitboard import BitBoard
+from chessington.engine.board import Board
+from chessington.engine.data import Player, Square
+from chessington.engine.fen import board_from_fen, board_to_fen
+from chessington.engine.pieces import Pawn, Rook, Knight, Queen
+
+
+class TestBitBoard:
+
+    @staticmethod
+    def test_starting_position_has_twenty_moves():
+        # Arrange
+        bitboard = BitBoard.from_board(Board.at_starting_position())
+
+        # Act
+        moves = list(bitboard.generate_moves())
+
+        # Assert
+        assert len(moves) == 20
+
+    @staticmethod
+    def test_round_trip_preserves_pieces():
+        # Arrange
+        board = Board.at_starting_position()
+        board.move_piece(Square.at(1, 4), Square.at(3, 4))
+
+        # Act
+        converted = BitBoard.from_board(board).to_board()
+
+        # Assert
+        for row in range(8):
+            for col in range(8):
+                original = board.get_piece(Square.at(row, col))
+                piece = converted.get_piece(Square.at(row, col))
+                assert type(piece) == type(original)
+                assert piece is None or piece.player == original.player
+        assert converted.current_player == Player.BLACK
+
+    @staticmethod
+    def test_round_trip_preserves_castling_rights_and_clocks():
+        # Arrange
+        fen = 'r3k2r/8/8/3pP3/8/8/8/R3K2R w Kq d6 7 30'
+        board = board_from_fen(fen)
+
+        # Act
+        converted = BitBoard.from_board(board).to_board()
+
+        # Assert
+        assert board_to_fen(converted) == fen
+
+    @staticmethod
+    def test_only_the_side_to_move_can_capture_en_passant():
+        # Arrange
+        board = board_from_fen('4k3/8/8/8/3P4/8/2P5/4K3 b - d3 0 1')
+
+        # Act
+        moves = BitBoard.from_board(board).get_available_moves(Square.at(1, 2))
+
+        # Assert
+        assert set(moves) == {Square.at(2, 2), Square.at(3, 2)}
+
+    @staticmethod
+    def test_rook_moves_stop_at_blockers():
+        # Arrange
+        board = Board.empty()
+        board.set_piece(Square.at(1, 4), Rook(Player.BLACK))
+        board.set_piece(Square.at(3, 4), Pawn(Player.WHITE))
+        board.set_piece(Square.at(1, 6), Pawn(Player.BLACK))
+        bitboard = BitBoard.from_board(board)
+
+        # Act
+        moves = bitboard.get_available_moves(Square.at(1, 4))
+
+        # Assert
+        assert Square.at(2, 4) in moves
+        assert Square.at(3, 4) in moves
+        assert Square.at(4, 4) not in moves
+        assert Square.at(1, 5) in moves
+        assert Square.at(1, 6) not in moves
+        assert len(moves) == 8
+
+    @staticmethod
+    def test_knight_and_queen_moves_from_corner():
+        # Arrange
+        board = Board.empty()
+        board.set_piece(Square.at(0, 0), Knight(Player.WHITE))
+        board.set_piece(Square.at(7, 7), Queen(Player.WHITE))
+        bitboard = BitBoard.from_board(board)
+
+        # Act
+        knight_moves = bitboard.get_available_moves(Square.at(0, 0))
+        queen_moves = bitboard.get_available_moves(Square.at(7, 7))
+
+        # Assert
+        assert set(knight_moves) == {Square.at(1, 2), Square.at(2, 1)}
+        assert len(queen_moves) == 20
+
+    @staticmethod
+    def test_pawn_moves_match_board_pawn_moves():
+        # Arrange
+        board = Board.empty()
+        pawn = Pawn(Player.WHITE)
+        board.set_piece(Square.at(4, 4), pawn)
+        board.set_piece(Square.at(4, 3), Pawn(Player.BLACK))
+        enemy = Pawn(Player.BLACK)
+        board.set_piece(Square.at(6, 5), enemy)
+        board.current_player = Player.BLACK
+        board.move_piece(Square.at(6, 5), Square.at(4, 5))
+
+        # Act
+        moves = BitBoard.from_board(board).get_available_moves(Square.at(4, 4))
+
+        # Assert
+        assert set(moves) == set(pawn.get_available_moves(board))
+        assert Square.at(5, 5) in moves
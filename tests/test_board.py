@@ -1,5 +1,8 @@
+import pytest
+
 from chessington.engine.board import Board
-from chessington.engine.data import Player, Square
+from chessington.engine.data import Player, Square, Move, ALL_CASTLING, WHITE_KINGSIDE, WHITE_QUEENSIDE
+from chessington.engine.pieces import Pawn, Knight, Rook, King
 
 def test_new_board_has_white_pieces_at_bottom():
 
@@ -35,4 +38,298 @@ def test_pieces_can_be_moved_on_the_board():
     board.move_piece(from_square, to_square)
 
     assert board.get_piece(from_square) is None
-    assert board.get_piece(to_square) is piece
\ No newline at end of file
+    assert board.get_piece(to_square) is piece
+
+def test_find_piece_follows_moved_pieces():
+
+    # Arrange
+    board = Board.at_starting_position()
+    from_square = Square.at(1, 4)
+    piece = board.get_piece(from_square)
+
+    # Act
+    to_square = Square.at(3, 4)
+    board.move_piece(from_square, to_square)
+
+    # Assert
+    assert board.find_piece(piece) == to_square
+
+def test_find_piece_refuses_to_guess_between_squares_of_a_shared_piece():
+
+    # Arrange
+    board = Board.empty()
+    rook = Rook.shared(Player.WHITE)
+    board.set_piece(Square.at(0, 0), rook)
+    board.set_piece(Square.at(0, 7), rook)
+
+    # Act
+    with pytest.raises(ValueError):
+        board.find_piece(rook)
+    board.set_piece(Square.at(0, 0), None)
+
+    # Assert
+    assert board.find_piece(rook) == Square.at(0, 7)
+
+def test_captured_pieces_are_removed_from_player_pieces():
+
+    # Arrange
+    board = Board.at_starting_position()
+    captured = board.get_piece(Square.at(6, 3))
+
+    # Act
+    board.set_piece(Square.at(6, 3), board.get_piece(Square.at(1, 3)))
+    board.set_piece(Square.at(1, 3), None)
+
+    # Assert
+    assert captured not in board.get_pieces(Player.BLACK)
+    assert len(board.get_pieces(Player.BLACK)) == 15
+    assert len(board.get_pieces(Player.WHITE)) == 16
+
+def test_repeated_positions_are_spotted():
+
+    # Arrange
+    board = Board.at_starting_position()
+    moves = [((0, 6), (2, 5)), ((7, 6), (5, 5)), ((2, 5), (0, 6)), ((5, 5), (7, 6))]
+
+    # Act
+    repeated = []
+    for from_square, to_square in moves:
+        board.make_move(Square.at(*from_square), Square.at(*to_square))
+        repeated.append(board.is_repetition())
+
+    # Assert
+    assert repeated == [False, False, False, True]
+
+def test_unmake_move_restores_a_capture():
+
+    # Arrange
+    board = Board.at_starting_position()
+    attacker = board.get_piece(Square.at(1, 3))
+    victim = board.get_piece(Square.at(6, 4))
+    board.set_piece(Square.at(5, 4), None)
+    board.set_piece(Square.at(2, 3), None)
+    board.make_move(Square.at(1, 3), Square.at(6, 4))
+
+    # Act
+    board.unmake_move()
+
+    # Assert
+    assert board.get_piece(Square.at(1, 3)) is attacker
+    assert board.get_piece(Square.at(6, 4)) is victim
+    assert board.find_piece(victim) == Square.at(6, 4)
+    assert board.current_player == Player.WHITE
+    assert board.turn == 1
+
+def test_unmake_move_restores_an_en_passant_victim():
+
+    # Arrange
+    board = Board.empty()
+    pawn = Pawn(Player.WHITE)
+    board.set_piece(Square.at(4, 4), pawn)
+    victim = Pawn(Player.BLACK)
+    board.set_piece(Square.at(6, 5), victim)
+    board.current_player = Player.BLACK
+    board.make_move(Square.at(6, 5), Square.at(4, 5))
+    board.make_move(Square.at(4, 4), Square.at(5, 5))
+
+    # Act
+    record = board.unmake_move()
+
+    # Assert
+    assert record.captured is victim
+    assert board.get_piece(Square.at(4, 5)) is victim
+    assert board.get_piece(Square.at(4, 4)) is pawn
+    assert board.get_piece(Square.at(5, 5)) is None
+    assert board.current_player == Player.WHITE
+
+def test_starting_position_has_twenty_legal_moves():
+
+    # Arrange
+    board = Board.at_starting_position()
+
+    # Act
+    moves = board.legal_moves()
+
+    # Assert
+    assert len(moves) == 20
+
+def test_pinned_piece_can_only_move_along_the_pin():
+
+    # Arrange
+    board = Board.empty()
+    board.set_piece(Square.at(0, 4), King(Player.WHITE))
+    board.set_piece(Square.at(2, 4), Rook(Player.WHITE))
+    board.set_piece(Square.at(7, 4), Rook(Player.BLACK))
+    board.set_piece(Square.at(7, 0), King(Player.BLACK))
+
+    # Act
+    rook_moves = [move.to_square for move in board.legal_moves() if move.from_square == Square.at(2, 4)]
+
+    # Assert
+    assert Square.at(7, 4) in rook_moves
+    assert Square.at(2, 5) not in rook_moves
+    assert len(rook_moves) == 6
+
+def test_only_moves_that_escape_check_are_legal():
+
+    # Arrange
+    board = Board.empty()
+    board.set_piece(Square.at(0, 4), King(Player.WHITE))
+    board.set_piece(Square.at(0, 0), Rook(Player.WHITE))
+    board.set_piece(Square.at(7, 4), Rook(Player.BLACK))
+    board.set_piece(Square.at(7, 0), King(Player.BLACK))
+
+    # Act
+    moves = board.legal_moves()
+
+    # Assert
+    assert board.in_check()
+    assert Move(Square.at(0, 0), Square.at(0, 1)) not in moves
+    assert Move(Square.at(0, 4), Square.at(1, 4)) not in moves
+    assert Move(Square.at(0, 4), Square.at(1, 3)) in moves
+
+def test_king_can_castle_but_not_through_check():
+
+    # Arrange
+    board = Board.empty()
+    board.castling_rights = ALL_CASTLING
+    board.set_piece(Square.at(0, 4), King(Player.WHITE))
+    board.set_piece(Square.at(0, 0), Rook(Player.WHITE))
+    board.set_piece(Square.at(0, 7), Rook(Player.WHITE))
+    board.set_piece(Square.at(7, 3), Rook(Player.BLACK))
+    board.set_piece(Square.at(7, 7), King(Player.BLACK))
+
+    # Act
+    moves = board.legal_moves()
+
+    # Assert
+    assert Move(Square.at(0, 4), Square.at(0, 6)) in moves
+    assert Move(Square.at(0, 4), Square.at(0, 2)) not in moves
+
+def test_castling_moves_the_rook_and_loses_castling_rights():
+
+    # Arrange
+    board = Board.empty()
+    board.castling_rights = ALL_CASTLING
+    rook = Rook(Player.WHITE)
+    board.set_piece(Square.at(0, 4), King(Player.WHITE))
+    board.set_piece(Square.at(0, 7), rook)
+
+    # Act
+    board.make_move(Square.at(0, 4), Square.at(0, 6))
+
+    # Assert
+    assert board.get_piece(Square.at(0, 5)) is rook
+    assert board.castling_rights == ALL_CASTLING & ~(WHITE_KINGSIDE | WHITE_QUEENSIDE)
+
+def test_pawns_promote_on_the_far_rank():
+
+    # Arrange
+    board = Board.empty()
+    board.set_piece(Square.at(6, 0), Pawn(Player.WHITE))
+
+    # Act
+    moves = board.legal_moves()
+    board.make_move(Square.at(6, 0), Square.at(7, 0), Knight)
+
+    # Assert
+    assert len(moves) == 4
+    assert isinstance(board.get_piece(Square.at(7, 0)), Knight)
+
+def test_zobrist_key_matches_after_transposed_moves():
+
+    # Arrange
+    board1 = Board.at_starting_position()
+    board2 = Board.at_starting_position()
+
+    # Act
+    for from_square, to_square in [((0, 1), (2, 2)), ((7, 1), (5, 2)), ((0, 6), (2, 5))]:
+        board1.move_piece(Square.at(*from_square), Square.at(*to_square))
+    for from_square, to_square in [((0, 6), (2, 5)), ((7, 1), (5, 2)), ((0, 1), (2, 2))]:
+        board2.move_piece(Square.at(*from_square), Square.at(*to_square))
+
+    # Assert
+    assert board1.zobrist_key == board2.zobrist_key
+    assert board1.zobrist_key != Board.at_starting_position().zobrist_key
+
+def test_zobrist_key_is_restored_by_unmake_move():
+
+    # Arrange
+    board = Board.at_starting_position()
+    board.debug = True
+    key = board.zobrist_key
+
+    # Act
+    board.make_move(Square.at(1, 4), Square.at(3, 4))
+    moved_key = board.zobrist_key
+    board.unmake_move()
+
+    # Assert
+    assert moved_key != key
+    assert board.zobrist_key == key
+
+def test_square_at_returns_the_same_square_every_time():
+
+    # Act
+    square = Square.at(3, 4)
+
+    # Assert
+    assert square is Square.at(3, 4)
+    assert square == Square(3, 4)
+    assert not hasattr(square, '__dict__')
+
+def test_shared_pieces_can_stand_on_many_squares():
+
+    # Arrange
+    board = Board.empty()
+    pawn = Pawn.shared(Player.WHITE)
+    board.set_piece(Square.at(0, 4), King.shared(Player.WHITE))
+    board.set_piece(Square.at(7, 4), King.shared(Player.BLACK))
+    for col in range(8):
+        board.set_piece(Square.at(1, col), pawn)
+
+    # Act
+    moves = board.legal_moves()
+    board.make_move(Square.at(1, 0), Square.at(3, 0))
+    board.unmake_move()
+
+    # Assert
+    assert Pawn.shared(Player.WHITE) is pawn
+    assert not hasattr(pawn, '__dict__')
+    assert len(board.get_pieces(Player.WHITE)) == 9
+    assert len(moves) == 18
+    assert board.get_piece(Square.at(1, 0)) is pawn
+
+def test_changes_report_only_the_squares_a_move_changed():
+
+    # Arrange
+    board = Board.at_starting_position()
+    board.track_changes()
+
+    # Act
+    board.move_piece(Square.at(1, 4), Square.at(3, 4))
+    board.make_move(Square.at(6, 0), Square.at(5, 0))
+    board.unmake_move()
+    changes = board.take_changes()
+
+    # Assert
+    assert changes == {Square.at(1, 4): None, Square.at(3, 4): board.get_piece(Square.at(3, 4))}
+    assert board.take_changes() == {}
+
+def test_changes_include_a_pawn_captured_en_passant():
+
+    # Arrange
+    board = Board.empty()
+    board.set_piece(Square.at(0, 4), King(Player.WHITE))
+    board.set_piece(Square.at(7, 4), King(Player.BLACK))
+    board.set_piece(Square.at(4, 4), Pawn(Player.WHITE))
+    board.set_piece(Square.at(6, 3), Pawn(Player.BLACK))
+    board.current_player = Player.BLACK
+    board.move_piece(Square.at(6, 3), Square.at(4, 3))
+    board.track_changes()
+
+    # Act
+    board.move_piece(Square.at(4, 4), Square.at(5, 3))
+
+    # Assert
+    assert set(board.take_changes()) == {Square.at(4, 4), Square.at(5, 3), Square.at(4, 3)}
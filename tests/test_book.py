@@ -0,0 +1,115 @@
+import io
+
+import pytest
+
+from chessington.engine.board import Board
+from chessington.engine.book import OpeningBook, build_book, encode_move, decode_move
+from chessington.engine.data import Move, Square
+from chessington.engine.fen import board_from_fen
+from chessington.engine.pgn import read_games
+from chessington.engine.pieces import Knight
+from chessington.engine.search import Searcher
+
+GAMES = '''[Result "1-0"]
+
+1. e4 e5 2. Nf3 Nc6 1-0
+
+[Result "1-0"]
+
+1. e4 c5 2. Nf3 d6 1-0
+
+[Result "0-1"]
+
+1. d4 d5 2. c4 e6 0-1
+
+[Result "1/2-1/2"]
+
+1. e4 e5 2. Bc4 Nf6 1/2-1/2
+'''
+
+E2E4 = Move(Square.at(1, 4), Square.at(3, 4))
+D2D4 = Move(Square.at(1, 3), Square.at(3, 3))
+
+
+def build(tmp_path, games=GAMES, **options):
+    path = tmp_path / 'book.bin'
+    build_book(read_games(io.StringIO(games)), str(path), **options)
+    return OpeningBook(str(path))
+
+
+class TestOpeningBook:
+
+    @staticmethod
+    def test_moves_round_trip_through_their_encoding():
+        # Arrange
+        move = Move(Square.at(6, 0), Square.at(7, 1), Knight)
+
+        # Act
+        decoded = decode_move(encode_move(move))
+
+        # Assert
+        assert decoded == move
+
+    @staticmethod
+    def test_entries_are_weighted_by_results(tmp_path):
+        # Arrange
+        book = build(tmp_path)
+
+        # Act
+        entries = book.entries(Board.at_starting_position())
+        book.close()
+
+        # Assert
+        assert entries == [(E2E4, 5, 3), (D2D4, 0, 1)]
+
+    @staticmethod
+    def test_later_positions_are_found_and_unknown_ones_are_not(tmp_path):
+        # Arrange
+        after_e4_e5 = board_from_fen('rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6 0 2')
+        unknown = board_from_fen('rnbqkbnr/pppppppp/8/8/8/7N/PPPPPPPP/RNBQKB1R b KQkq - 1 1')
+
+        # Act
+        with build(tmp_path) as book:
+            moves = [move for move, _, _ in book.entries(after_e4_e5)]
+            missing = book.best_move(unknown)
+
+        # Assert
+        assert moves == [Move(Square.at(0, 6), Square.at(2, 5)), Move(Square.at(0, 5), Square.at(3, 2))]
+        assert missing is None
+
+    @staticmethod
+    def test_moves_can_be_limited_by_ply_and_popularity(tmp_path):
+        # Act
+        with build(tmp_path, plies=1, min_games=2) as book:
+            count = len(book)
+            best_move = book.best_move(Board.at_starting_position())
+
+        # Assert
+        assert count == 1
+        assert best_move == E2E4
+
+    @staticmethod
+    def test_the_search_plays_book_moves_without_searching(tmp_path):
+        # Arrange
+        book = build(tmp_path, games='[Result "1-0"]\n\n1. e4 e5 1-0\n')
+        searcher = Searcher(max_depth=3, opening_book=book)
+
+        # Act
+        in_book = searcher.search(Board.at_starting_position())
+        out_of_book = searcher.search(board_from_fen('4k3/8/8/8/8/8/8/R3K3 w - - 0 1'))
+        book.close()
+
+        # Assert
+        assert in_book.best_move == E2E4
+        assert in_book.nodes == 0
+        assert out_of_book.nodes > 0
+
+    @staticmethod
+    def test_other_files_are_rejected(tmp_path):
+        # Arrange
+        path = tmp_path / 'not-a-book.bin'
+        path.write_bytes(b'nonsense')
+
+        # Act / Assert
+        with pytest.raises(ValueError):
+            OpeningBook(str(path))
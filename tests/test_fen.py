@@ -0,0 +1,113 @@
+import io
+
+import pytest
+
+from chessington.engine.board import Board
+from chessington.engine.data import Player, Square, ALL_CASTLING, BLACK_KINGSIDE
+from chessington.engine.fen import board_from_fen, board_to_fen, read_fens, STARTING_FEN
+from chessington.engine.perft import STANDARD_POSITIONS
+
+
+class TestFen:
+
+    @staticmethod
+    def test_starting_fen_matches_starting_position():
+        # Act
+        board = board_from_fen(STARTING_FEN)
+
+        # Assert
+        assert board.zobrist_key == Board.at_starting_position().zobrist_key
+        assert board.castling_rights == ALL_CASTLING
+        assert board.current_player == Player.WHITE
+        assert board.turn == 1
+
+    @staticmethod
+    def test_standard_positions_round_trip():
+        for _, fen, _ in STANDARD_POSITIONS:
+            assert board_to_fen(board_from_fen(fen)) == fen
+
+    @staticmethod
+    def test_moves_are_reflected_in_exported_fen():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Act
+        board.move_piece(Square.at(1, 4), Square.at(3, 4))
+        board.move_piece(Square.at(7, 6), Square.at(5, 5))
+
+        # Assert
+        assert board_to_fen(board) == 'rnbqkb1r/pppppppp/5n2/8/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 1 2'
+
+    @staticmethod
+    def test_en_passant_square_allows_en_passant_capture():
+        # Arrange
+        board = board_from_fen('rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3')
+
+        # Act
+        pawn = board.get_piece(Square.at(4, 4))
+        moves = pawn.get_available_moves(board, Square.at(4, 4))
+
+        # Assert
+        assert board.en_passant_square == Square.at(5, 5)
+        assert Square.at(5, 5) in moves
+        assert Square.at(5, 3) not in moves
+
+    @staticmethod
+    def test_black_to_move_and_partial_castling_rights():
+        # Act
+        board = board_from_fen('r3k2r/8/8/8/8/8/8/4K3 b k - 12 40')
+
+        # Assert
+        assert board.current_player == Player.BLACK
+        assert board.castling_rights == BLACK_KINGSIDE
+        assert board.halfmove_clock == 12
+        assert board.turn == 80
+
+    @staticmethod
+    def test_invalid_fen_is_rejected():
+        with pytest.raises(ValueError):
+            board_from_fen('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP w KQkq - 0 1')
+        with pytest.raises(ValueError):
+            board_from_fen('rnbqkbnr/ppppxppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1')
+
+    @staticmethod
+    @pytest.mark.parametrize('castling', ['KK', 'qk', 'KQx'])
+    def test_repeated_or_misordered_castling_rights_are_rejected(castling):
+        with pytest.raises(ValueError):
+            board_from_fen(f'r3k2r/8/8/8/8/8/8/R3K2R w {castling} - 0 1')
+
+    @staticmethod
+    @pytest.mark.parametrize('fen', ['rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f3 0 3',
+                                     'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq c6 0 3',
+                                     'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR b KQkq f6 0 3',
+                                     'rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f9 0 3'])
+    def test_impossible_en_passant_squares_are_rejected(fen):
+        with pytest.raises(ValueError, match='en passant'):
+            board_from_fen(fen)
+
+    @staticmethod
+    def test_read_fens_streams_boards_from_a_file():
+        # Arrange
+        source = io.StringIO('# comment\n' + STARTING_FEN + '\n\n8/8/8/8/8/8/8/K6k b - - bm Kb2;\n')
+
+        # Act
+        boards = read_fens(source)
+        first = next(boards)
+        rest = list(boards)
+
+        # Assert
+        assert len(first.get_pieces(Player.WHITE)) == 16
+        assert len(rest) == 1
+        assert rest[0].current_player == Player.BLACK
+
+    @staticmethod
+    def test_read_fens_accepts_a_path(tmp_path):
+        # Arrange
+        path = tmp_path / 'positions.fen'
+        path.write_text('\n'.join(fen for _, fen, _ in STANDARD_POSITIONS))
+
+        # Act
+        boards = list(read_fens(path))
+
+        # Assert
+        assert [board_to_fen(board) for board in boards] == [fen for _, fen, _ in STANDARD_POSITIONS]
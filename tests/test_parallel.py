@@ -0,0 +1,64 @@
+import time
+
+from chessington.engine.board import Board
+from chessington.engine.data import Player, Square, Move
+from chessington.engine.fen import board_from_fen
+from chessington.engine.parallel import ParallelSearcher
+from chessington.engine.pieces import Pawn, Rook, Queen, King
+from chessington.engine.search import Searcher
+
+
+class TestParallelSearcher:
+
+    @staticmethod
+    def test_finds_the_same_score_as_a_single_search():
+        # Arrange
+        board = Board.empty()
+        board.set_piece(Square.at(0, 4), King(Player.WHITE))
+        board.set_piece(Square.at(3, 3), Rook(Player.WHITE))
+        board.set_piece(Square.at(7, 4), King(Player.BLACK))
+        board.set_piece(Square.at(6, 3), Queen(Player.BLACK))
+        board.set_piece(Square.at(6, 0), Pawn(Player.BLACK))
+
+        # Act
+        with ParallelSearcher(workers=2) as searcher:
+            result = searcher.search(board, max_depth=2)
+        expected = Searcher().search(board, max_depth=2)
+
+        # Assert
+        assert result.best_move == Move(Square.at(3, 3), Square.at(6, 3))
+        assert result.score == expected.score
+        assert result.depth == 2
+        assert result.principal_variation[0] == result.best_move
+
+    @staticmethod
+    def test_pool_is_reused_between_searches():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Act
+        with ParallelSearcher(workers=2, max_depth=1) as searcher:
+            searcher.search(board)
+            pool = searcher._pool
+            result = searcher.search(board)
+
+            # Assert
+            assert searcher._pool is pool
+            assert result.best_move in board.legal_moves()
+
+    @staticmethod
+    def test_search_stops_at_the_time_limit():
+        # Arrange
+        board = board_from_fen('r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1')
+
+        with ParallelSearcher(workers=2) as searcher:
+            searcher.search(board, max_depth=1)
+
+            # Act
+            start = time.perf_counter()
+            result = searcher.search(board, time_limit=0.5)
+            elapsed = time.perf_counter() - start
+
+        # Assert
+        assert elapsed < 0.8
+        assert result.best_move in board.legal_moves()
@@ -0,0 +1,71 @@
+import json
+
+from chessington.engine.board import Board
+from chessington.engine.fen import board_from_fen
+from chessington.engine.perft import perft, divide, run_benchmark, write_results, STANDARD_POSITIONS
+
+
+class TestPerft:
+
+    @staticmethod
+    def test_starting_position_node_counts():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Act
+        counts = [perft(board, depth) for depth in range(1, 4)]
+
+        # Assert
+        assert counts == [20, 400, 8902]
+
+    @staticmethod
+    def test_divide_sums_to_perft():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Act
+        counts = divide(board, 2)
+
+        # Assert
+        assert len(counts) == 20
+        assert sum(counts.values()) == 400
+
+    @staticmethod
+    def test_standard_positions_match_known_counts():
+        # Act
+        results = run_benchmark(2, STANDARD_POSITIONS)
+
+        # Assert
+        assert len(results) == 2 * len(STANDARD_POSITIONS)
+        assert all(result['correct'] for result in results)
+
+    @staticmethod
+    def test_results_are_written_as_json(tmp_path):
+        # Arrange
+        results = run_benchmark(1, STANDARD_POSITIONS[:1])
+        path = tmp_path / 'perft.json'
+
+        # Act
+        write_results(results, path)
+
+        # Assert
+        report = json.loads(path.read_text())
+        assert report['results'][0]['nodes'] == 20
+
+    @staticmethod
+    def test_incremental_zobrist_key_survives_a_perft_walk():
+        # Arrange
+        board = board_from_fen(STANDARD_POSITIONS[1][1])
+        board.debug = True
+
+        def walk(depth):
+            assert board.zobrist_key is not None
+            if depth == 0:
+                return
+            for move in board.legal_moves():
+                board.make_move(move.from_square, move.to_square, move.promotion)
+                walk(depth - 1)
+                board.unmake_move()
+
+        # Act / Assert
+        walk(2)
@@ -0,0 +1,159 @@
+import io
+
+import pytest
+
+from chessington.engine.board import Board
+from chessington.engine.data import Player, Square, WHITE_KINGSIDE
+from chessington.engine.fen import board_to_fen
+from chessington.engine.pgn import Game, parse_san, move_to_san, read_games
+from chessington.engine.pieces import Pawn, Knight, Rook, King
+
+GAMES = '''[Event "First"]
+[White "Alice"]
+[Black "Bob"]
+[Result "1-0"]
+
+1. e4 e5 2. Qh5 Nc6 3. Bc4 {Threatening mate} Nf6?? (3... g6 4. Qf3) 4. Qxf7# 1-0
+
+[Event "Second"]
+[White "Carol \\"The Rook\\""]
+[Black "Alice"]
+[Result "1/2-1/2"]
+
+1. d4 d5 2. c4 $1 e6 ; the Queen's Gambit Declined
+3. Nc3 Nf6 1/2-1/2
+
+[Event "Third"]
+[SetUp "1"]
+[FEN "4k3/P7/8/8/8/8/8/4K3 w - - 0 1"]
+[Result "*"]
+
+1. a8=N *
+'''
+
+
+class TestPgn:
+
+    @staticmethod
+    def test_read_games_yields_headers_and_moves():
+        # Act
+        games = list(read_games(io.StringIO(GAMES)))
+
+        # Assert
+        assert [game.headers['Event'] for game in games] == ['First', 'Second', 'Third']
+        assert games[1].headers['White'] == 'Carol "The Rook"'
+        assert games[0].san_moves() == ['e4', 'e5', 'Qh5', 'Nc6', 'Bc4', 'Nf6??', 'Qxf7#']
+        assert games[1].san_moves() == ['d4', 'd5', 'c4', 'e6', 'Nc3', 'Nf6']
+        assert games[0].result == '1-0'
+
+    @staticmethod
+    def test_read_games_memory_maps_a_path(tmp_path):
+        # Arrange
+        path = tmp_path / 'games.pgn'
+        path.write_bytes(GAMES.encode('utf-8'))
+
+        # Act
+        games = read_games(path)
+        first = next(games)
+
+        # Assert
+        assert first.headers['Black'] == 'Bob'
+        assert len(list(games)) == 2
+
+    @staticmethod
+    def test_read_games_skips_games_rejected_by_filter():
+        # Act
+        games = list(read_games(io.BytesIO(GAMES.encode('utf-8')),
+                                accept=lambda headers: 'Alice' in (headers.get('White'), headers.get('Black'))))
+
+        # Assert
+        assert [game.headers['Event'] for game in games] == ['First', 'Second']
+
+    @staticmethod
+    def test_replay_plays_moves_on_the_board():
+        # Arrange
+        game = next(read_games(io.StringIO(GAMES)))
+
+        # Act
+        positions = [board_to_fen(board) for board, _ in game.replay()]
+
+        # Assert
+        assert len(positions) == 7
+        assert positions[-1] == 'r1bqkb1r/pppp1Qpp/2n2n2/4p3/2B1P3/8/PPPP1PPP/RNB1K1NR b KQkq - 0 4'
+
+    @staticmethod
+    def test_replay_starts_from_fen_header():
+        # Arrange
+        game = list(read_games(io.StringIO(GAMES)))[2]
+
+        # Act
+        moves = game.moves()
+
+        # Assert
+        assert moves[0].promotion is Knight
+
+    @staticmethod
+    def test_parse_san_castling_and_disambiguation():
+        # Arrange
+        board = Board.empty()
+        board.set_piece(Square.at(0, 4), King(Player.WHITE))
+        board.set_piece(Square.at(0, 7), Rook(Player.WHITE))
+        board.set_piece(Square.at(7, 4), King(Player.BLACK))
+        board.set_piece(Square.at(2, 1), Knight(Player.WHITE))
+        board.set_piece(Square.at(2, 5), Knight(Player.WHITE))
+        board.castling_rights = WHITE_KINGSIDE
+
+        # Act
+        castle = parse_san(board, 'O-O')
+        knight = parse_san(board, 'Nbd4')
+
+        # Assert
+        assert castle.to_square == Square.at(0, 6)
+        assert knight.from_square == Square.at(2, 1)
+        assert move_to_san(board, knight) == 'Nbd4'
+        with pytest.raises(ValueError):
+            parse_san(board, 'Nd4')
+
+    @staticmethod
+    def test_parse_san_en_passant_and_promotion():
+        # Arrange
+        board = Board.at_starting_position()
+        for san in ['e4', 'a6', 'e5', 'd5']:
+            move = parse_san(board, san)
+            board.move_piece(move.from_square, move.to_square, move.promotion)
+
+        # Act
+        move = parse_san(board, 'exd6')
+
+        # Assert
+        assert move.to_square == Square.at(5, 3)
+        assert isinstance(board.get_piece(move.from_square), Pawn)
+        assert move_to_san(board, move) == 'exd6'
+
+    @staticmethod
+    def test_parse_san_rejects_illegal_moves():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Assert
+        with pytest.raises(ValueError):
+            parse_san(board, 'e5')
+        with pytest.raises(ValueError):
+            parse_san(board, 'Qh5')
+        with pytest.raises(ValueError):
+            parse_san(board, 'hello')
+
+    @staticmethod
+    def test_game_defaults_to_starting_position():
+        # Arrange
+        game = Game({}, '1. Nf3 Nf6 2. g3 g6 3. Bg2 Bg7 4. O-O O-O')
+
+        # Act
+        board = game.starting_board()
+        for _ in game.replay(board):
+            pass
+
+        # Assert
+        assert isinstance(board.get_piece(Square.at(0, 6)), King)
+        assert isinstance(board.get_piece(Square.at(7, 6)), King)
+        assert board.current_player == Player.WHITE
@@ -1,6 +1,6 @@
 from chessington.engine.board import Board
 from chessington.engine.data import Player, Square
-from chessington.engine.pieces import Pawn, Rook
+from chessington.engine.pieces import Pawn, Knight, Bishop, Rook, Queen, King
 
 
 class TestPawns:
@@ -452,3 +452,90 @@ class TestPawns:
         assert Square.at(3, 4) in moves
         assert Square.at(5, 4) not in moves
 
+
+
+class TestKnights:
+
+    @staticmethod
+    def test_knight_jumps_over_pieces():
+        # Arrange
+        board = Board.at_starting_position()
+        knight = board.get_piece(Square.at(0, 1))
+
+        # Act
+        moves = knight.get_available_moves(board)
+
+        # Assert
+        assert set(moves) == {Square.at(2, 0), Square.at(2, 2)}
+
+    @staticmethod
+    def test_knight_can_capture_but_not_land_on_friendly_pieces():
+        # Arrange
+        board = Board.empty()
+        knight = Knight(Player.WHITE)
+        board.set_piece(Square.at(3, 3), knight)
+        board.set_piece(Square.at(5, 4), Pawn(Player.BLACK))
+        board.set_piece(Square.at(5, 2), Pawn(Player.WHITE))
+
+        # Act
+        moves = knight.get_available_moves(board)
+
+        # Assert
+        assert Square.at(5, 4) in moves
+        assert Square.at(5, 2) not in moves
+        assert len(moves) == 7
+
+
+class TestBishops:
+
+    @staticmethod
+    def test_bishop_moves_diagonally_until_blocked():
+        # Arrange
+        board = Board.empty()
+        bishop = Bishop(Player.WHITE)
+        board.set_piece(Square.at(0, 2), bishop)
+        board.set_piece(Square.at(3, 5), Pawn(Player.BLACK))
+        board.set_piece(Square.at(2, 0), Pawn(Player.WHITE))
+
+        # Act
+        moves = bishop.get_available_moves(board)
+
+        # Assert
+        assert set(moves) == {Square.at(1, 3), Square.at(2, 4), Square.at(3, 5), Square.at(1, 1)}
+
+
+class TestQueens:
+
+    @staticmethod
+    def test_queen_moves_in_all_directions():
+        # Arrange
+        board = Board.empty()
+        queen = Queen(Player.BLACK)
+        board.set_piece(Square.at(3, 3), queen)
+
+        # Act
+        moves = queen.get_available_moves(board)
+
+        # Assert
+        assert Square.at(7, 3) in moves
+        assert Square.at(3, 0) in moves
+        assert Square.at(0, 0) in moves
+        assert Square.at(6, 0) in moves
+        assert len(moves) == 27
+
+
+class TestKings:
+
+    @staticmethod
+    def test_king_moves_one_square_in_any_direction():
+        # Arrange
+        board = Board.empty()
+        king = King(Player.WHITE)
+        board.set_piece(Square.at(0, 4), king)
+        board.set_piece(Square.at(1, 4), Pawn(Player.WHITE))
+
+        # Act
+        moves = king.get_available_moves(board)
+
+        # Assert
+        assert set(moves) == {Square.at(0, 3), Square.at(0, 5), Square.at(1, 3), Square.at(1, 5)}
@@ -0,0 +1,87 @@
+import pytest
+
+from chessington.engine.board import Board
+from chessington.engine.data import Square
+from chessington.engine.fen import board_from_fen, board_to_fen
+from chessington.engine.perft import STANDARD_POSITIONS
+from chessington.engine.positions import encode_position, decode_position, write_positions, PositionStore, \
+    POSITION_BYTES
+
+
+class TestPositionEncoding:
+
+    @staticmethod
+    def test_standard_positions_round_trip():
+        for _, fen, _ in STANDARD_POSITIONS:
+            # Arrange
+            board = board_from_fen(fen)
+
+            # Act
+            data = encode_position(board)
+            decoded = decode_position(data)
+
+            # Assert
+            assert len(data) == POSITION_BYTES
+            assert board_to_fen(decoded) == fen
+            assert decoded.zobrist_key == board.zobrist_key
+
+    @staticmethod
+    def test_en_passant_and_move_history_survive_encoding():
+        # Arrange
+        board = Board.at_starting_position()
+        board.move_piece(Square.at(1, 4), Square.at(3, 4))
+        board.move_piece(Square.at(6, 0), Square.at(5, 0))
+        board.move_piece(Square.at(3, 4), Square.at(4, 4))
+        board.move_piece(Square.at(6, 3), Square.at(4, 3))
+
+        # Act
+        decoded = decode_position(encode_position(board))
+
+        # Assert
+        assert board_to_fen(decoded) == board_to_fen(board)
+        assert sorted(map(repr, decoded.legal_moves())) == sorted(map(repr, board.legal_moves()))
+
+
+class TestPositionStore:
+
+    @staticmethod
+    def test_random_access_and_iteration(tmp_path):
+        # Arrange
+        path = tmp_path / 'positions.bin'
+        fens = [fen for _, fen, _ in STANDARD_POSITIONS]
+
+        # Act
+        count = write_positions(path, (board_from_fen(fen) for fen in fens))
+        with PositionStore(path) as store:
+            length = len(store)
+            last = board_to_fen(store[-1])
+            second = bytes(store.raw(1))
+            iterated = [board_to_fen(board) for board in store]
+
+        # Assert
+        assert count == length == len(fens)
+        assert last == fens[-1]
+        assert second == encode_position(board_from_fen(fens[1]))
+        assert iterated == fens
+
+    @staticmethod
+    def test_out_of_range_index_raises(tmp_path):
+        # Arrange
+        path = tmp_path / 'positions.bin'
+        write_positions(path, [Board.at_starting_position()])
+
+        # Act
+        with PositionStore(path) as store:
+            # Assert
+            with pytest.raises(IndexError):
+                store[1]
+
+    @staticmethod
+    def test_rejects_files_that_are_not_stores(tmp_path):
+        # Arrange
+        path = tmp_path / 'positions.bin'
+        path.write_bytes(b'not a position store at all')
+
+        # Assert
+        with pytest.raises(ValueError):
+            PositionStore(path)
@@ -0,0 +1,75 @@
+import json
+import pstats
+
+import pytest
+
+from chessington.engine import profiling
+from chessington.engine.board import Board
+from chessington.engine.data import Player, Square
+from chessington.engine.pieces import Pawn, Piece
+
+
+class TestProfiling:
+
+    @staticmethod
+    def test_the_original_functions_are_restored_when_profiling_ends():
+        # Arrange
+        original = Board.find_piece
+
+        # Act
+        with profiling.profiling():
+            during = Board.find_piece
+
+        # Assert
+        assert during is not original
+        assert Board.find_piece is original
+        assert profiling.active_profile() is None
+
+    @staticmethod
+    def test_calls_are_counted_per_piece_class_and_caller():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Act
+        with profiling.profiling() as profile:
+            board.legal_moves()
+            pawn = board.get_piece(Square.at(1, 4))
+            pawn.get_available_moves(board)
+        functions = profile.summary()['functions']
+
+        # Assert
+        assert functions['Pawn.get_available_moves']['calls'] == 9
+        assert functions['Knight.get_available_moves']['calls'] == 2
+        assert functions['Board.find_piece']['callers'] == {'Pawn.get_available_moves': 1}
+        assert functions['Pawn.get_available_moves']['own_ms'] <= functions['Pawn.get_available_moves']['total_ms']
+        assert json.loads(json.dumps(profile.summary()))['functions'] == functions
+
+    @staticmethod
+    def test_only_one_profile_is_collected_at_a_time():
+        # Act / Assert
+        with profiling.profiling():
+            with pytest.raises(RuntimeError):
+                profiling.enable()
+        assert profiling.disable() is None
+
+    @staticmethod
+    def test_profiles_are_exported_for_prometheus_and_pstats(tmp_path):
+        # Arrange
+        board = Board.empty()
+        board.set_piece(Square.at(1, 0), Pawn(Player.WHITE))
+        path = tmp_path / 'engine.prof'
+
+        # Act
+        with profiling.profiling() as profile:
+            board.get_piece(Square.at(1, 0)).get_available_moves(board)
+        profile.dump_stats(str(path))
+        text = profile.to_prometheus()
+        stats = pstats.Stats(str(path)).stats
+
+        # Assert
+        assert '# TYPE chessington_engine_calls_total counter' in text
+        assert 'chessington_engine_calls_total{function="Piece.obstructed_path"} 2' in text
+        calls = {name: nc for (_, _, name), (_, nc, _, _, _) in stats.items()}
+        assert calls['Pawn.get_available_moves'] == 1
+        assert calls['Piece.obstructed_path'] == 2
+        assert Piece.obstructed_path.__code__.co_firstlineno in {line for _, line, _ in stats}
@@ -0,0 +1,181 @@
+from chessington.engine.board import Board
+from chessington.engine.data import Player, Square, Move
+from chessington.engine.evaluation import evaluate, compute_terms, PIECE_VALUES
+from chessington.engine.fen import board_from_fen
+from chessington.engine.perft import STANDARD_POSITIONS
+from chessington.engine.pieces import Pawn, Rook, Queen, King
+from chessington.engine.search import Searcher, MATE_THRESHOLD
+from chessington.engine.transposition import TranspositionTable
+
+
+class TestEvaluation:
+
+    @staticmethod
+    def test_starting_position_is_level():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Act
+        score = evaluate(board)
+
+        # Assert
+        assert score == 0
+
+    @staticmethod
+    def test_extra_material_is_good_for_its_owner():
+        # Arrange
+        board = Board.at_starting_position()
+        board.set_piece(Square.at(6, 0), None)
+
+        # Act
+        white_score = evaluate(board)
+        board.current_player = Player.BLACK
+        black_score = evaluate(board)
+
+        # Assert
+        assert white_score > 0
+        assert black_score == -white_score
+
+    @staticmethod
+    def test_en_passant_capture_updates_the_evaluation_terms():
+        # Arrange
+        board = board_from_fen('rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3')
+        board.debug = True
+
+        # Act
+        board.move_piece(Square.at(4, 4), Square.at(5, 5))
+
+        # Assert
+        assert board.evaluation_terms == compute_terms(board)
+        assert board.evaluation_terms[0] == PIECE_VALUES[Pawn]
+
+    @staticmethod
+    def test_incremental_evaluation_terms_survive_a_search_tree_walk():
+        # Arrange
+        boards = [board_from_fen(fen) for _, fen, _ in STANDARD_POSITIONS[1:4]]
+
+        def walk(board, depth):
+            assert evaluate(board) is not None
+            if depth == 0:
+                return
+            for move in board.legal_moves():
+                board.make_move(move.from_square, move.to_square, move.promotion)
+                walk(board, depth - 1)
+                board.unmake_move()
+
+        # Act / Assert
+        for board in boards:
+            board.debug = True
+            walk(board, 2)
+
+    @staticmethod
+    def test_endgame_tables_take_over_as_material_comes_off():
+        # Arrange
+        board = board_from_fen('8/8/8/3K4/8/8/8/k7 w - - 0 1')
+
+        # Act
+        material, middlegame, endgame, phase = board.evaluation_terms
+
+        # Assert
+        assert phase == 0
+        assert evaluate(board) == endgame > middlegame
+
+
+class TestSearcher:
+
+    @staticmethod
+    def test_finds_mate_in_one():
+        # Arrange
+        board = Board.empty()
+        board.set_piece(Square.at(0, 6), King(Player.WHITE))
+        board.set_piece(Square.at(6, 0), Rook(Player.WHITE))
+        board.set_piece(Square.at(2, 1), Rook(Player.WHITE))
+        board.set_piece(Square.at(7, 7), King(Player.BLACK))
+
+        # Act
+        result = Searcher(max_depth=3).search(board)
+
+        # Assert
+        assert result.score >= MATE_THRESHOLD
+        assert result.best_move.to_square.row == 7
+        assert result.principal_variation[0] == result.best_move
+
+    @staticmethod
+    def test_captures_a_hanging_queen():
+        # Arrange
+        board = Board.empty()
+        board.set_piece(Square.at(0, 4), King(Player.WHITE))
+        board.set_piece(Square.at(3, 3), Rook(Player.WHITE))
+        board.set_piece(Square.at(7, 4), King(Player.BLACK))
+        board.set_piece(Square.at(6, 3), Queen(Player.BLACK))
+        board.set_piece(Square.at(6, 0), Pawn(Player.BLACK))
+
+        # Act
+        result = Searcher(max_depth=2, transposition_table=TranspositionTable(1024 * 1024)).search(board)
+
+        # Assert
+        assert result.best_move == Move(Square.at(3, 3), Square.at(6, 3))
+
+    @staticmethod
+    def test_node_limit_stops_the_search():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Act
+        result = Searcher(node_limit=2000).search(board)
+
+        # Assert
+        assert result.best_move in board.legal_moves()
+        assert result.nodes <= 2000
+        assert result.depth < 64
+
+    @staticmethod
+    def test_search_leaves_the_board_unchanged():
+        # Arrange
+        board = Board.at_starting_position()
+        key = board.zobrist_key
+
+        # Act
+        Searcher(time_limit=0.2).search(board)
+
+        # Assert
+        assert board.zobrist_key == key
+        assert board.undo_stack == []
+
+    @staticmethod
+    def test_repeating_a_position_is_scored_as_a_draw():
+        # Arrange
+        board = board_from_fen('7k/8/8/8/8/8/8/Q5K1 w - - 0 1')
+        for from_square, to_square in (((0, 0), (1, 0)), ((7, 7), (7, 6)), ((1, 0), (0, 0))):
+            board.make_move(Square.at(*from_square), Square.at(*to_square))
+        back_to_the_start = Move(Square.at(7, 6), Square.at(7, 7))
+
+        # Act
+        result = Searcher(max_depth=1).search(board, root_moves=[back_to_the_start])
+
+        # Assert
+        assert result.score == 0
+
+    @staticmethod
+    def test_each_iteration_starts_from_the_previous_best_move():
+        # Arrange
+        board = board_from_fen(STANDARD_POSITIONS[3][1])
+        searcher = Searcher(max_depth=2)
+        order_moves = searcher._order_moves
+        first_moves = []
+
+        def record_first_move(board, moves, ply, hash_move):
+            ordered = order_moves(board, moves, ply, hash_move)
+            if ply == 0:
+                first_moves.append(ordered[0])
+            return ordered
+
+        searcher._order_moves = record_first_move
+        best_moves = []
+
+        # Act
+        searcher.search(board, on_iteration=lambda result: best_moves.append(result.best_move))
+
+        # Assert
+        assert len(best_moves) == 2
+        assert first_moves[1:] == best_moves[:-1]
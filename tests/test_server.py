@@ -0,0 +1,342 @@
+import asyncio
+import json
+
+import pytest
+
+from chessington.server import GameServer
+from chessington.server.metrics import LatencyRecorder
+from chessington.server.protocol import HttpError, WebSocket, read_request, response
+from chessington.server.sessions import SessionPool, CHECKMATE
+
+FOOLS_MATE_FEN = 'rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3'
+
+
+class Client:
+    """
+    A minimal keep-alive HTTP client for talking to a GameServer in tests.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, server):
+        return cls(*await asyncio.open_connection(server.host, server.port))
+
+    async def request(self, method, path, body=None):
+        payload = json.dumps(body).encode('utf-8') if body is not None else b''
+        self.writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(payload)}\r\n\r\n'
+                          .encode('latin-1') + payload)
+        await self.writer.drain()
+
+        head = (await self.reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+        status = int(head[0].split(' ')[1])
+        headers = dict(line.split(': ', 1) for line in head[1:] if line)
+        body = await self.reader.readexactly(int(headers['Content-Length']))
+        if headers.get('Content-Type') != 'application/json':
+            return status, body.decode('utf-8') if body else None
+        return status, json.loads(body)
+
+    async def websocket(self, path):
+        self.writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                          f'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\nSec-WebSocket-Version: 13\r\n\r\n'
+                          .encode('latin-1'))
+        await self.writer.drain()
+        head = await self.reader.readuntil(b'\r\n\r\n')
+        assert head.startswith(b'HTTP/1.1 101')
+        assert b's3pPLMBiTxaQ9kYGzzhZRbK+xOo=' in head
+        return WebSocket(self.reader, self.writer, mask=True)
+
+    def close(self):
+        self.writer.close()
+
+
+def run_with_server(scenario, **options):
+    async def run():
+        async with GameServer(port=0, **options) as server:
+            await scenario(server)
+
+    asyncio.run(run())
+
+
+async def receive_json(socket):
+    return json.loads(await asyncio.wait_for(socket.receive(), 5))
+
+
+class TestSessionPool:
+
+    @staticmethod
+    def test_creating_beyond_the_limit_evicts_the_least_recently_used_game():
+        # Arrange
+        evicted = []
+        pool = SessionPool(max_sessions=2, on_evict=evicted.append)
+        first = pool.create()
+        second = pool.create()
+        pool.get(first.id)
+
+        # Act
+        pool.create()
+
+        # Assert
+        assert evicted == [second]
+        assert first.id in pool
+        assert second.id not in pool
+        assert pool.evictions == 1
+
+    @staticmethod
+    def test_idle_games_are_evicted_unless_someone_is_watching():
+        # Arrange
+        now = [0.0]
+        pool = SessionPool(idle_seconds=10, clock=lambda: now[0])
+        idle = pool.create()
+        watched = pool.create()
+        watched.subscribers.add(object())
+        now[0] = 5.0
+        recent = pool.create()
+        now[0] = 12.0
+
+        # Act
+        evicted = pool.evict_idle()
+
+        # Assert
+        assert evicted == 1
+        assert idle.id not in pool
+        assert watched.id in pool
+        assert recent.id in pool
+
+    @staticmethod
+    def test_a_game_knows_when_it_is_checkmate():
+        # Arrange
+        pool = SessionPool()
+
+        # Act
+        session = pool.create(FOOLS_MATE_FEN)
+
+        # Assert
+        assert session.status() == CHECKMATE
+        assert session.legal_moves() == []
+
+
+class TestProtocol:
+
+    @staticmethod
+    def test_responses_carry_a_json_body_and_its_length():
+        # Act
+        data = response(201, {'id': 'abc'})
+
+        # Assert
+        head, body = data.split(b'\r\n\r\n')
+        assert head.startswith(b'HTTP/1.1 201 Created')
+        assert f'Content-Length: {len(body)}'.encode() in head
+        assert json.loads(body) == {'id': 'abc'}
+
+    @staticmethod
+    @pytest.mark.parametrize('data', [
+        b'POST /games HTTP/1.1\r\nContent-Length: -5\r\n\r\n',
+        b'POST /games HTTP/1.1\r\nContent-Length: 20\r\n\r\n{"fen": ',
+    ])
+    def test_bad_body_lengths_are_rejected(data):
+        # Arrange
+        async def read():
+            reader = asyncio.StreamReader()
+            reader.feed_data(data)
+            reader.feed_eof()
+            return await read_request(reader)
+
+        # Act / Assert
+        with pytest.raises(HttpError) as error:
+            asyncio.run(read())
+        assert error.value.status == 400
+
+
+class TestLatencyRecorder:
+
+    @staticmethod
+    def test_percentiles_are_reported_in_milliseconds():
+        # Arrange
+        recorder = LatencyRecorder()
+
+        # Act
+        for milliseconds in range(1, 101):
+            recorder.record('GET /games/{id}', milliseconds / 1000)
+
+        # Assert
+        summary = recorder.summary()['GET /games/{id}']
+        assert summary['count'] == 100
+        assert round(summary['p50']) == 50
+        assert round(summary['p99']) == 99
+        assert round(summary['max']) == 100
+
+
+class TestGameServer:
+
+    @staticmethod
+    def test_games_can_be_created_and_played_over_one_connection():
+        results = {}
+
+        async def scenario(server):
+            # Arrange
+            client = await Client.connect(server)
+            _, created = await client.request('POST', '/games')
+
+            # Act
+            results['move'] = await client.request('POST', f'/games/{created["id"]}/moves', {'move': 'e2e4'})
+            results['state'] = await client.request('GET', f'/games/{created["id"]}')
+            results['legal'] = await client.request('GET', f'/games/{created["id"]}/moves')
+            client.close()
+
+        run_with_server(scenario)
+
+        # Assert
+        status, state = results['state']
+        assert results['move'][0] == 200
+        assert status == 200
+        assert state['moves'] == ['e2e4']
+        assert state['turn'] == 'black'
+        assert state['fen'] == 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1'
+        assert len(results['legal'][1]['legal_moves']) == 20
+
+    @staticmethod
+    def test_bad_requests_are_answered_with_errors():
+        results = {}
+
+        async def scenario(server):
+            # Arrange
+            client = await Client.connect(server)
+            _, created = await client.request('POST', '/games')
+
+            # Act
+            results['illegal'] = await client.request('POST', f'/games/{created["id"]}/moves', {'move': 'e2e5'})
+            results['unknown game'] = await client.request('GET', '/games/nonsense')
+            results['bad fen'] = await client.request('POST', '/games', {'fen': 'not a fen'})
+            results['fen not a string'] = await client.request('POST', '/games', {'fen': 5})
+            results['wrong method'] = await client.request('PUT', '/games')
+            results['unknown path'] = await client.request('GET', '/nowhere')
+            client.close()
+
+        run_with_server(scenario)
+
+        # Assert
+        assert results['illegal'][0] == 400
+        assert 'e2e5' in results['illegal'][1]['error']
+        assert results['unknown game'][0] == 404
+        assert results['bad fen'][0] == 400
+        assert results['fen not a string'][0] == 400
+        assert results['wrong method'][0] == 405
+        assert results['unknown path'][0] == 404
+
+    @staticmethod
+    def test_unexpected_errors_are_answered_with_a_server_error():
+        results = {}
+
+        def broken(_):
+            raise RuntimeError('broken')
+
+        async def scenario(server):
+            # Arrange
+            server.sessions.create = broken
+            client = await Client.connect(server)
+
+            # Act
+            results['broken'] = await client.request('POST', '/games')
+            results['after'] = await client.request('GET', '/metrics')
+            client.close()
+
+        run_with_server(scenario)
+
+        # Assert
+        assert results['broken'][0] == 500
+        assert results['after'][0] == 200
+
+    @staticmethod
+    def test_moves_are_pushed_to_websocket_subscribers():
+        messages = []
+
+        async def scenario(server):
+            # Arrange
+            client = await Client.connect(server)
+            _, created = await client.request('POST', '/games')
+            watching = await Client.connect(server)
+            watcher = await watching.websocket(f'/games/{created["id"]}/ws')
+            messages.append(await receive_json(watcher))
+
+            # Act
+            await client.request('POST', f'/games/{created["id"]}/moves', {'move': 'g1f3'})
+            messages.append(await receive_json(watcher))
+            await watcher.send({'type': 'move', 'move': 'g8f6'})
+            messages.append(await receive_json(watcher))
+            await watcher.send({'type': 'move', 'move': 'a1a5'})
+            messages.append(await receive_json(watcher))
+            await watcher.close()
+            watching.close()
+            client.close()
+
+        run_with_server(scenario)
+
+        # Assert
+        assert messages[0]['type'] == 'state'
+        assert messages[1]['type'] == 'move'
+        assert messages[1]['move'] == 'g1f3'
+        assert messages[1]['changes'] == {'g1': None, 'f3': 'N'}
+        assert messages[2]['move'] == 'g8f6'
+        assert messages[2]['moves'] == ['g1f3', 'g8f6']
+        assert messages[3]['type'] == 'error'
+
+    @staticmethod
+    def test_evicted_games_close_their_websockets_and_show_up_in_metrics():
+        results = {}
+
+        async def scenario(server):
+            # Arrange
+            client = await Client.connect(server)
+            _, first = await client.request('POST', '/games')
+            watching = await Client.connect(server)
+            watcher = await watching.websocket(f'/games/{first["id"]}/ws')
+            await receive_json(watcher)
+
+            # Act
+            await client.request('POST', '/games')
+            results['closed'] = await asyncio.wait_for(watcher.receive(), 5)
+            results['evicted game'] = await client.request('GET', f'/games/{first["id"]}')
+            results['metrics'] = await client.request('GET', '/metrics')
+            watching.close()
+            client.close()
+
+        run_with_server(scenario, max_sessions=1)
+
+        # Assert
+        _, metrics = results['metrics']
+        assert results['closed'] is None
+        assert results['evicted game'][0] == 404
+        assert metrics['sessions'] == 1
+        assert metrics['evictions'] == 1
+        assert metrics['latency_ms']['POST /games']['count'] == 2
+
+    @staticmethod
+    def test_the_engine_can_be_profiled_while_serving():
+        results = {}
+
+        async def scenario(server):
+            # Arrange
+            client = await Client.connect(server)
+            _, created = await client.request('POST', '/games')
+
+            # Act
+            results['started'] = await client.request('POST', '/profile')
+            results['started again'] = await client.request('POST', '/profile')
+            await client.request('POST', f'/games/{created["id"]}/moves', {'move': 'e2e4'})
+            results['prometheus'] = await client.request('GET', '/profile/prometheus')
+            results['stopped'] = await client.request('DELETE', '/profile')
+            results['not profiling'] = await client.request('GET', '/profile')
+            client.close()
+
+        run_with_server(scenario)
+
+        # Assert
+        _, profile = results['stopped']
+        assert results['started'][0] == 201
+        assert results['started again'][0] == 409
+        assert 'chessington_engine_calls_total{function="Board.move_piece"} 1' in results['prometheus'][1]
+        assert profile['functions']['Board.move_piece']['calls'] == 1
+        assert results['not profiling'][0] == 404
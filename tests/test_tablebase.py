@@ -0,0 +1,111 @@
+import pytest
+
+from chessington.engine.board import Board
+from chessington.engine.data import Move, Square
+from chessington.engine.fen import board_from_fen
+from chessington.engine.search import Searcher, MATE_SCORE
+from chessington.engine.tablebase import Tablebase, ProbeResult, generate, canonical_signature, dependencies, \
+    is_trivial_draw, WIN, DRAWN, LOSS, DTM_KIND
+
+
+@pytest.fixture(scope='module')
+def tablebase(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('tablebases')
+    generate('KQvK', str(directory), workers=1)
+    with Tablebase(str(directory)) as tablebase:
+        yield tablebase
+
+
+class TestSignatures:
+
+    @staticmethod
+    def test_the_stronger_side_is_made_white():
+        # Assert
+        assert canonical_signature('K', 'KQ') == ('KQvK', True)
+        assert canonical_signature('KR', 'KN') == ('KRvKN', False)
+
+    @staticmethod
+    def test_dependencies_include_promotions():
+        # Act
+        found = dependencies('KPvK')
+
+        # Assert
+        assert 'KQvK' in found
+        assert 'KRvK' in found
+        assert is_trivial_draw('KNvK')
+
+    @staticmethod
+    def test_only_canonical_signatures_are_generated(tmp_path):
+        # Act / Assert
+        with pytest.raises(ValueError):
+            generate('KvKQ', str(tmp_path))
+
+
+class TestProbing:
+
+    @staticmethod
+    def test_the_longest_win_is_mate_in_ten(tablebase):
+        # Arrange
+        table = tablebase._open('KQvK', DTM_KIND)
+
+        # Act
+        values = set(table[8:])
+
+        # Assert
+        assert max(value for value in values if value % 2 and value < 250) == 19
+
+    @staticmethod
+    def test_checkmate_is_lost_and_stalemate_is_drawn(tablebase):
+        # Arrange
+        mated = board_from_fen('k5Q1/8/1K6/8/8/8/8/8 b - - 0 1')
+        stalemated = board_from_fen('7k/5Q2/6K1/8/8/8/8/8 b - - 0 1')
+
+        # Assert
+        assert tablebase.probe(mated) == ProbeResult(LOSS, 0)
+        assert tablebase.probe(stalemated) == ProbeResult(DRAWN, None)
+
+    @staticmethod
+    def test_positions_are_probed_with_the_colours_reversed(tablebase):
+        # Arrange
+        board = board_from_fen('8/8/8/8/8/8/1qk5/K7 w - - 0 1')
+
+        # Act
+        result = tablebase.probe(board)
+
+        # Assert
+        assert result.result == LOSS
+        assert tablebase.probe_wdl(board) == LOSS
+
+    @staticmethod
+    def test_other_material_is_not_in_the_tablebase(tablebase):
+        # Assert
+        assert tablebase.probe(Board.at_starting_position()) is None
+        assert tablebase.probe(board_from_fen('k7/8/1K6/8/8/8/8/6R1 w - - 0 1')) is None
+        assert tablebase.probe_wdl(board_from_fen('k7/8/1K6/8/8/8/8/7N w - - 0 1')) == DRAWN
+
+    @staticmethod
+    def test_the_best_move_mates(tablebase):
+        # Arrange
+        board = board_from_fen('k7/8/1K6/8/8/8/8/6Q1 w - - 0 1')
+
+        # Act
+        move = tablebase.best_move(board)
+
+        # Assert
+        assert tablebase.probe(board) == ProbeResult(WIN, 1)
+        assert move == Move(Square.at(0, 6), Square.at(7, 6))
+
+    @staticmethod
+    def test_the_search_uses_the_tablebase(tablebase):
+        # Arrange
+        board = board_from_fen('8/8/8/4k3/8/8/8/KQ6 w - - 0 1')
+        searcher = Searcher(max_depth=2, tablebase=tablebase)
+        plies = tablebase.probe(board).plies
+
+        # Act
+        result = searcher.search(board)
+
+        # Assert
+        assert result.nodes == 0
+        assert result.score == MATE_SCORE - plies
+        assert result.best_move == tablebase.best_move(board)
@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from chessington.engine.fen import board_from_fen
+from chessington.engine.tournament import EngineConfig, Sprt, MatchResult, play_game, run_match, elo_difference, \
+    expected_score, WHITE_WINS, DRAW
+
+MATE_IN_ONE_FEN = 'k7/8/1K6/8/8/8/8/6Q1 w - - 0 1'
+
+
+class TestPlayGame:
+
+    @staticmethod
+    def test_a_game_ends_in_checkmate():
+        # Arrange
+        board = board_from_fen(MATE_IN_ONE_FEN)
+        searcher = EngineConfig('test', max_depth=2).create_searcher()
+
+        # Act
+        result, reason, moves = play_game(searcher, searcher, board)
+
+        # Assert
+        assert result == WHITE_WINS
+        assert reason == 'checkmate'
+        assert moves == ['g1g8']
+
+    @staticmethod
+    def test_bare_kings_are_drawn_at_once():
+        # Arrange
+        board = board_from_fen('k7/8/1K6/8/8/8/8/7N w - - 0 1')
+        searcher = EngineConfig('test', max_depth=1).create_searcher()
+
+        # Act
+        result, reason, moves = play_game(searcher, searcher, board)
+
+        # Assert
+        assert result == DRAW
+        assert reason == 'insufficient material'
+        assert moves == []
+
+
+class TestElo:
+
+    @staticmethod
+    def test_elo_and_expected_score_are_inverses():
+        # Assert
+        assert elo_difference(0.5) == 0
+        assert expected_score(elo_difference(0.75)) == pytest.approx(0.75)
+        assert elo_difference(0.64) == pytest.approx(100, abs=1)
+
+    @staticmethod
+    def test_the_error_shrinks_with_more_games():
+        # Arrange
+        few = MatchResult(wins=6, draws=4, losses=4)
+        many = MatchResult(wins=60, draws=40, losses=40)
+
+        # Assert
+        assert few.elo == pytest.approx(many.elo)
+        assert many.elo_error < few.elo_error
+
+    @staticmethod
+    def test_sprt_decides_once_the_evidence_is_clear():
+        # Arrange
+        sprt = Sprt(elo0=0, elo1=10)
+
+        # Assert
+        assert sprt.decide(wins=10, draws=10, losses=10) is None
+        assert sprt.decide(wins=700, draws=600, losses=500) == 'H1'
+        assert sprt.decide(wins=500, draws=600, losses=700) == 'H0'
+
+
+class TestRunMatch:
+
+    @staticmethod
+    def test_engine_settings_are_parsed():
+        # Act
+        config = EngineConfig.parse('name=new,depth=4,movetime=250,hash=1')
+
+        # Assert
+        assert config == EngineConfig('new', max_depth=4, time_limit=0.25, table_bytes=1024 * 1024)
+
+    @staticmethod
+    def test_each_opening_is_played_with_both_colours(tmp_path):
+        # Arrange
+        engine = EngineConfig('new', max_depth=2, table_bytes=0)
+        opponent = EngineConfig('old', max_depth=2, table_bytes=0)
+        output = tmp_path / 'games.jsonl'
+
+        # Act
+        match = run_match(engine, opponent, [MATE_IN_ONE_FEN], workers=2, output=str(output))
+
+        # Assert
+        games = [json.loads(line) for line in output.read_text().splitlines()]
+        assert sorted((game['white'], game['result']) for game in games) == [('new', '1-0'), ('old', '1-0')]
+        assert (match.wins, match.draws, match.losses) == (1, 0, 1)
+        assert match.games_per_hour > 0
@@ -0,0 +1,83 @@
+from chessington.engine.board import Board
+from chessington.engine.data import Move, Square
+from chessington.engine.transposition import TranspositionTable, ALWAYS_REPLACE, DEPTH_PREFERRED, EXACT, \
+    ENTRY_BYTES, MOVE_BYTES
+
+
+class TestTranspositionTable:
+
+    @staticmethod
+    def test_stored_results_can_be_probed():
+        # Arrange
+        table = TranspositionTable(max_bytes=100 * ENTRY_BYTES)
+        move = Move(Square.at(1, 4), Square.at(3, 4))
+
+        # Act
+        table.store(12345, 3, 42, EXACT, move)
+        entry = table.probe(12345)
+
+        # Assert
+        assert entry.score == 42
+        assert entry.best_move == move
+        assert table.probe(54321) is None
+        assert table.stats()['hits'] == 1
+        assert table.stats()['misses'] == 1
+
+    @staticmethod
+    def test_depth_preferred_keeps_deeper_entry():
+        # Arrange
+        table = TranspositionTable(max_bytes=10 * ENTRY_BYTES, policy=DEPTH_PREFERRED)
+        slots = table.stats()['slots']
+
+        # Act
+        table.store(1, 5, 10, EXACT, None)
+        table.store(1 + slots, 2, 20, EXACT, None)
+
+        # Assert
+        assert table.probe(1).score == 10
+        assert table.probe(1 + slots) is None
+
+    @staticmethod
+    def test_always_replace_keeps_newest_entry():
+        # Arrange
+        table = TranspositionTable(max_bytes=10 * ENTRY_BYTES, policy=ALWAYS_REPLACE)
+        slots = table.stats()['slots']
+
+        # Act
+        table.store(1, 5, 10, EXACT, None)
+        table.store(1 + slots, 2, 20, EXACT, None)
+
+        # Assert
+        assert table.probe(1) is None
+        assert table.probe(1 + slots).score == 20
+        assert table.stats()['evictions'] == 1
+
+    @staticmethod
+    def test_memory_use_never_exceeds_the_cap():
+        # Arrange
+        max_bytes = 50 * ENTRY_BYTES
+        table = TranspositionTable(max_bytes=max_bytes)
+        moves = [Move(Square.at(0, 0), Square.at(0, 1))] * 30
+
+        # Act
+        for key in range(1000):
+            table.store_moves(key, moves)
+
+        # Assert
+        assert table.used_bytes <= max_bytes
+        assert table.stats()['evictions'] > 0
+        assert len(table) * (ENTRY_BYTES + 30 * MOVE_BYTES) <= max_bytes
+
+    @staticmethod
+    def test_board_caches_legal_moves_in_table():
+        # Arrange
+        board = Board.at_starting_position()
+        board.transposition_table = TranspositionTable(max_bytes=1024 * 1024)
+
+        # Act
+        first = board.legal_moves()
+        second = board.legal_moves()
+
+        # Assert
+        assert first == second
+        assert board.transposition_table.hits == 1
@@ -0,0 +1,185 @@
+import asyncio
+import io
+import time
+
+from chessington.engine.board import Board
+from chessington.engine.data import Move, Square
+from chessington.engine.fen import board_to_fen
+from chessington.engine.pieces import Queen
+from chessington.engine.search import MATE_SCORE
+from chessington.engine.uci import UciEngine, move_to_uci, parse_uci_move, format_score, parse_go
+
+
+def run_session(*commands):
+    output = io.StringIO()
+    engine = UciEngine(output)
+
+    async def session():
+        for command in commands:
+            if isinstance(command, float):
+                await asyncio.sleep(command)
+            else:
+                await engine.handle(command)
+        await engine.close()
+
+    asyncio.run(session())
+    return engine, output.getvalue().splitlines()
+
+
+class TestUciNotation:
+
+    @staticmethod
+    def test_moves_round_trip():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Act
+        move = parse_uci_move(board, 'g1f3')
+
+        # Assert
+        assert move == Move(Square.at(0, 6), Square.at(2, 5))
+        assert move_to_uci(move) == 'g1f3'
+        assert move_to_uci(Move(Square.at(6, 0), Square.at(7, 0), Queen)) == 'a7a8q'
+
+    @staticmethod
+    def test_scores_are_reported_in_centipawns_or_moves_to_mate():
+        assert format_score(35) == 'cp 35'
+        assert format_score(MATE_SCORE - 1) == 'mate 1'
+        assert format_score(MATE_SCORE - 3) == 'mate 2'
+        assert format_score(-MATE_SCORE + 2) == 'mate -1'
+
+    @staticmethod
+    def test_go_uses_a_share_of_the_clock():
+        # Arrange
+        board = Board.at_starting_position()
+
+        # Act
+        depth, time_limit, nodes = parse_go(board, ['wtime', '60000', 'btime', '1000', 'winc', '1000'])
+
+        # Assert
+        assert depth is None and nodes is None
+        assert time_limit == 2.5
+
+
+class TestUciEngine:
+
+    @staticmethod
+    def test_handshake():
+        # Act
+        _, lines = run_session('uci', 'isready')
+
+        # Assert
+        assert lines[0] == 'id name Chessington'
+        assert any(line.startswith('option name Hash') for line in lines)
+        assert lines[-2:] == ['uciok', 'readyok']
+
+    @staticmethod
+    def test_position_with_moves():
+        # Act
+        engine, _ = run_session('position startpos moves e2e4 c7c5 g1f3')
+
+        # Assert
+        assert board_to_fen(engine.board) == 'rnbqkbnr/pp1ppppp/8/2p5/4P3/5N2/PPPP1PPP/RNBQKB1R b KQkq - 1 2'
+
+    @staticmethod
+    def test_go_reports_info_and_best_move():
+        # Act
+        _, lines = run_session('position fen 7k/R7/1R6/8/8/8/8/6K1 w - - 0 1', 'go depth 3', 0.5, 'isready')
+
+        # Assert
+        assert any('score mate 1' in line for line in lines if line.startswith('info'))
+        assert lines[lines.index('readyok') - 1] in ('bestmove b6b8', 'bestmove a7a8')
+
+    @staticmethod
+    def test_stop_answers_quickly_during_an_infinite_search():
+        # Arrange
+        output = io.StringIO()
+        engine = UciEngine(output)
+
+        async def session():
+            await engine.handle('position startpos')
+            await engine.handle('go infinite')
+            await asyncio.sleep(0.2)
+            await engine.handle('isready')
+            start = time.perf_counter()
+            await engine.handle('stop')
+            elapsed = time.perf_counter() - start
+            await engine.close()
+            return elapsed
+
+        # Act
+        elapsed = asyncio.run(session())
+        lines = output.getvalue().splitlines()
+
+        # Assert
+        assert elapsed < 0.1
+        assert 'readyok' in lines
+        assert lines[-1].startswith('bestmove ')
+
+    @staticmethod
+    def test_stop_straight_after_go_is_not_lost():
+        # Arrange
+        output = io.StringIO()
+        engine = UciEngine(output)
+
+        async def session():
+            await engine.handle('position startpos')
+            await engine.handle('go infinite')
+            await engine.handle('stop')
+            await engine.close()
+
+        # Act
+        asyncio.run(asyncio.wait_for(session(), 5))
+
+        # Assert
+        assert output.getvalue().splitlines()[-1].startswith('bestmove ')
+
+    @staticmethod
+    def test_an_infinite_search_waits_for_stop_before_its_best_move():
+        # Act
+        _, lines = run_session('position fen 7k/R7/1R6/8/8/8/8/6K1 w - - 0 1', 'go infinite', 0.5, 'isready', 'stop')
+
+        # Assert
+        assert not any(line.startswith('bestmove') for line in lines[:lines.index('readyok')])
+        assert lines[-1] in ('bestmove b6b8', 'bestmove a7a8')
+
+    @staticmethod
+    def test_ucinewgame_clears_the_parallel_workers_tables():
+        # Arrange
+        output = io.StringIO()
+        engine = UciEngine(output)
+        engine.threads = 2
+        engine._create_searchers()
+
+        async def session():
+            await engine.handle('go depth 1')
+            await engine._search_task
+            pool = engine._parallel_searcher._pool
+            await engine.handle('ucinewgame')
+            cleared = engine._parallel_searcher._pool
+            await engine.close()
+            return pool, cleared
+
+        # Act
+        pool, cleared = asyncio.run(session())
+
+        # Assert
+        assert pool is not None
+        assert cleared is None
+
+    @staticmethod
+    def test_setoption_resizes_the_hash_table():
+        # Act
+        engine, _ = run_session('setoption name Hash value 1')
+
+        # Assert
+        assert engine.hash_megabytes == 1
+        assert engine._searcher.transposition_table.max_bytes == 1024 * 1024
+
+    @staticmethod
+    def test_threads_use_a_parallel_search():
+        # Act
+        _, lines = run_session('setoption name Threads value 2', 'position startpos', 'go depth 1', 0.1, 'stop')
+
+        # Assert
+        assert lines[-1].startswith('bestmove ')